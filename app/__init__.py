@@ -11,6 +11,10 @@ NOTIFICATION_STORE = "./app/data/notif/notifications.json"
 DEFAULT_SITE_ETATS = ("ES", "HS")
 DEFAULT_URL_OUVRAGE = "/static/ouvrages/"
 SUFFIXE_APP_VERSION = "V1.0.0"
+DEFAULT_NOTIFICATION_RETENTION_DAYS = 90
+DEFAULT_LOGIN_RATE_LIMIT_PER_LOGIN = 5
+DEFAULT_LOGIN_RATE_LIMIT_PER_IP = 20
+DEFAULT_LOGIN_RATE_LIMIT_WINDOW = 60
 
 def create_app(config_object: str | object = "config.Config") -> Flask:
     """Create, configure, and return the Flask application instance."""
@@ -22,10 +26,57 @@ def create_app(config_object: str | object = "config.Config") -> Flask:
         f"{os.getenv('APP_VERSION', 'Karto-Folium-dev')} {SUFFIXE_APP_VERSION}",
     )
     app.config.setdefault("NOTIFICATION_STORE", NOTIFICATION_STORE)
+    app.config.setdefault(
+        "NOTIFICATION_RETENTION_DAYS",
+        int(os.getenv("NOTIFICATION_RETENTION_DAYS", DEFAULT_NOTIFICATION_RETENTION_DAYS)),
+    )
+    app.config.setdefault("NOTIFICATION_ARCHIVE_DIR", os.getenv("NOTIFICATION_ARCHIVE_DIR"))
+    # Push channel, opened by the notification page only: SSE holds a worker
+    # thread per open tab for NOTIFICATION_STREAM_TIMEOUT s, the long-poll
+    # fallback for NOTIFICATION_POLL_TIMEOUT s.
+    app.config.setdefault("NOTIFICATION_STREAM_ENABLED", os.getenv("NOTIFICATION_STREAM_ENABLED", "1") == "1")
+    app.config.setdefault("NOTIFICATION_STREAM_TIMEOUT", float(os.getenv("NOTIFICATION_STREAM_TIMEOUT", "55")))
+    app.config.setdefault("NOTIFICATION_POLL_TIMEOUT", float(os.getenv("NOTIFICATION_POLL_TIMEOUT", "25")))
     app.config["SITE_ETATS"] = _load_site_states()
     app.config.setdefault("URL_OUVRAGE", os.getenv("URL_OUVRAGE", DEFAULT_URL_OUVRAGE))
-
+    app.config.setdefault(
+        "LOGIN_RATE_LIMIT_PER_LOGIN",
+        int(os.getenv("LOGIN_RATE_LIMIT_PER_LOGIN", DEFAULT_LOGIN_RATE_LIMIT_PER_LOGIN)),
+    )
+    app.config.setdefault(
+        "LOGIN_RATE_LIMIT_PER_IP",
+        int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", DEFAULT_LOGIN_RATE_LIMIT_PER_IP)),
+    )
+    app.config.setdefault(
+        "LOGIN_RATE_LIMIT_WINDOW",
+        float(os.getenv("LOGIN_RATE_LIMIT_WINDOW", DEFAULT_LOGIN_RATE_LIMIT_WINDOW)),
+    )
+    # e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000" (see scripts/benchmark_password_hash.py).
+    app.config.setdefault("PASSWORD_HASH_METHOD", os.getenv("PASSWORD_HASH_METHOD"))
+    app.config.setdefault("METRICS_ENABLED", os.getenv("METRICS_ENABLED", "0") == "1")
+    app.config.setdefault("PROFILE_DIR", os.getenv("PROFILE_DIR"))
+    # Also put app/static/ouvrages (site documents) in downloaded backups.
+    app.config.setdefault("BACKUP_INCLUDE_OUVRAGES", os.getenv("BACKUP_INCLUDE_OUVRAGES", "0") == "1")
+    # Zip bomb guards for uploaded backups: uncompressed size, file count, compression ratio.
+    app.config.setdefault("BACKUP_RESTORE_MAX_BYTES", int(os.getenv("BACKUP_RESTORE_MAX_BYTES", str(512 * 1024 * 1024))))
+    app.config.setdefault("BACKUP_RESTORE_MAX_FILES", int(os.getenv("BACKUP_RESTORE_MAX_FILES", "10000")))
+    app.config.setdefault("BACKUP_RESTORE_MAX_RATIO", int(os.getenv("BACKUP_RESTORE_MAX_RATIO", "100")))
+    # Rendered region picker maps (default: <instance>/region_maps).
+    app.config.setdefault("REGION_MAP_CACHE_DIR", os.getenv("REGION_MAP_CACHE_DIR"))
+    # Snapshots of app/data taken before destructive writes (default: <instance>/snapshots).
+    app.config.setdefault("SNAPSHOT_DIR", os.getenv("SNAPSHOT_DIR"))
+    app.config.setdefault("SNAPSHOT_KEEP", int(os.getenv("SNAPSHOT_KEEP", "200")))
+    app.config.setdefault("SNAPSHOTS_ENABLED", os.getenv("SNAPSHOTS_ENABLED", "1") == "1")
+    # Optional SQLite file shared by the workers; per-process memory otherwise.
+    app.config.setdefault("LOGIN_RATE_LIMIT_DB", os.getenv("LOGIN_RATE_LIMIT_DB"))
+
+    _configure_write_gate(app)
+    _configure_notification_store(app)
+    _configure_login_limiter(app)
+    _configure_metrics(app)
+    _configure_profiling(app)
     _register_blueprints(app)
+    _register_session_refresh(app)
     _register_context_processors(app)
     _register_filters(app)
 
@@ -42,6 +93,53 @@ def _load_site_states() -> tuple[str, ...]:
     return states or DEFAULT_SITE_ETATS
 
 
+def _configure_write_gate(app: Flask) -> None:
+    """Route the writes to app/data through the gate a backup restore closes."""
+    from .utils.file_lock import register_write_gate
+
+    register_write_gate(os.path.join(app.root_path, "data"))
+
+
+def _configure_notification_store(app: Flask) -> None:
+    """Apply the retention policy to the shared notification store."""
+    from .utils.notification_store import get_notification_store
+
+    retention_days = app.config.get("NOTIFICATION_RETENTION_DAYS")
+    store = get_notification_store(app.config["NOTIFICATION_STORE"])
+    store.configure_retention(
+        int(retention_days) if retention_days else None,
+        app.config.get("NOTIFICATION_ARCHIVE_DIR"),
+    )
+
+
+def _configure_login_limiter(app: Flask) -> None:
+    """Attach the login rate limiter to ``app.extensions["login_limiter"]``."""
+    from .utils.rate_limit import LoginRateLimiter, MemoryBuckets, SQLiteBuckets
+
+    db_path = app.config.get("LOGIN_RATE_LIMIT_DB")
+    backend = SQLiteBuckets(db_path) if db_path else MemoryBuckets()
+    app.extensions["login_limiter"] = LoginRateLimiter(
+        backend,
+        per_login=int(app.config["LOGIN_RATE_LIMIT_PER_LOGIN"]),
+        per_ip=int(app.config["LOGIN_RATE_LIMIT_PER_IP"]),
+        window=float(app.config["LOGIN_RATE_LIMIT_WINDOW"]),
+    )
+
+
+def _configure_metrics(app: Flask) -> None:
+    """Time every request for the /metrics endpoint (when METRICS_ENABLED)."""
+    from .utils.metrics import init_metrics
+
+    init_metrics(app)
+
+
+def _configure_profiling(app: Flask) -> None:
+    """Let administrators profile a single request with ?_profile=1."""
+    from .utils.profiling import init_profiling
+
+    init_profiling(app)
+
+
 def _register_blueprints(app: Flask) -> None:
     """Import and register the application's blueprints."""
     from .blueprints.auth.auth import auth_bp
@@ -56,6 +154,7 @@ def _register_blueprints(app: Flask) -> None:
     from .blueprints.gestion_user.users import users_bp
     from .blueprints.notif.notif import notif_bp
     from .blueprints.rights.niveau_user import rights_bp
+    from .blueprints.monitoring.metrics import monitoring_bp
 
     app.register_blueprint(carto_main_bp)
     app.register_blueprint(auth_bp, url_prefix="/auth")
@@ -69,11 +168,20 @@ def _register_blueprints(app: Flask) -> None:
     app.register_blueprint(notif_bp, url_prefix="/notif")
     app.register_blueprint(contrats_bp, url_prefix="/contrats")
     app.register_blueprint(region_bp, url_prefix="/regions")
+    app.register_blueprint(monitoring_bp)
+
+
+def _register_session_refresh(app: Flask) -> None:
+    """Keep session permissions in step with users.json."""
+    from .utils.auth import refresh_session_user
+
+    app.before_request(refresh_session_user)
 
 
 def _register_context_processors(app: Flask) -> None:
     """Expose global template variables."""
-    from .utils.utils_json import load_json_file
+    from .utils.notification_store import get_notification_store
+    from .utils.rights_registry import get_rights_registry
 
     @app.context_processor
     def inject_template_globals() -> dict[str, object]:
@@ -87,41 +195,12 @@ def _register_context_processors(app: Flask) -> None:
             if user_uuid:
                 store_path = app.config.get("NOTIFICATION_STORE", NOTIFICATION_STORE)
                 try:
-                    notifications = load_json_file(store_path) or []
-                except FileNotFoundError:
-                    app.logger.debug("Notification store missing: %s", store_path)
-                    notifications = []
+                    notif_count = get_notification_store(store_path).unread_count(user_uuid)
                 except Exception as exc:  # pragma: no cover - defensive logging
                     app.logger.warning("Unable to read notifications: %s", exc)
-                    notifications = []
-
-                notif_count = sum(
-                    1
-                    for notif in notifications
-                    if str(notif.get("recipient_id")) == str(user_uuid)
-                    and not notif.get("is_read")
-                )
+                    notif_count = 0
             # Resolve the textual definition for the user's access level, if available.
-            try:
-                rights = load_json_file("./app/data/users/droits.json")
-            except FileNotFoundError:
-                rights = []
-            except Exception:  # pragma: no cover - defensive
-                rights = []
-            user_level = user.get("access_level")
-            if isinstance(rights, list) and user_level is not None:
-                try:
-                    level_int = int(user_level)
-                except (TypeError, ValueError):
-                    level_int = None
-                if level_int is not None:
-                    for item in rights:
-                        if (
-                            isinstance(item, dict)
-                            and int(item.get("Niveau", -1)) == level_int
-                        ):
-                            access_definition = item.get("Definition")
-                            break
+            access_definition = get_rights_registry().definition(user.get("access_level"))
 
         return {
             "user": user,
@@ -133,9 +212,11 @@ def _register_context_processors(app: Flask) -> None:
 
 def _register_filters(app: Flask) -> None:
     """Register custom Jinja filters used across the application."""
-    from babel.dates import format_datetime
 
     def format_notification_date(value: object) -> str:
+        # Babel's locale data is only loaded when a date is first rendered.
+        from babel.dates import format_datetime
+
         if not value:
             return ""
 
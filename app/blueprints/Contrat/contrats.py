@@ -7,6 +7,7 @@ from typing import Iterable
 from flask import Blueprint, redirect, render_template, request, session, url_for
 from app.utils.auth import login_required, require_level
 
+from app.utils.geo_index import get_properties_index
 from app.utils.utils_json import load_json_file
 
 contrats_bp = Blueprint("contrats", __name__, template_folder="templates")
@@ -44,15 +45,11 @@ def list_regions():
 @require_level(3)
 def select_departments():
     """Display departments that belong to the previously selected regions."""
-    departments_data = load_json_file(DEPARTMENT_FILE)
+    index = get_properties_index(DEPARTMENT_FILE, "reg")
     selected_regions = session.get("selected_regions", [])
     selected_codes = {str(region["code"]) for region in selected_regions}
 
-    departments = [
-        feature["properties"]
-        for feature in departments_data["features"]
-        if not selected_codes or str(feature["properties"].get("reg")) in selected_codes
-    ]
+    departments = index.get_many(selected_codes) if selected_codes else index.all()
 
     if request.method == "POST":
         selected_departments = request.form.getlist("departments")
@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
-import os
+from pathlib import Path
 
-import folium
-from flask import Blueprint, render_template, url_for
+from flask import Blueprint, current_app, render_template, send_from_directory, url_for
 from app.utils.auth import login_required, require_level
 
-from app.utils.utils_json import load_json_file
+from app.utils.geo_index import get_properties_index
+from app.utils.geo_lod import resolve_source
+from app.utils.region_map import (
+    REGION_MAP_ZOOM,
+    REGION_PLACEHOLDER,
+    RegionMapCache,
+    get_region_map_cache,
+)
 
 region_bp = Blueprint("region", __name__, template_folder="templates")
 
@@ -24,34 +30,30 @@ def home():
     return render_template("regions_home.html")
 
 
+def _region_map_cache() -> RegionMapCache:
+    cache_dir = current_app.config.get("REGION_MAP_CACHE_DIR") or Path(current_app.instance_path) / "region_maps"
+    # Simplified boundaries for the national view when scripts/build_lod.py was run.
+    return get_region_map_cache(resolve_source(REGION_FILE, REGION_MAP_ZOOM), cache_dir)
+
+
 @region_bp.route("/map")
 @login_required
 @require_level(1)
 def map_view():
-    """Render the folium map containing clickable regions."""
-    geojson_data = load_json_file(REGION_FILE)
-
-    region_map = folium.Map(location=[45.0, 2.0], zoom_start=6)
-
-    for feature in geojson_data["features"]:
-        properties = feature["properties"]
-        name = properties.get("libgeo", "Inconnu")
-        region_id = properties.get("reg", "Inconnu")
+    """Render the page embedding the cached map of clickable regions."""
+    details_url = url_for("region.region_details", region_id=REGION_PLACEHOLDER)
+    filename = _region_map_cache().current(details_url)
+    return render_template("regions_select.html", map_url=url_for("region.map_file", filename=filename))
 
-        popup = folium.Popup(
-            f'<a href="{url_for("region.region_details", region_id=region_id)}">Voir {name}</a>'
-        )
-        folium.GeoJson(
-            feature,
-            popup=popup,
-            tooltip=name,
-            highlight_function=lambda _: {"fillColor": "green"},
-        ).add_to(region_map)
 
-    map_path = os.path.join("app", "static", "map.html")
-    region_map.save(map_path)
-
-    return render_template("regions_select.html", map_path=map_path)
+@region_bp.route("/map/<filename>")
+@login_required
+@require_level(1)
+def map_file(filename: str):
+    """Serve a rendered region map; names change with the content, so it is cached for good."""
+    response = send_from_directory(_region_map_cache().cache_dir, filename, max_age=31536000)
+    response.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    return response
 
 
 @region_bp.route("/region/<region_id>")
@@ -59,12 +61,6 @@ def map_view():
 @require_level(1)
 def region_details(region_id: str):
     """List the departments associated with a region."""
-    departments_data = load_json_file(DEPARTMENT_FILE)
-
-    departments = [
-        feature["properties"]
-        for feature in departments_data["features"]
-        if feature["properties"].get("reg") == region_id
-    ]
+    departments = get_properties_index(DEPARTMENT_FILE, "reg").get(region_id)
 
     return render_template("region_select_details.html", region_id=region_id, departements=departments)
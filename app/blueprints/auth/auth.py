@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-from datetime import datetime
 from functools import wraps
 from typing import Callable
 
@@ -16,11 +15,10 @@ from flask import (
     session,
     url_for,
 )
-from werkzeug.security import generate_password_hash
-
 from app.utils.auth import USER_FILE as AUTH_USER_FILE
-from app.utils.auth import login_required, verify_user
-from app.utils.utils_json import load_json_file, save_json_file
+from app.utils.auth import build_session_user, current_users_version, login_required, verify_user
+from app.utils.passwords import hash_password
+from app.utils.user_directory import get_user_directory
 
 auth_bp = Blueprint("auth", __name__, template_folder="templates")
 USER_FILE_PATH = AUTH_USER_FILE
@@ -37,17 +35,24 @@ def login():
             current_app.logger.info("Login rejected: missing credentials")
             return render_template("login.html", error="Veuillez remplir tous les champs.")
 
+        limiter = current_app.extensions.get("login_limiter")
+        if limiter is not None and not limiter.check(login_value, request.remote_addr):
+            current_app.logger.warning(
+                "Login throttled for %s from %s", login_value, request.remote_addr
+            )
+            return (
+                render_template(
+                    "login.html",
+                    error="Trop de tentatives de connexion. Reessayez dans quelques minutes.",
+                ),
+                429,
+            )
+
         user = verify_user(login_value, password)
         if user:
-            session["user"] = {
-                "login": user["Login"],
-                "access_level": user.get("Niveau acces", 0),
-                "nom": user.get("Nom", ""),
-                "prenom": user.get("Prenom", ""),
-                "connecte_le": datetime.now().isoformat(),
-                "uuid": user.get("id", ""),
-                "autorise_notif": user.get("Notification", False),
-            }
+            if limiter is not None:
+                limiter.reset_login(login_value)
+            session["user"] = build_session_user(user, current_users_version())
             flash("Connexion reussie !", "success")
             current_app.logger.info("User %s logged in", login_value)
             return redirect(url_for("main.home"))
@@ -87,8 +92,9 @@ def change_password():
             if not verified:
                 flash("Mot de passe actuel incorrect.", "danger")
             else:
+                directory = get_user_directory(USER_FILE_PATH)
                 try:
-                    users = load_json_file(USER_FILE_PATH)
+                    users = directory.all()
                 except FileNotFoundError:
                     current_app.logger.error("User file missing: %s", USER_FILE_PATH)
                     flash("Impossible de mettre a jour le mot de passe. Contactez l'administrateur.", "danger")
@@ -96,14 +102,14 @@ def change_password():
                     updated = False
                     for record in users:
                         if record.get("Login") == verified["Login"]:
-                            record["Mot de passe"] = generate_password_hash(new_password)
+                            record["Mot de passe"] = hash_password(new_password)
                             updated = True
                             break
 
                     if not updated:
                         flash("Utilisateur introuvable.", "danger")
                     else:
-                        save_json_file(USER_FILE_PATH, users)
+                        directory.save(users)
                         flash("Mot de passe mis a jour.", "success")
                         current_app.logger.info("User %s updated password", user["login"])
                         return redirect(url_for("main.home"))
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import folium
 from flask import Blueprint, render_template, request
 from app.utils.auth import login_required, require_level
 
@@ -14,6 +13,8 @@ edit_map_bp = Blueprint("edit_map", __name__, template_folder="templates")
 @require_level(1)
 def get_map():
     """Return an interactive map that exposes the selected coordinates."""
+    import folium  # deferred: heavy import, only needed by this view
+
     latitude = request.args.get("lat", type=float, default=46.5)
     longitude = request.args.get("lon", type=float, default=2.5)
 
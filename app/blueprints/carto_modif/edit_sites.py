@@ -9,6 +9,7 @@ from flask import (
     Blueprint,
     current_app,
     flash,
+    jsonify,
     redirect,
     render_template,
     request,
@@ -22,6 +23,8 @@ from app.utils.utils_json import (
     save_json_file as save_data,
 )
 from app.utils.auth import login_required, require_level
+from app.utils.site_changes import get_site_change_log
+from app.utils.snapshots import snapshot_before
 
 DATA_FILE = "./app/data/sites/recap.json"
 TYPE_FILE = "./app/data/sites/type_site.json"
@@ -75,6 +78,13 @@ def _get_communes_list() -> list[str]:
 
     communes = [item for item in raw_communes if item]
     return sorted(dict.fromkeys(communes), key=str.upper)
+
+
+def _record_site_changes() -> int:
+    """Log the sites changed by the last write of ``DATA_FILE`` and return the data version."""
+    return get_site_change_log(DATA_FILE).sync_file(DATA_FILE)
+
+
 def _get_site_types() -> list[str]:
     """Return the list of available site types from the canonical source."""
     try:
@@ -140,6 +150,33 @@ def list_records():
     return render_template("liste_sites.html", fields=fields, records=data, types=_get_site_types())
 
 
+@edit_sites_bp.route("/changes")
+@login_required
+@require_level(1)
+def site_changes():
+    """Return the sites added, changed or deleted since the ``since`` data version.
+
+    Deleted sites are listed by key (their ``INDEX``) in ``deleted``. The
+    response ``version`` is the value to send as ``since`` on the next call.
+    A ``since`` above the current version (change log lost or rolled back)
+    yields ``reset: true`` and every site: the client must drop its copy.
+    """
+    since = max(request.args.get("since", type=int, default=0), 0)
+    _record_site_changes()
+    log = get_site_change_log(DATA_FILE)
+    reset = since > log.version
+    version, changed, deleted = log.changes_since(0 if reset else since)
+    etag = f'"sites-{version}-{since}"'
+    if request.if_none_match.contains(etag.strip('"')):
+        return "", 304, {"ETag": etag}
+
+    response = jsonify(
+        {"since": since, "version": version, "reset": reset, "changed": changed, "deleted": deleted}
+    )
+    response.headers["ETag"] = etag
+    return response
+
+
 @edit_sites_bp.route("/edit/<int:record_index>", methods=["GET", "POST"])
 @login_required
 @require_level(4)
@@ -195,7 +232,9 @@ def edit_record(record_index: int):
         if "TYPE" not in record_data:
             record_data["TYPE"] = selected_type or ""
 
+        snapshot_before("modification d'un site")
         save_data(DATA_FILE, data)
+        _record_site_changes()
         flash("Enregistrement mis a jour avec succes.", "success")
         return redirect(url_for("edit_sites.list_records"))
 
@@ -299,7 +338,9 @@ def add_record():
                 new_record[field_name] = request.form.get(field_name, "")
 
         data.append(new_record)
+        snapshot_before("ajout d'un site")
         save_data(DATA_FILE, data)
+        _record_site_changes()
         flash("Site ajoute.", "success")
         return redirect(url_for("edit_sites.list_records"))
 
@@ -24,6 +24,7 @@ from app.utils.utils_json import (
 )
 from app.utils.import_fichier import save_upload, UploadError
 from app.utils.auth import login_required, require_level
+from app.utils.snapshots import snapshot_before
 
 TYPE_FILE = "./app/data/sites/type_site.json"
 DATA_FILE = "./app/data/sites/recap.json"
@@ -41,6 +42,7 @@ def _load_types() -> List[Dict[str, Any]]:
 
 
 def _save_types(types: List[Dict[str, Any]]) -> None:
+    snapshot_before("types de sites")
     save_data(TYPE_FILE, types)
 
 
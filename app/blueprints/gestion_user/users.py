@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import uuid
-import io
 import zipfile
 from datetime import datetime
 from pathlib import Path
@@ -11,20 +10,24 @@ from typing import Any
 
 from flask import (
     Blueprint,
+    Response,
+    abort,
     current_app,
     flash,
+    jsonify,
     redirect,
     render_template,
     request,
     session,
-    send_file,
     url_for,
 )
-from werkzeug.security import generate_password_hash
-
 from app.utils.auth import login_required, require_level
-from app.utils.utils_json import load_json_file as load_json
-from app.utils.utils_json import save_json_file as save_json
+from app.utils.backup_restore import RestoreError, RestoreLimits, restore_archive
+from app.utils.passwords import hash_password
+from app.utils.rights_registry import get_rights_registry
+from app.utils.snapshots import SnapshotStore, get_snapshot_store, snapshot_before
+from app.utils.user_directory import UserDirectory, get_user_directory
+from app.utils.zip_stream import iter_tree, iter_zip
 
 USER_FILE = "./app/data/users/users.json"
 SAVE_USERS_FILE = "./app/data/users/users.json"
@@ -32,17 +35,31 @@ RIGHTS_FILE = "./app/data/users/droits.json"
 
 users_bp = Blueprint("users", __name__, template_folder="templates")
 
+def _users() -> UserDirectory:
+    return get_user_directory(USER_FILE)
+
+
+def _save_users(users: list[dict[str, Any]]) -> None:
+    snapshot_before("utilisateurs")
+    get_user_directory(SAVE_USERS_FILE).save(users)
+
+
 def _data_dir() -> Path:
     """Absolute path to the data directory."""
     return Path(current_app.root_path) / "data"
 
 
+def _ouvrages_dir() -> Path:
+    """Absolute path to the site documents (fiches) directory."""
+    return Path(current_app.root_path) / "static" / "ouvrages"
+
+
 @users_bp.route("/")
 @login_required
 @require_level(5)
 def list_users():
     """Display the list of registered users."""
-    users = load_json(USER_FILE)
+    users = _users().all()
     current_app.logger.info("Listing users")
 
     user_session = session.get("user", {})
@@ -61,19 +78,22 @@ def list_users():
 @require_level(5)
 def edit_user(login: str):
     """Allow administrators to edit a user profile."""
-    users = load_json(USER_FILE)
-    user = next((usr for usr in users if usr["Login"] == login), None)
+    user = _users().by_login(login)
 
     if user is None:
         return f"Utilisateur avec le login {login} non trouve.", 404
 
     if request.method == "POST":
-        user["Nom"] = request.form["nom"]
-        user["Prenom"] = request.form["prenom"]
-        user["Email"] = request.form["email"]
-        user["Notification"] = request.form.get("notification") == "on"
-
-        save_json(SAVE_USERS_FILE, users)
+        users = _users().all()
+        record = next((usr for usr in users if usr["Login"] == login), None)
+        if record is None:  # deleted since the lookup above
+            return f"Utilisateur avec le login {login} non trouve.", 404
+        record["Nom"] = request.form["nom"]
+        record["Prenom"] = request.form["prenom"]
+        record["Email"] = request.form["email"]
+        record["Notification"] = request.form.get("notification") == "on"
+
+        _save_users(users)
         return redirect(url_for("users.list_users"))
 
     return render_template("user_edit.html", user=user)
@@ -85,14 +105,14 @@ def edit_user(login: str):
 def add_user():
     """Create a new user with a hashed password."""
     if request.method == "POST":
-        users = load_json(USER_FILE)
+        users = _users().all()
 
         password = request.form["password"]
         new_user: dict[str, Any] = {
             "Nom": request.form["nom"],
             "Prenom": request.form["prenom"],
             "Login": request.form["login"],
-            "Mot de passe": generate_password_hash(password),
+            "Mot de passe": hash_password(password),
             "Niveau acces": int(request.form["niveau_acces"]),
             "Notification": request.form.get("notification") == "on",
             "Email": request.form["email"],
@@ -101,11 +121,11 @@ def add_user():
             "id": str(uuid.uuid4()),
         }
 
-        if any(user["Login"] == new_user["Login"] for user in users):
+        if _users().by_login(new_user["Login"]) is not None:
             return "Erreur : le login existe deja.", 400
 
         users.append(new_user)
-        save_json(SAVE_USERS_FILE, users)
+        _save_users(users)
         return redirect(url_for("users.list_users"))
 
     return render_template("user_add.html")
@@ -116,13 +136,11 @@ def add_user():
 @require_level(5)
 def delete_user(login: str):
     """Remove the given user from the JSON store."""
-    users = load_json(USER_FILE)
-    user = next((usr for usr in users if usr["Login"] == login), None)
-    if user is None:
+    if _users().by_login(login) is None:
         return f"Utilisateur avec le login {login} non trouve.", 404
 
-    filtered_users = [usr for usr in users if usr["Login"] != login]
-    save_json(SAVE_USERS_FILE, filtered_users)
+    filtered_users = [usr for usr in _users().all() if usr["Login"] != login]
+    _save_users(filtered_users)
     return redirect(url_for("users.list_users"))
 
 
@@ -131,7 +149,7 @@ def delete_user(login: str):
 @require_level(1)
 def list_rights():
     """Display the rights definitions."""
-    rights = load_json(RIGHTS_FILE)
+    rights = get_rights_registry(RIGHTS_FILE).all()
     return render_template("user_rights_list.html", droits=rights)
 
 
@@ -140,7 +158,8 @@ def list_rights():
 @require_level(5)
 def edit_right(level: int):
     """Edit the definition for a specific access level."""
-    rights = load_json(RIGHTS_FILE)
+    registry = get_rights_registry(RIGHTS_FILE)
+    rights = registry.all()
     entry = next((item for item in rights if item["Niveau"] == level), None)
 
     if entry is None:
@@ -148,7 +167,7 @@ def edit_right(level: int):
 
     if request.method == "POST":
         entry["Definition"] = request.form["definition"]
-        save_json(RIGHTS_FILE, rights)
+        registry.save(rights)
         return redirect(url_for("users.list_rights"))
 
     return render_template("edit_right.html", right=entry)
@@ -158,25 +177,24 @@ def edit_right(level: int):
 @login_required
 @require_level(5)
 def download_backup():
-    """Build a zip of app/data and send it to the administrator."""
-    data_dir = _data_dir()
-    buffer = io.BytesIO()
-
-    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
-        if data_dir.exists():
-            for path in data_dir.rglob("*"):
-                if path.is_file():
-                    arcname = Path("data") / path.relative_to(data_dir)
-                    archive.write(path, arcname)
-
-    buffer.seek(0)
+    """Stream a zip of app/data to the administrator while it is being built.
+
+    ``?ouvrages=1`` (or ``BACKUP_INCLUDE_OUVRAGES``) also adds
+    app/static/ouvrages under ``static/ouvrages/``.
+    """
+    entries = [iter_tree(_data_dir(), "data")]
+    include_ouvrages = request.args.get("ouvrages")
+    if include_ouvrages == "1" or (include_ouvrages is None and current_app.config.get("BACKUP_INCLUDE_OUVRAGES")):
+        entries.append(iter_tree(_ouvrages_dir(), "static/ouvrages"))
+
     timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    return send_file(
-        buffer,
+    response = Response(
+        iter_zip(entry for tree in entries for entry in tree),
         mimetype="application/zip",
-        as_attachment=True,
-        download_name=f"karto-data-backup-{timestamp}.zip",
     )
+    response.headers["Content-Disposition"] = f'attachment; filename="karto-data-backup-{timestamp}.zip"'
+    response.headers["Cache-Control"] = "no-store"
+    return response
 
 
 @users_bp.route("/backup/restore", methods=["POST"])
@@ -190,41 +208,86 @@ def restore_backup():
         flash("Aucun fichier .zip fourni.", "warning")
         return redirect(url_for("users.list_users"))
 
-    data_dir = _data_dir()
-    data_dir.mkdir(parents=True, exist_ok=True)
+    limits = RestoreLimits(
+        max_total_bytes=int(current_app.config["BACKUP_RESTORE_MAX_BYTES"]),
+        max_files=int(current_app.config["BACKUP_RESTORE_MAX_FILES"]),
+        max_ratio=int(current_app.config["BACKUP_RESTORE_MAX_RATIO"]),
+    )
+    snapshot_before("restauration d'une sauvegarde zip")
 
     try:
-        with zipfile.ZipFile(upload) as archive:
-            base = data_dir.resolve()
-            for member in archive.infolist():
-                # Skip directories; we create them as needed.
-                if member.is_dir():
-                    continue
-
-                member_path = Path(member.filename)
-                parts = list(member_path.parts)
-                # Allow archives that include a top-level "data" folder or not.
-                if parts and parts[0].lower() == "data":
-                    parts = parts[1:]
-
-                if not parts:
-                    continue
-
-                target_path = (base / Path(*parts)).resolve()
-                try:
-                    target_path.relative_to(base)
-                except ValueError:
-                    raise ValueError("Chemin d'extraction non autorise dans l'archive.")
-
-                target_path.parent.mkdir(parents=True, exist_ok=True)
-                with archive.open(member, "r") as source, open(target_path, "wb") as dest:
-                    dest.write(source.read())
-
-        flash("Sauvegarde restauree avec succes.", "success")
+        restored = restore_archive(upload.stream, _data_dir(), limits)
+        current_app.logger.info("Backup restored: %d file(s)", len(restored))
+        flash(f"Sauvegarde restauree avec succes ({len(restored)} fichier(s)).", "success")
     except zipfile.BadZipFile:
         flash("Le fichier fourni n'est pas une archive ZIP valide.", "danger")
+    except RestoreError as exc:
+        flash(str(exc), "danger")
     except Exception as exc:  # pragma: no cover - defensive logging
         current_app.logger.exception("Echec de la restauration des donnees: %s", exc)
         flash("Echec de la restauration des donnees.", "danger")
 
     return redirect(url_for("users.list_users"))
+
+
+def _snapshots() -> SnapshotStore:
+    return get_snapshot_store()
+
+
+def _snapshot_summary(manifest: dict[str, Any]) -> dict[str, Any]:
+    return {key: value for key, value in manifest.items() if key != "files"}
+
+
+@users_bp.route("/snapshots", methods=["GET"])
+@login_required
+@require_level(5)
+def list_snapshots():
+    """List the app/data snapshots, with the changes since one of them when ``diff`` is given."""
+    store = _snapshots()
+    manifests = [_snapshot_summary(manifest) for manifest in store.list()]
+    diff_id = request.args.get("diff")
+    changes = None
+    if diff_id:
+        try:
+            changes = store.diff(diff_id, request.args.get("against") or None)
+        except KeyError:
+            abort(404)
+    return render_template("snapshots.html", snapshots=manifests, diff_id=diff_id, changes=changes)
+
+
+@users_bp.route("/snapshots", methods=["POST"])
+@login_required
+@require_level(5)
+def create_snapshot():
+    """Take a snapshot of app/data on demand."""
+    manifest = _snapshots().create("manuel", session.get("user", {}).get("login"))
+    flash(f"Instantane {manifest['id']} enregistre.", "success")
+    return redirect(url_for("users.list_snapshots"))
+
+
+@users_bp.route("/snapshots/<snapshot_id>/diff", methods=["GET"])
+@login_required
+@require_level(5)
+def snapshot_diff(snapshot_id: str):
+    """Return, as JSON, the files changed between a snapshot and ``against`` (default: now)."""
+    try:
+        changes = _snapshots().diff(snapshot_id, request.args.get("against") or None)
+    except KeyError:
+        return jsonify({"error": "instantane inconnu"}), 404
+    return jsonify({"snapshot": snapshot_id, "against": request.args.get("against"), **changes})
+
+
+@users_bp.route("/snapshots/<snapshot_id>/restore", methods=["POST"])
+@login_required
+@require_level(5)
+def restore_snapshot(snapshot_id: str):
+    """Bring app/data (or the posted ``path`` entries only) back to a snapshot."""
+    paths = request.form.getlist("path") or None
+    try:
+        touched = _snapshots().restore(snapshot_id, paths, session.get("user", {}).get("login"))
+    except KeyError:
+        abort(404)
+    current_app.logger.info("Snapshot %s restored: %s", snapshot_id, ", ".join(touched) or "no change")
+    flash(f"Instantane {snapshot_id} restaure ({len(touched)} fichier(s)).", "success")
+    return redirect(url_for("users.list_snapshots"))
+
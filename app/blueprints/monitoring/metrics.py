@@ -0,0 +1,45 @@
+"""Blueprint exposing request metrics and captured profiles to administrators."""
+
+from __future__ import annotations
+
+from flask import Blueprint, Response, abort, current_app, jsonify, send_from_directory
+
+from app.utils import profiling
+from app.utils.auth import login_required, require_level
+
+monitoring_bp = Blueprint("monitoring", __name__)
+
+
+@monitoring_bp.route("/metrics")
+@login_required
+@require_level(5)
+def metrics():
+    """Prometheus text exposition of the per-endpoint metrics of this worker."""
+    collector = current_app.extensions.get("metrics")
+    if collector is None or not current_app.config.get("METRICS_ENABLED"):
+        abort(404)
+    limiter = current_app.extensions.get("login_limiter")
+    body = collector.render(limiter.stats() if limiter is not None else None)
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+
+@monitoring_bp.route("/metrics/profiles")
+@login_required
+@require_level(5)
+def list_profiles():
+    """Captured request profiles (``?_profile=1``), most recent first."""
+    profiles = [
+        {"name": path.name, "size": path.stat().st_size}
+        for path in profiling.list_profiles(current_app)
+    ]
+    return jsonify({"profiles": profiles})
+
+
+@monitoring_bp.route("/metrics/profiles/<name>")
+@login_required
+@require_level(5)
+def download_profile(name: str):
+    """Download one ``.prof`` file (open it with snakeviz or ``python -m pstats``)."""
+    if not name.endswith(".prof"):
+        abort(404)
+    return send_from_directory(profiling.profile_dir(current_app), name, as_attachment=True)
@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
+import json
+import time
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterable, Iterator
 
 from flask import (
     Blueprint,
+    Response,
     current_app,
     flash,
     jsonify,
@@ -18,15 +21,37 @@ from flask import (
 )
 
 from app.utils.auth import login_required, require_level
-from app.utils.utils_json import load_json_file as load_json
-from app.utils.utils_json import save_json_file as save_json
+from app.utils.notification_hub import NotificationHub, get_notification_hub
+from app.utils.notification_store import (
+    NotificationStore,
+    get_notification_store,
+    new_notification_id,
+)
+from app.utils.user_directory import get_user_directory
 
 USER_FILE = "./app/data/users/users.json"
 NOTIFICATION_FILE = "./app/data/notif/notifications.json"
 
+# Push channel tuning (seconds); overridable through the app config. Each open
+# stream or pending long poll holds a server thread, so both stay short.
+STREAM_TIMEOUT = 55.0
+HEARTBEAT_INTERVAL = 25.0
+POLL_TIMEOUT = 25.0
+RECONNECT_DELAY_MS = 5000
+
 notif_bp = Blueprint("notif", __name__, template_folder="templates")
 
 
+def _store() -> NotificationStore:
+    """Return the cached notification store backing this blueprint."""
+    return get_notification_store(NOTIFICATION_FILE)
+
+
+def _hub() -> NotificationHub:
+    """Return the fan-out hub attached to the notification store."""
+    return get_notification_hub(NOTIFICATION_FILE)
+
+
 @notif_bp.route("/")
 @login_required
 @require_level(3)
@@ -43,13 +68,58 @@ def show_index():
 @require_level(3)
 def get_notifications(user_id: str):
     """Return unread notifications for the given user id."""
-    notifications = load_json(NOTIFICATION_FILE)
-    pending = [
-        notification
-        for notification in notifications
-        if notification["recipient_id"] == user_id and not notification["is_read"]
-    ]
-    return jsonify(pending)
+    return jsonify(_store().unread_for(user_id))
+
+
+@notif_bp.route("/stream")
+@login_required
+@require_level(3)
+def stream_notifications():
+    """Push the current user's unread notifications as Server-Sent Events."""
+    if not current_app.config.get("NOTIFICATION_STREAM_ENABLED", True):
+        return jsonify({"error": "flux desactive, utiliser /notif/poll"}), 404
+    user_id = session.get("user", {}).get("uuid")
+    if not user_id:
+        return jsonify({"error": "utilisateur sans identifiant"}), 400
+
+    lifetime = float(current_app.config.get("NOTIFICATION_STREAM_TIMEOUT", STREAM_TIMEOUT))
+    heartbeat = float(current_app.config.get("NOTIFICATION_HEARTBEAT", HEARTBEAT_INTERVAL))
+    return Response(
+        _event_stream(_hub(), str(user_id), lifetime, heartbeat),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@notif_bp.route("/poll")
+@login_required
+@require_level(3)
+def poll_notifications():
+    """Long-poll fallback: answer once notifications newer than ``since`` exist."""
+    user_id = session.get("user", {}).get("uuid")
+    if not user_id:
+        return jsonify({"error": "utilisateur sans identifiant"}), 400
+
+    since = request.args.get("since", "")
+    known_count = request.args.get("count", type=int)
+    max_wait = float(current_app.config.get("NOTIFICATION_POLL_TIMEOUT", POLL_TIMEOUT))
+    timeout = max(0.0, min(request.args.get("timeout", type=float, default=max_wait), max_wait))
+
+    hub = _hub()
+    deadline = time.monotonic() + timeout
+    while True:
+        generation = hub.generation
+        unread = hub.store.unread_for(user_id)
+        fresh = [item for item in unread if str(item.get("created_at", "")) > since]
+        remaining = deadline - time.monotonic()
+        # Only the first request (no ``count`` yet) answers at once: an empty
+        # ``since`` just means the user had no notification so far.
+        if known_count is None or fresh or known_count != len(unread) or remaining <= 0:
+            break
+        hub.wait(generation, remaining)
+
+    cursor = max((str(item.get("created_at", "")) for item in fresh), default=since)
+    return jsonify({"unread": len(unread), "notifications": fresh, "cursor": cursor})
 
 
 @notif_bp.route("/notify", methods=["POST"])
@@ -58,24 +128,39 @@ def get_notifications(user_id: str):
 def create_notification():
     """Persist a notification provided as JSON payload."""
     payload = request.get_json(force=True)
-    notification = _build_notification(payload)
-
-    notifications = load_json(NOTIFICATION_FILE)
-    notifications.append(notification)
-    save_json(NOTIFICATION_FILE, notifications)
+    notification = _store().add(_build_notification(payload))
     return jsonify({"status": "ok", "notif": notification})
 
 
+@notif_bp.route("/notify-bulk", methods=["POST"])
+@login_required
+@require_level(3)
+def create_bulk_notifications():
+    """Persist one notification per recipient of the JSON payload in a single write."""
+    payload = request.get_json(force=True) or {}
+    recipient_ids = payload.get("recipient_ids")
+    if not isinstance(recipient_ids, list) or not payload.get("message"):
+        return jsonify({"status": "error", "error": "recipient_ids et message requis"}), 400
+
+    notifications = _store().add_many(
+        _build_notifications(
+            recipient_ids,
+            {
+                "sender_id": payload.get("sender_id", session.get("user", {}).get("uuid")),
+                "message": payload["message"],
+                "url": payload.get("url"),
+            },
+        )
+    )
+    return jsonify({"status": "ok", "count": len(notifications), "ids": [n["id"] for n in notifications]})
+
+
 @notif_bp.route("/read/<notif_id>", methods=["POST"])
 @login_required
 @require_level(3)
 def mark_as_read(notif_id: str):
     """Mark a notification as read."""
-    notifications = load_json(NOTIFICATION_FILE)
-    for notification in notifications:
-        if str(notification["id"]) == notif_id:
-            notification["is_read"] = True
-    save_json(NOTIFICATION_FILE, notifications)
+    _store().mark_read(notif_id)
     return jsonify({"status": "updated"})
 
 
@@ -86,7 +171,7 @@ def send_multi_notification():
     """Send a notification to multiple recipients."""
     current_user = session.get("user", {})
     current_id = current_user.get("id")
-    users = load_json(USER_FILE)
+    users = get_user_directory(USER_FILE).all()
 
     eligible_users = [
         user
@@ -99,20 +184,12 @@ def send_multi_notification():
         url = request.form.get("url", "")
         recipient_ids = request.form.getlist("recipients")
 
-        notifications = load_json(NOTIFICATION_FILE)
-        for recipient_id in recipient_ids:
-            notifications.append(
-                _build_notification(
-                    {
-                        "recipient_id": recipient_id,
-                        "sender_id": current_id,
-                        "message": message,
-                        "url": url,
-                    }
-                )
+        _store().add_many(
+            _build_notifications(
+                recipient_ids,
+                {"sender_id": current_id, "message": message, "url": url},
             )
-
-        save_json(NOTIFICATION_FILE, notifications)
+        )
         return redirect(url_for("notif.view_notifications"))
 
     return render_template("multi_notify.html", users=eligible_users)
@@ -126,7 +203,7 @@ def create_from_form():
     current_user = session.get("user", {})
     current_id = current_user.get("uuid")
 
-    users = load_json(USER_FILE)
+    users = get_user_directory(USER_FILE).all()
     eligible_users = [
         {
             "id": str(user.get("id")),
@@ -153,18 +230,16 @@ def create_from_form():
         elif form_data["recipient_id"] not in valid_ids:
             flash("Destinataire invalide.", "danger")
         else:
-            notification = _build_notification(
-                {
-                    "recipient_id": form_data["recipient_id"],
-                    "sender_id": current_id,
-                    "message": form_data["message"],
-                    "url": form_data["url"],
-                }
+            _store().add(
+                _build_notification(
+                    {
+                        "recipient_id": form_data["recipient_id"],
+                        "sender_id": current_id,
+                        "message": form_data["message"],
+                        "url": form_data["url"],
+                    }
+                )
             )
-
-            notifications = load_json(NOTIFICATION_FILE)
-            notifications.append(notification)
-            save_json(NOTIFICATION_FILE, notifications)
             flash("Notification envoyee.", "success")
             return redirect(url_for("notif.view_notifications"))
 
@@ -184,26 +259,72 @@ def view_notifications():
     if not user or not user.get("uuid"):
         return redirect(url_for("main.home"))
 
-    notifications = load_json(NOTIFICATION_FILE)
-    user_id = user["uuid"]
     filtered = sorted(
-        (notif for notif in notifications if notif["recipient_id"] == user_id),
+        _store().for_recipient(user["uuid"]),
         key=lambda notif: notif["created_at"],
         reverse=True,
     )
 
-    return render_template("notification_view.html", notifications=list(filtered))
+    return render_template("notification_view.html", notifications=filtered)
 
 
-def _build_notification(payload: dict[str, Any]) -> dict[str, Any]:
+def _build_notification(payload: dict[str, Any], created_at: str | None = None) -> dict[str, Any]:
     """Return a normalized notification dictionary."""
-    timestamp = datetime.utcnow().timestamp()
     return {
-        "id": str(int(timestamp)),
+        "id": new_notification_id(),
         "recipient_id": payload["recipient_id"],
         "sender_id": payload.get("sender_id"),
         "message": payload["message"],
         "url": payload.get("url"),
         "is_read": False,
-        "created_at": datetime.utcnow().isoformat(),
+        "created_at": created_at or datetime.utcnow().isoformat(),
     }
+
+
+def _build_notifications(
+    recipient_ids: Iterable[str], payload: dict[str, Any]
+) -> list[dict[str, Any]]:
+    """Return one notification per distinct recipient, each with its own id."""
+    created_at = datetime.utcnow().isoformat()
+    return [
+        _build_notification({**payload, "recipient_id": recipient_id}, created_at)
+        for recipient_id in dict.fromkeys(str(item) for item in recipient_ids if item)
+    ]
+
+
+def _sse(event: str, payload: dict[str, Any]) -> str:
+    """Format one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def _event_stream(
+    hub: NotificationHub, user_id: str, lifetime: float, heartbeat: float
+) -> Iterator[str]:
+    """Yield SSE frames until ``lifetime`` expires; the browser then reconnects."""
+    deadline = time.monotonic() + lifetime
+    generation = hub.generation
+    unread = hub.store.unread_for(user_id)
+    sent = {str(item.get("id")) for item in unread}
+    unread_count = len(unread)
+
+    yield f"retry: {RECONNECT_DELAY_MS}\n" + _sse(
+        "init", {"unread": unread_count, "notifications": unread}
+    )
+
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+
+        new_generation = hub.wait(generation, min(heartbeat, remaining))
+        if new_generation == generation:
+            yield ": keep-alive\n\n"
+            continue
+
+        generation = new_generation
+        unread = hub.store.unread_for(user_id)
+        fresh = [item for item in unread if str(item.get("id")) not in sent]
+        sent = {str(item.get("id")) for item in unread}
+        if fresh or len(unread) != unread_count:
+            unread_count = len(unread)
+            yield _sse("update", {"unread": unread_count, "notifications": fresh})
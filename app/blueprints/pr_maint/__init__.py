@@ -2,21 +2,49 @@
 
 from __future__ import annotations
 
-from datetime import datetime
 import json
+from datetime import datetime, timedelta
 from math import radians, cos, sin, asin, sqrt
 from pathlib import Path
 
-from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    send_from_directory,
+    session,
+    url_for,
+)
 
 from app.utils.auth import login_required, require_level
-from app.utils.utils_json import load_json_file as load_data
+from app.utils.intervention_log import (
+    DATE_FORMAT,
+    InterventionLog,
+    get_intervention_log,
+    parse_intervention_date,
+)
+from app.utils.utils_json import _resolve_path, load_json_file as load_data
 
 pr_maint_bp = Blueprint("pr_maint", __name__, template_folder="templates")
 
 RECUP_FILE = Path("./app/data/sites/recap.json")
 COMMENT_FILE = Path("./app/data/maintenance/commentaire.json")
 MAINTENANCE_ACCESS_LEVEL = 3
+RECENT_COMMENTS_LIMIT = 10
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+# Offline mode (installable app + service worker).
+TYPE_FILE = Path("./app/data/sites/type_site.json")
+ICON_DIR = Path("./app/data/icones")
+OFFLINE_CACHE_VERSION = "1"
+OFFLINE_SITE_FIELDS = ("id", "nom", "type", "commune", "lat", "lon")
+BULK_MAX_INTERVENTIONS = 200
 
 
 DISTANCE_THRESHOLD_METERS = 2000.0
@@ -32,18 +60,85 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return _EARTH_RADIUS_METERS * c
 
 
-def _load_comments() -> list[dict[str, object]]:
-    if not COMMENT_FILE.exists():
-        return []
-    try:
-        return json.loads(COMMENT_FILE.read_text(encoding="utf-8")) or []
-    except json.JSONDecodeError:
-        return []
+def _intervention_log() -> InterventionLog:
+    """Return the JSONL log next to the legacy commentaire.json (migrated on first use)."""
+    return get_intervention_log(COMMENT_FILE.with_suffix(".jsonl"), legacy_path=COMMENT_FILE)
+
+
+def _current_user_label() -> str:
+    user = session.get("user", {})
+    return f"{user.get('prenom', '')} {user.get('nom', '')}".strip() or "Utilisateur inconnu"
+
 
+_SITE_TABLE_CACHE: dict[Path, tuple[str, bytes]] = {}
 
-def _save_comments(entries: list[dict[str, object]]) -> None:
-    COMMENT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    COMMENT_FILE.write_text(json.dumps(entries, ensure_ascii=False, indent=2), encoding="utf-8")
+
+def _file_signature(path: Path) -> str:
+    """Hex ``mtime-size`` of ``path``, ``0-0`` when it is missing."""
+    try:
+        stat = _resolve_path(path).stat()
+    except FileNotFoundError:
+        return "0-0"
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def _site_table() -> tuple[str, bytes]:
+    """Return ``(etag, body)`` of the compact site table served to offline clients.
+
+    The table is rebuilt only when recap.json or type_site.json (the icons)
+    changes; their mtimes and sizes make the ETag, so a device that is up to
+    date gets a 304 without a body.
+    """
+    path = _resolve_path(RECUP_FILE)
+    if not path.exists():
+        return '"empty"', b'{"fields": [], "sites": [], "icons": {}}'
+    etag = f'"{_file_signature(path)}.{_file_signature(TYPE_FILE)}"'
+    cached = _SITE_TABLE_CACHE.get(path)
+    if cached and cached[0] == etag:
+        return cached
+
+    data = load_data(str(RECUP_FILE))
+    rows = []
+    for index, site in enumerate(data if isinstance(data, list) else []):
+        try:
+            site_lat = float(site.get("LAT", site.get("lat", 0)))
+            site_lon = float(site.get("LONG", site.get("lon", 0)))
+        except (TypeError, ValueError):
+            continue
+        if site_lat == 0 and site_lon == 0:
+            continue
+        rows.append([
+            site.get("INDEX", index),
+            site.get("NOM", ""),
+            site.get("TYPE", ""),
+            site.get("COMMUNE", ""),
+            round(site_lat, 6),
+            round(site_lon, 6),
+        ])
+
+    types = load_data(str(TYPE_FILE))
+    icons = {
+        str(item["type"]): url_for("pr_maint.maintenance_icon", filename=item["icon"])
+        for item in (types if isinstance(types, list) else [])
+        if isinstance(item, dict) and item.get("type") and item.get("icon")
+    }
+    body = json.dumps(
+        {"fields": OFFLINE_SITE_FIELDS, "sites": rows, "icons": icons},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    _SITE_TABLE_CACHE[path] = (etag, body)
+    return etag, body
+
+
+def _offline_cache_version() -> str:
+    """Name of the service worker cache; a new type_site.json (icons) starts a new cache."""
+    app_version = str(current_app.config.get("APP_VERSION") or "")
+    return "-".join(filter(None, [
+        OFFLINE_CACHE_VERSION,
+        "".join(c for c in app_version if c.isalnum() or c in ".-"),
+        _file_signature(TYPE_FILE),
+    ]))
 
 
 
@@ -58,19 +153,7 @@ def maintenance_home():
     if not isinstance(data, list):
         data = []
 
-    comments = _load_comments()
-    recent_comments: list[dict[str, object]] = []
-    if isinstance(comments, list):
-        def sort_key(entry: dict[str, object]) -> datetime:
-            raw_date = entry.get("date")
-            if isinstance(raw_date, str):
-                try:
-                    return datetime.strptime(raw_date, "%d/%m/%y %H:%M:%S")
-                except ValueError:
-                    pass
-            return datetime.min
-
-        recent_comments = sorted(comments, key=sort_key, reverse=True)[:10]
+    recent_comments = _intervention_log().recent(RECENT_COMMENTS_LIMIT)
 
     return render_template(
         "pr_maint_home.html",
@@ -79,6 +162,56 @@ def maintenance_home():
         recent_comments=recent_comments,
     )
 
+def _parse_day(raw_value: str | None) -> datetime | None:
+    """Parse a ``YYYY-MM-DD`` query parameter, ``None`` when absent or invalid."""
+    if not raw_value:
+        return None
+    try:
+        return datetime.strptime(raw_value, "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+@pr_maint_bp.route("/sites/<emplacement>/historique")
+@login_required
+@require_level(MAINTENANCE_ACCESS_LEVEL)
+def site_history(emplacement: str):
+    """Paginated intervention history of one site, newest first."""
+    cursor = request.args.get("cursor") or None
+    limit = min(
+        max(request.args.get("limit", type=int, default=HISTORY_PAGE_SIZE), 1),
+        HISTORY_MAX_PAGE_SIZE,
+    )
+    date_from = _parse_day(request.args.get("from"))
+    date_to = _parse_day(request.args.get("to"))
+    # The upper bound is inclusive: keep every intervention of that day.
+    upper_bound = date_to + timedelta(days=1, microseconds=-1) if date_to else None
+
+    try:
+        entries, next_cursor = _intervention_log().site_page(
+            emplacement, cursor=cursor, limit=limit, date_from=date_from, date_to=upper_bound
+        )
+    except ValueError:
+        return jsonify({"error": "Curseur de pagination invalide."}), 400
+
+    if request.args.get("format") == "json":
+        return jsonify({"emplacement": emplacement, "interventions": entries, "next_cursor": next_cursor})
+
+    site_label = request.args.get("site") or next(
+        (str(entry["site"]) for entry in entries if entry.get("site")), ""
+    )
+    return render_template(
+        "pr_maint_site_history.html",
+        emplacement=emplacement,
+        site_label=site_label,
+        interventions=entries,
+        next_cursor=next_cursor,
+        limit=limit,
+        date_from=request.args.get("from", "") if date_from else "",
+        date_to=request.args.get("to", "") if date_to else "",
+    )
+
+
 @pr_maint_bp.route("/geolocalisation")
 @login_required
 @require_level(MAINTENANCE_ACCESS_LEVEL)
@@ -168,24 +301,170 @@ def create_intervention():
         flash("Emplacement invalide.", "danger")
         return redirect(url_for("pr_maint.maintenance_home"))
 
-    user = session.get("user", {})
-    utilisateur = f"{user.get('prenom', '')} {user.get('nom', '')}".strip() or "Utilisateur inconnu"
-
-    entries = _load_comments()
-    next_id = max((int(entry.get("id", 0)) for entry in entries), default=0) + 1
-    now = datetime.now().strftime("%d/%m/%y %H:%M:%S")
-
-    entries.append(
+    _intervention_log().append(
         {
-            "id": next_id,
-            "date": now,
+            "date": datetime.now().strftime(DATE_FORMAT),
             "emplacement": emplacement,
             "commentaire": commentaire,
-            "utilisateur": utilisateur,
+            "utilisateur": _current_user_label(),
             "site": site_label,
         }
     )
-
-    _save_comments(entries)
     flash("Intervention enregistrée.", "success")
     return redirect(url_for("pr_maint.maintenance_home"))
+
+
+@pr_maint_bp.route("/interventions/bulk", methods=["POST"])
+@login_required
+@require_level(MAINTENANCE_ACCESS_LEVEL)
+def bulk_interventions():
+    """Record the interventions queued by an offline device and return the delta.
+
+    Each intervention carries a ``client_id`` generated on the device, so a
+    sync retried after a dropped connection does not duplicate entries. The
+    response also lists the interventions recorded since the ``since`` version
+    the device already knows; ``reset`` is true when that version is ahead of
+    the log (restored from a backup) and the device must forget it.
+    """
+    payload = request.get_json(silent=True) or {}
+    items = payload.get("interventions") or []
+    if not isinstance(items, list) or len(items) > BULK_MAX_INTERVENTIONS:
+        return jsonify({"error": "Liste d'interventions invalide."}), 400
+
+    utilisateur = _current_user_label()
+    entries = []
+    rejected = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        client_id = str(item.get("client_id") or "").strip()
+        commentaire = str(item.get("commentaire") or "").strip()
+        try:
+            emplacement = int(str(item.get("emplacement") or "").strip())
+        except ValueError:
+            emplacement = None
+        if not client_id or not commentaire or emplacement is None:
+            rejected.append({"client_id": client_id, "error": "Intervention incomplète."})
+            continue
+        # Keep the capture time of the device when it is well formed.
+        date = item.get("date")
+        if parse_intervention_date(date) == datetime.min:
+            date = datetime.now().strftime(DATE_FORMAT)
+        entries.append(
+            {
+                "date": date,
+                "emplacement": emplacement,
+                "commentaire": commentaire,
+                "utilisateur": utilisateur,
+                "site": str(item.get("site_label") or "").strip(),
+                "client_id": client_id,
+            }
+        )
+
+    log = _intervention_log()
+    records = log.append_many(entries)
+    try:
+        since = int(payload.get("since"))
+    except (TypeError, ValueError):
+        since = None
+    reset = since is not None and since > log.last_id
+    changes, truncated = log.changes_since(0 if reset else since) if since is not None else ([], False)
+    return jsonify(
+        {
+            "accepted": [{"client_id": record["client_id"], "id": record["id"]} for record in records],
+            "rejected": rejected,
+            "version": log.last_id,
+            "reset": reset,
+            "changes": changes,
+            "truncated": truncated,
+        }
+    )
+
+
+@pr_maint_bp.route("/sites.json")
+@login_required
+@require_level(MAINTENANCE_ACCESS_LEVEL)
+def offline_sites():
+    """Compact site table (arrays, no keys) for the offline nearest-site search."""
+    etag, body = _site_table()
+    if request.if_none_match.contains(etag.strip('"')):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype="application/json")
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@pr_maint_bp.route("/icones/<path:filename>")
+@login_required
+@require_level(MAINTENANCE_ACCESS_LEVEL)
+def maintenance_icon(filename: str):
+    """Site type icons, cached by the service worker for offline use."""
+    response = send_from_directory(_resolve_path(ICON_DIR), filename)
+    response.headers["Cache-Control"] = "private, max-age=86400"
+    return response
+
+
+@pr_maint_bp.route("/manifest.webmanifest")
+@login_required
+@require_level(MAINTENANCE_ACCESS_LEVEL)
+def web_manifest():
+    manifest = {
+        "name": "Karto maintenance",
+        "short_name": "Maintenance",
+        "lang": "fr",
+        "start_url": url_for("pr_maint.maintenance_home"),
+        "scope": url_for("pr_maint.maintenance_home"),
+        "display": "standalone",
+        "background_color": "#0f1a26",
+        "theme_color": "#172533",
+        "icons": [
+            {
+                "src": url_for("pr_maint.maintenance_icon", filename="rhizostep256.png"),
+                "sizes": "256x256",
+                "type": "image/png",
+            }
+        ],
+    }
+    return Response(json.dumps(manifest, ensure_ascii=False), mimetype="application/manifest+json")
+
+
+@pr_maint_bp.route("/sw.js")
+@login_required
+@require_level(MAINTENANCE_ACCESS_LEVEL)
+def service_worker():
+    """Service worker scoped to the maintenance pages."""
+    types = load_data(str(TYPE_FILE))
+    icon_urls = sorted(
+        {
+            url_for("pr_maint.maintenance_icon", filename=item["icon"])
+            for item in (types if isinstance(types, list) else [])
+            if isinstance(item, dict) and item.get("icon")
+        }
+    )
+    precache_urls = [
+        url_for("pr_maint.maintenance_home"),
+        url_for("pr_maint.localisation_page"),
+        url_for("pr_maint.offline_sites"),
+        url_for("static", filename="js/maintenance_offline.js"),
+        url_for("static", filename="css/dark.min.css"),
+        url_for("static", filename="css/forms.css"),
+        url_for("static", filename="css/table.css"),
+        url_for("static", filename="favicon.ico"),
+        *icon_urls,
+    ]
+    body = render_template(
+        "pr_maint_sw.js",
+        cache_version=_offline_cache_version(),
+        precache_urls=precache_urls,
+        sites_url=url_for("pr_maint.offline_sites"),
+        icons_prefix=url_for("pr_maint.maintenance_home") + "icones/",
+        static_prefix=url_for("static", filename=""),
+        fallback_url=url_for("pr_maint.localisation_page"),
+    )
+    response = Response(body, mimetype="application/javascript")
+    # Browsers check for updates on each navigation; never serve a stale worker.
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["Service-Worker-Allowed"] = url_for("pr_maint.maintenance_home")
+    return response
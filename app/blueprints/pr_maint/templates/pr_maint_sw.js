@@ -0,0 +1,74 @@
+// Service worker of the maintenance pages (rendered by pr_maint.service_worker).
+const CACHE_NAME = 'karto-maintenance-{{ cache_version }}';
+const PRECACHE_URLS = {{ precache_urls|tojson }};
+const SITES_URL = {{ sites_url|tojson }};
+const ICONS_PREFIX = {{ icons_prefix|tojson }};
+const STATIC_PREFIX = {{ static_prefix|tojson }};
+const OFFLINE_FALLBACK = {{ fallback_url|tojson }};
+
+function isCacheable(response) {
+  // A redirected response is usually the login page: never keep it.
+  return response && response.ok && !response.redirected;
+}
+
+self.addEventListener('install', (event) => {
+  event.waitUntil(
+    caches.open(CACHE_NAME)
+      .then((cache) => Promise.all(PRECACHE_URLS.map((url) =>
+        fetch(url, { credentials: 'same-origin' })
+          .then((response) => (isCacheable(response) ? cache.put(url, response) : undefined))
+          .catch(() => undefined)
+      )))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil(
+    caches.keys()
+      .then((keys) => Promise.all(keys
+        .filter((key) => key.startsWith('karto-maintenance-') && key !== CACHE_NAME)
+        .map((key) => caches.delete(key))))
+      .then(() => self.clients.claim())
+  );
+});
+
+function networkFirst(request, fallbackUrl) {
+  return fetch(request)
+    .then((response) => {
+      if (isCacheable(response)) {
+        const copy = response.clone();
+        caches.open(CACHE_NAME).then((cache) => cache.put(request, copy));
+      }
+      return response;
+    })
+    .catch(() => caches.match(request, { ignoreSearch: request.mode === 'navigate' })
+      .then((cached) => cached || (fallbackUrl ? caches.match(fallbackUrl) : undefined))
+      .then((cached) => cached || Response.error()));
+}
+
+function cacheFirst(request) {
+  return caches.match(request).then((cached) => cached || fetch(request).then((response) => {
+    if (isCacheable(response)) {
+      const copy = response.clone();
+      caches.open(CACHE_NAME).then((cache) => cache.put(request, copy));
+    }
+    return response;
+  }));
+}
+
+self.addEventListener('fetch', (event) => {
+  const { request } = event;
+  if (request.method !== 'GET') return;
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) return;
+
+  if (request.mode === 'navigate') {
+    event.respondWith(networkFirst(request, OFFLINE_FALLBACK));
+  } else if (url.pathname === SITES_URL) {
+    // Revalidated with the ETag on every call; the cached copy serves offline.
+    event.respondWith(networkFirst(request, null));
+  } else if (url.pathname.startsWith(ICONS_PREFIX) || url.pathname.startsWith(STATIC_PREFIX)) {
+    event.respondWith(cacheFirst(request));
+  }
+});
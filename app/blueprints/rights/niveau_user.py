@@ -5,20 +5,29 @@ from __future__ import annotations
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 
 from app.utils.auth import login_required, require_level
-from app.utils.utils_json import load_json_file as read_json
-from app.utils.utils_json import save_json_file as write_json
+from app.utils.rights_registry import RightsRegistry, get_rights_registry
+from app.utils.snapshots import snapshot_before
 
 rights_bp = Blueprint("user_rights", __name__, template_folder="templates")
 
 DATA_FILE = "./app/data/users/droits.json"
 
 
+def _rights() -> RightsRegistry:
+    return get_rights_registry(DATA_FILE)
+
+
+def _save_rights(rights: list[dict]) -> None:
+    snapshot_before("niveaux d'acces")
+    _rights().save(rights)
+
+
 @rights_bp.route("/")
 @login_required
 @require_level(5)
 def index():
     """List the access levels and their definitions."""
-    data = read_json(DATA_FILE)
+    data = _rights().all()
     return render_template("rights_list.html", data=data)
 
 
@@ -31,14 +40,14 @@ def edit(niveau: int):
         flash(f"Le niveau {niveau} est protege et ne peut pas etre modifie.", "warning")
         return redirect(url_for("user_rights.index"))
 
-    data = read_json(DATA_FILE)
+    data = _rights().all()
     record = next((item for item in data if item["Niveau"] == niveau), None)
     if record is None:
         return "Niveau introuvable", 404
 
     if request.method == "POST":
         record["Definition"] = request.form["definition"]
-        write_json(DATA_FILE, data)
+        _save_rights(data)
         flash(f"Niveau {niveau} modifie avec succes.", "success")
         return redirect(url_for("user_rights.index"))
 
@@ -50,7 +59,6 @@ def edit(niveau: int):
 @require_level(5)
 def add_right():
     """Create a brand new access level."""
-    rights = read_json(DATA_FILE)
     if request.method == "POST":
         try:
             niveau = int(request.form.get("niveau"))
@@ -59,12 +67,13 @@ def add_right():
             return redirect(request.url)
 
         definition = request.form.get("definition", "").strip()
-        if any(right["Niveau"] == niveau for right in rights):
+        if _rights().get(niveau) is not None:
             flash(f"Le niveau {niveau} existe deja.", "warning")
             return redirect(request.url)
 
+        rights = _rights().all()
         rights.append({"Niveau": niveau, "Definition": definition})
-        write_json(DATA_FILE, rights)
+        _save_rights(rights)
         flash(f"Niveau {niveau} ajoute avec succes.", "success")
         return redirect(url_for("user_rights.index"))
 
@@ -80,8 +89,7 @@ def delete(niveau: int):
         flash(f"Le niveau {niveau} est protege et ne peut pas etre supprime.", "warning")
         return redirect(url_for("user_rights.index"))
 
-    data = read_json(DATA_FILE)
-    data = [item for item in data if item["Niveau"] != niveau]
-    write_json(DATA_FILE, data)
+    data = [item for item in _rights().all() if item["Niveau"] != niveau]
+    _save_rights(data)
     flash(f"Niveau {niveau} supprime avec succes.", "success")
     return redirect(url_for("user_rights.index"))
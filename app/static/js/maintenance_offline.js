@@ -0,0 +1,184 @@
+// Offline support of the maintenance pages: service worker registration,
+// queue of interventions recorded without network and nearest-site search
+// on the cached site table. URLs come from the data attributes of the
+// <script> tag including this file.
+(function () {
+  const script = document.currentScript;
+  if (!script) return;
+  const config = {
+    swUrl: script.dataset.swUrl,
+    scope: script.dataset.scope,
+    sitesUrl: script.dataset.sitesUrl,
+    syncUrl: script.dataset.syncUrl,
+  };
+
+  const DB_NAME = 'karto-maintenance';
+  const STORE = 'pending';
+  const VERSION_KEY = 'karto-maintenance-version';
+  const DISTANCE_THRESHOLD_METERS = 2000;
+  const EARTH_RADIUS_METERS = 6371000;
+
+  if ('serviceWorker' in navigator && config.swUrl) {
+    navigator.serviceWorker.register(config.swUrl, { scope: config.scope }).catch((err) => {
+      console.warn('Service worker non enregistré :', err);
+    });
+  }
+
+  // -- IndexedDB queue ------------------------------------------------------
+
+  function openDb() {
+    return new Promise((resolve, reject) => {
+      const request = indexedDB.open(DB_NAME, 1);
+      request.onupgradeneeded = () => {
+        request.result.createObjectStore(STORE, { keyPath: 'client_id' });
+      };
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => reject(request.error);
+    });
+  }
+
+  function withStore(mode, callback) {
+    return openDb().then((db) => new Promise((resolve, reject) => {
+      const tx = db.transaction(STORE, mode);
+      const result = callback(tx.objectStore(STORE));
+      tx.oncomplete = () => resolve(result && 'result' in result ? result.result : result);
+      tx.onerror = () => reject(tx.error);
+    }));
+  }
+
+  function pendingInterventions() {
+    return withStore('readonly', (store) => store.getAll());
+  }
+
+  function newClientId() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return `${Date.now().toString(16)}-${Math.random().toString(16).slice(2)}`;
+  }
+
+  function formatDate(date) {
+    const pad = (value) => String(value).padStart(2, '0');
+    return `${pad(date.getDate())}/${pad(date.getMonth() + 1)}/${pad(date.getFullYear() % 100)} `
+      + `${pad(date.getHours())}:${pad(date.getMinutes())}:${pad(date.getSeconds())}`;
+  }
+
+  function updatePendingCount() {
+    const badge = document.getElementById('offline-pending');
+    if (!badge || !window.indexedDB) return Promise.resolve();
+    return pendingInterventions().then((items) => {
+      badge.textContent = items.length
+        ? `${items.length} intervention(s) en attente de synchronisation`
+        : '';
+      badge.hidden = !items.length;
+    });
+  }
+
+  function queueIntervention({ emplacement, commentaire, siteLabel }) {
+    const item = {
+      client_id: newClientId(),
+      emplacement,
+      commentaire,
+      site_label: siteLabel || '',
+      date: formatDate(new Date()),
+    };
+    return withStore('readwrite', (store) => store.put(item))
+      .then(updatePendingCount)
+      .then(() => item);
+  }
+
+  // -- Delta sync -----------------------------------------------------------
+
+  let syncing = null;
+
+  function sync() {
+    if (syncing || !navigator.onLine || !config.syncUrl || !window.indexedDB) {
+      return syncing || Promise.resolve(null);
+    }
+    syncing = pendingInterventions()
+      .then((items) => {
+        const since = Number(localStorage.getItem(VERSION_KEY) || 0);
+        return fetch(config.syncUrl, {
+          method: 'POST',
+          credentials: 'same-origin',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ interventions: items, since }),
+        });
+      })
+      .then((response) => {
+        if (!response.ok || response.redirected) throw new Error(`HTTP ${response.status}`);
+        return response.json();
+      })
+      .then((payload) => {
+        const done = [...payload.accepted, ...payload.rejected].map((item) => item.client_id);
+        localStorage.setItem(VERSION_KEY, String(payload.version));
+        return withStore('readwrite', (store) => done.forEach((id) => store.delete(id)))
+          .then(updatePendingCount)
+          .then(() => {
+            document.dispatchEvent(new CustomEvent('maintenance:synced', { detail: payload }));
+            return payload;
+          });
+      })
+      .catch((err) => {
+        console.warn('Synchronisation des interventions impossible :', err);
+        return null;
+      })
+      .finally(() => {
+        syncing = null;
+      });
+    return syncing;
+  }
+
+  // -- Nearest site search on the cached table ------------------------------
+
+  let sitesPromise = null;
+
+  function loadSites() {
+    if (!sitesPromise) {
+      sitesPromise = fetch(config.sitesUrl, { credentials: 'same-origin' })
+        .then((response) => {
+          if (!response.ok) throw new Error(`HTTP ${response.status}`);
+          return response.json();
+        })
+        .catch((err) => {
+          sitesPromise = null;
+          throw err;
+        });
+    }
+    return sitesPromise;
+  }
+
+  function haversine(lat1, lon1, lat2, lon2) {
+    const rad = Math.PI / 180;
+    const dLat = (lat2 - lat1) * rad;
+    const dLon = (lon2 - lon1) * rad;
+    const a = Math.sin(dLat / 2) ** 2
+      + Math.cos(lat1 * rad) * Math.cos(lat2 * rad) * Math.sin(dLon / 2) ** 2;
+    return 2 * EARTH_RADIUS_METERS * Math.asin(Math.sqrt(a));
+  }
+
+  function findNearestSites(latitude, longitude, threshold = DISTANCE_THRESHOLD_METERS) {
+    return loadSites().then((table) => {
+      const fields = table.fields;
+      const at = (name) => fields.indexOf(name);
+      const [iId, iNom, iType, iCommune, iLat, iLon] = ['id', 'nom', 'type', 'commune', 'lat', 'lon'].map(at);
+      return table.sites
+        .map((row) => ({
+          INDEX: row[iId],
+          NOM: row[iNom],
+          TYPE: row[iType],
+          COMMUNE: row[iCommune],
+          icon: table.icons[row[iType]] || null,
+          distance: Math.round(haversine(latitude, longitude, row[iLat], row[iLon]) * 10) / 10,
+        }))
+        .filter((site) => site.distance <= threshold)
+        .sort((a, b) => a.distance - b.distance);
+    });
+  }
+
+  window.KartoMaintenance = { queueIntervention, sync, findNearestSites, pendingInterventions };
+
+  window.addEventListener('online', sync);
+  window.addEventListener('load', () => {
+    updatePendingCount();
+    sync();
+  });
+})();
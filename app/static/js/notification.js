@@ -1,46 +1,153 @@
 (function () {
-  const FIVE_MINUTES = 300000;
-
   const bodyDataset = document.body ? document.body.dataset : {};
+  const streamUrl = bodyDataset.notificationStream;
+  const pollUrl = bodyDataset.notificationPoll;
 
-  if (bodyDataset && bodyDataset.notificationRefresh === 'true') {
-    const interval = parseInt(bodyDataset.notificationRefreshInterval || FIVE_MINUTES, 10) || FIVE_MINUTES;
-    setInterval(() => {
-      window.location.reload();
-    }, interval);
+  if (!streamUrl && !pollUrl) {
+    return;
   }
 
-  if (typeof window.userId !== 'undefined') {
-    const container = document.getElementById('notifications');
-    if (!container) {
+  const RETRY_DELAY = 5000;
+  // Never issue long polls closer than this, whatever the server answers.
+  const MIN_POLL_DELAY = 1000;
+  let unreadCount = null;
+  let cursor = '';
+
+  function updateBadge(count) {
+    const link = document.querySelector('.notification-link');
+    if (!link) {
       return;
     }
+    let badge = link.querySelector('.badge');
+    if (count > 0) {
+      if (!badge) {
+        badge = document.createElement('span');
+        badge.className = 'badge';
+        link.appendChild(badge);
+      }
+      badge.textContent = String(count);
+    } else if (badge) {
+      badge.remove();
+    }
+  }
 
-    const interval = parseInt((bodyDataset && bodyDataset.notificationAjaxInterval) || FIVE_MINUTES, 10) || FIVE_MINUTES;
+  function buildCard(notif) {
+    const card = document.createElement('div');
+    card.className = 'notification-card unread';
+    card.dataset.id = notif.id;
 
-    function fetchNotifications() {
-      fetch(`/notif/notifications/${window.userId}`)
-        .then((response) => response.json())
-        .then((data) => {
-          container.innerHTML = '';
+    const message = document.createElement('div');
+    message.className = 'notification-message';
+    message.textContent = notif.message || '';
+    card.appendChild(message);
 
-          if (!Array.isArray(data) || data.length === 0) {
-            container.innerHTML = '<p>Aucune nouvelle notification.</p>';
-            return;
-          }
+    if (notif.url) {
+      const link = document.createElement('div');
+      link.className = 'notification-link';
+      link.textContent = 'Lien : ';
+      const anchor = document.createElement('a');
+      anchor.href = notif.url;
+      anchor.target = '_blank';
+      anchor.rel = 'noopener noreferrer';
+      anchor.textContent = notif.url;
+      link.appendChild(anchor);
+      card.appendChild(link);
+    }
+
+    const button = document.createElement('button');
+    button.type = 'button';
+    button.className = 'mark-read';
+    button.dataset.id = notif.id;
+    button.textContent = 'Marquer comme lue';
+    card.appendChild(button);
+    return card;
+  }
+
+  function showNotifications(notifications) {
+    const list = document.getElementById('notif-list');
+    if (list) {
+      const empty = list.querySelector('.notification-empty');
+      if (empty && notifications.length) {
+        empty.remove();
+      }
+      notifications.forEach((notif) => {
+        if (!list.querySelector(`.notification-card[data-id="${CSS.escape(String(notif.id))}"]`)) {
+          list.insertBefore(buildCard(notif), list.firstChild);
+        }
+      });
+    }
+
+    // Legacy container used by notification.html.
+    const container = document.getElementById('notifications');
+    if (container) {
+      notifications.forEach((notif) => {
+        const paragraph = document.createElement('p');
+        paragraph.textContent = notif.message || '';
+        container.appendChild(paragraph);
+      });
+    }
+  }
+
+  function handlePayload(payload, initial) {
+    if (!payload) {
+      return;
+    }
+    const notifications = Array.isArray(payload.notifications) ? payload.notifications : [];
+    notifications.forEach((notif) => {
+      if (notif.created_at && notif.created_at > cursor) {
+        cursor = notif.created_at;
+      }
+    });
+    if (typeof payload.cursor === 'string' && payload.cursor > cursor) {
+      cursor = payload.cursor;
+    }
+    unreadCount = typeof payload.unread === 'number' ? payload.unread : unreadCount;
+    updateBadge(unreadCount || 0);
+    if (!initial) {
+      showNotifications(notifications);
+    }
+  }
 
-          data.forEach((notif) => {
-            const div = document.createElement('div');
-            div.innerHTML = `<p>${notif.message}</p>`;
-            container.appendChild(div);
-          });
+  function startLongPoll() {
+    let initial = true;
+
+    function poll() {
+      const startedAt = Date.now();
+      const params = new URLSearchParams();
+      if (!initial) {
+        params.set('since', cursor);
+        params.set('count', String(unreadCount || 0));
+      }
+      fetch(`${pollUrl}?${params.toString()}`, { credentials: 'same-origin' })
+        .then((response) => {
+          if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+          }
+          return response.json();
+        })
+        .then((payload) => {
+          handlePayload(payload, initial);
+          initial = false;
+          setTimeout(poll, Math.max(0, MIN_POLL_DELAY - (Date.now() - startedAt)));
         })
         .catch((error) => {
           console.error('Unable to fetch notifications', error);
+          setTimeout(poll, RETRY_DELAY);
         });
     }
 
-    fetchNotifications();
-    setInterval(fetchNotifications, interval);
+    poll();
+  }
+
+  function startStream() {
+    const source = new EventSource(streamUrl);
+    source.addEventListener('init', (event) => handlePayload(JSON.parse(event.data), true));
+    source.addEventListener('update', (event) => handlePayload(JSON.parse(event.data), false));
+  }
+
+  if (streamUrl && typeof window.EventSource !== 'undefined') {
+    startStream();
+  } else if (pollUrl) {
+    startLongPoll();
   }
-})();
\ No newline at end of file
+})();
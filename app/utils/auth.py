@@ -2,21 +2,23 @@
 
 from __future__ import annotations
 
+from datetime import datetime
 from functools import wraps
 from typing import Any, Callable
 
 from flask import current_app, flash, redirect, render_template, session, url_for
 from werkzeug.security import check_password_hash
 
-from app.utils.utils_json import load_json_file as load_users
+from app.utils.passwords import hash_password, needs_rehash
+from app.utils.rights_registry import get_rights_registry
+from app.utils.user_directory import get_user_directory
 
 USER_FILE = "./app/data/users/users.json"
 
 
 def verify_user(login_value: str, password: str) -> dict[str, Any] | None:
     """Return the matching user when credentials are valid, otherwise None."""
-    users = load_users(USER_FILE)
-    user = next((usr for usr in users if usr["Login"] == login_value), None)
+    user = get_user_directory(USER_FILE).by_login(login_value)
 
     if user is None:
         current_app.logger.info("User %s not found", login_value)
@@ -25,12 +27,84 @@ def verify_user(login_value: str, password: str) -> dict[str, Any] | None:
     current_app.logger.info("Verifying password for user %s", login_value)
     if check_password_hash(user["Mot de passe"], password):
         current_app.logger.info("User %s authenticated", login_value)
+        if needs_rehash(user["Mot de passe"]):
+            _rehash_password(login_value, password)
         return user
 
     current_app.logger.info("User %s provided an invalid password", login_value)
     return None
 
 
+def build_session_user(user: dict[str, Any], users_version: str | None) -> dict[str, Any]:
+    """Return the compact session payload of ``user``.
+
+    ``users_version`` stamps the users.json content the permissions were read
+    from; ``refresh_session_user`` compares it with the current one.
+    """
+    return {
+        "login": user["Login"],
+        "access_level": user.get("Niveau acces", 0),
+        "nom": user.get("Nom", ""),
+        "prenom": user.get("Prenom", ""),
+        "connecte_le": datetime.now().isoformat(),
+        "uuid": user.get("id", ""),
+        "autorise_notif": user.get("Notification", False),
+        "users_version": users_version,
+    }
+
+
+def current_users_version() -> str | None:
+    """Stamp of users.json, ``None`` when the file is missing."""
+    try:
+        return get_user_directory(USER_FILE).version()
+    except FileNotFoundError:
+        return None
+
+
+def refresh_session_user() -> None:
+    """Re-read the session user's permissions when users.json changed since login.
+
+    Runs before each request: the common case is one ``stat`` and a string
+    comparison. A stale session gets the current level and profile, and the
+    session of a deleted account is dropped.
+    """
+    user = session.get("user")
+    if not user or "users_version" not in user:
+        return
+    version = current_users_version()
+    if version is None or version == user["users_version"]:
+        return
+
+    record = get_user_directory(USER_FILE).by_login(user.get("login", ""))
+    if record is None:
+        current_app.logger.info("Session of deleted user %s closed", user.get("login"))
+        session.pop("user", None)
+        return
+    refreshed = build_session_user(record, version)
+    refreshed["connecte_le"] = user.get("connecte_le", refreshed["connecte_le"])
+    session["user"] = refreshed
+
+
+def _rehash_password(login_value: str, password: str) -> None:
+    """Store ``password`` again with the target hash method and cost."""
+    # Hash before taking the lock: the slow part must not hold other writers.
+    password_hash = hash_password(password)
+    if get_user_directory(USER_FILE).update(login_value, {"Mot de passe": password_hash}) is None:
+        return
+    current_app.logger.info("Password hash of %s upgraded", login_value)
+
+
+def _not_authorized(message: str, required_level: int, user_level: int | None) -> str:
+    """Render the access denied page, naming the required level."""
+    return render_template(
+        "not_authorized.html",
+        message=message,
+        required_level=required_level,
+        required_definition=get_rights_registry().definition(required_level),
+        user_level=user_level,
+    )
+
+
 def login_required(func: Callable) -> Callable:
     """Ensure the route is accessible only to authenticated users."""
 
@@ -53,20 +127,14 @@ def require_level(required_level: int) -> Callable:
         def wrapper(*args, **kwargs):
             user = session.get("user")
             if not user:
-                return render_template(
-                    "not_authorized.html",
-                    message="Utilisateur non authentifie",
-                    required_level=required_level,
-                    user_level=None,
-                )
+                return _not_authorized("Utilisateur non authentifie", required_level, None)
 
             user_level = user.get("access_level", 0)
             if user_level < required_level:
-                return render_template(
-                    "not_authorized.html",
-                    message="Vous n'avez pas les droits suffisants pour acceder a cette page.",
-                    required_level=required_level,
-                    user_level=user_level,
+                return _not_authorized(
+                    "Vous n'avez pas les droits suffisants pour acceder a cette page.",
+                    required_level,
+                    user_level,
                 )
             return func(*args, **kwargs)
 
@@ -84,20 +152,14 @@ def route_with_level(blueprint, route: str, level: int) -> Callable:
         def wrapper(*args, **kwargs):
             user = session.get("user")
             if not user:
-                return render_template(
-                    "not_authorized.html",
-                    message="Utilisateur non authentifie",
-                    required_level=level,
-                    user_level=None,
-                )
+                return _not_authorized("Utilisateur non authentifie", level, None)
 
             user_level = user.get("access_level", 0)
             if user_level < level:
-                return render_template(
-                    "not_authorized.html",
-                    message="Vous n'avez pas les droits suffisants pour acceder a cette page.",
-                    required_level=level,
-                    user_level=user_level,
+                return _not_authorized(
+                    "Vous n'avez pas les droits suffisants pour acceder a cette page.",
+                    level,
+                    user_level,
                 )
             return func(*args, **kwargs)
 
@@ -114,12 +176,7 @@ def require_same_user_or_level(required_level: int) -> Callable:
         def wrapper(*args, **kwargs):
             user = session.get("user")
             if not user:
-                return render_template(
-                    "not_authorized.html",
-                    message="Utilisateur non authentifie",
-                    required_level=required_level,
-                    user_level=None,
-                )
+                return _not_authorized("Utilisateur non authentifie", required_level, None)
 
             user_level = user.get("access_level", 0)
             login_param = kwargs.get("login")
@@ -127,13 +184,10 @@ def require_same_user_or_level(required_level: int) -> Callable:
             if user["login"] == login_param or user_level >= required_level:
                 return func(*args, **kwargs)
 
-            return render_template(
-                "not_authorized.html",
-                message=(
-                    "Acces refuse : vous ne pouvez modifier que votre propre compte ou devez avoir un niveau suffisant."
-                ),
-                required_level=required_level,
-                user_level=user_level,
+            return _not_authorized(
+                "Acces refuse : vous ne pouvez modifier que votre propre compte ou devez avoir un niveau suffisant.",
+                required_level,
+                user_level,
             )
 
         return wrapper
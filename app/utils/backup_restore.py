@@ -0,0 +1,180 @@
+"""Restore of app/data from a zip archive, staged and swapped into place."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import IO
+
+from app.utils.file_lock import write_gate
+from app.utils.site_changes import is_change_log
+
+CHUNK_SIZE = 64 * 1024
+# Below this size a high compression ratio is harmless (small repetitive JSON).
+RATIO_MIN_SIZE = 1024 * 1024
+
+# Files the application cannot run without, with the keys every record must carry.
+KEY_FILES: dict[str, tuple[str, ...]] = {
+    "sites/recap.json": ("INDEX", "NOM", "LAT", "LONG"),
+    "sites/type_site.json": ("type",),
+    "users/users.json": ("id", "Login", "Mot de passe", "Niveau acces"),
+    "users/droits.json": ("Niveau", "Definition"),
+}
+
+
+class RestoreError(ValueError):
+    """Raised when an archive is refused; the message is shown to the user."""
+
+
+@dataclass(frozen=True)
+class RestoreLimits:
+    """Bounds applied to an archive before anything is extracted."""
+
+    max_total_bytes: int = 512 * 1024 * 1024
+    max_files: int = 10_000
+    max_ratio: int = 100
+
+
+def _is_tracked(name: str) -> bool:
+    return not (name.endswith(".lock") or (name.startswith(".") and name.endswith(".tmp")))
+
+
+def member_target(filename: str) -> PurePosixPath | None:
+    """Return the path of ``filename`` relative to app/data, ``None`` when it is not data.
+
+    Archives may or may not have a top-level ``data/`` folder; members under
+    ``static/`` (site documents) are not part of app/data. Change logs are
+    skipped: the live ones keep their versions increasing.
+    """
+    parts = [part for part in PurePosixPath(filename.replace("\\", "/")).parts if part not in ("", ".")]
+    if parts and parts[0].lower() == "static":
+        return None
+    if parts and parts[0].lower() == "data":
+        parts = parts[1:]
+    if not parts or is_change_log(parts[-1]):
+        return None
+    if filename.startswith("/") or ".." in parts or ":" in parts[0]:
+        raise RestoreError("Chemin d'extraction non autorise dans l'archive.")
+    return PurePosixPath(*parts)
+
+
+def plan_extraction(archive: zipfile.ZipFile, limits: RestoreLimits) -> list[tuple[zipfile.ZipInfo, PurePosixPath]]:
+    """Check the archive against ``limits`` from its directory alone."""
+    members = []
+    total = 0
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        target = member_target(info.filename)
+        if target is None:
+            continue
+        members.append((info, target))
+        total += info.file_size
+        if len(members) > limits.max_files:
+            raise RestoreError(f"Archive refusee: plus de {limits.max_files} fichiers.")
+        if total > limits.max_total_bytes:
+            raise RestoreError(
+                f"Archive refusee: plus de {limits.max_total_bytes // 1024 // 1024} Mo une fois decompressee."
+            )
+        if info.file_size >= RATIO_MIN_SIZE and info.file_size > limits.max_ratio * max(info.compress_size, 1):
+            raise RestoreError(f"Archive refusee: taux de compression anormal pour {info.filename}.")
+    return members
+
+
+def _copy_stream(source: IO[bytes], dest: IO[bytes], budget: int) -> int:
+    """Copy ``source`` in chunks; stop once more than ``budget`` bytes were read."""
+    written = 0
+    while chunk := source.read(CHUNK_SIZE):
+        written += len(chunk)
+        if written > budget:
+            raise RestoreError("Archive refusee: contenu plus volumineux qu'annonce.")
+        dest.write(chunk)
+    return written
+
+
+def validate_tree(directory: Path) -> None:
+    """Check that every JSON file parses and that the key files have the expected shape."""
+    for path in sorted(directory.rglob("*.json")):
+        relative = path.relative_to(directory).as_posix()
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except (UnicodeDecodeError, ValueError) as exc:
+            raise RestoreError(f"Archive refusee: {relative} n'est pas un JSON valide ({exc}).") from None
+        required = KEY_FILES.get(relative)
+        if required is None:
+            continue
+        if not isinstance(payload, list):
+            raise RestoreError(f"Archive refusee: {relative} doit contenir une liste.")
+        for position, record in enumerate(payload):
+            missing = [key for key in required if not isinstance(record, dict) or key not in record]
+            if missing:
+                raise RestoreError(
+                    f"Archive refusee: {relative}, enregistrement {position + 1}: "
+                    f"champ(s) manquant(s) {', '.join(missing)}."
+                )
+
+
+def swap_directory(staging: Path, target: Path) -> None:
+    """Put ``staging`` in place of ``target`` with two renames on the same filesystem."""
+    if not target.exists():
+        os.rename(staging, target)
+        return
+    previous = target.with_name(f".{target.name}.previous-{os.getpid()}")
+    shutil.rmtree(previous, ignore_errors=True)
+    os.rename(target, previous)
+    try:
+        os.rename(staging, target)
+    except OSError:
+        os.rename(previous, target)
+        raise
+    shutil.rmtree(previous, ignore_errors=True)
+
+
+def restore_archive(upload: IO[bytes] | str | Path, data_dir: Path,
+                    limits: RestoreLimits = RestoreLimits()) -> list[str]:
+    """Restore ``data_dir`` from the zip ``upload``; returns the restored relative paths.
+
+    The current files are copied into a staging directory next to
+    ``data_dir``, the archive is extracted over them in chunks, the result is
+    validated and only then swapped into place. Files absent from the archive
+    are kept, as before. On any error ``data_dir`` is left untouched.
+
+    The write gate of ``data_dir`` is held exclusively from the copy to the
+    swap: writers going through ``file_lock``/``save_json_file`` wait for the
+    restore instead of writing into the copy that is about to be replaced.
+    Readers are not gated and may miss a file during the two renames.
+    """
+    data_dir = Path(data_dir)
+    staging = data_dir.with_name(f".{data_dir.name}.restore-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    try:
+        with write_gate(data_dir, exclusive=True), zipfile.ZipFile(upload) as archive:
+            members = plan_extraction(archive, limits)
+            if data_dir.is_dir():
+                shutil.copytree(
+                    data_dir, staging,
+                    ignore=lambda _dir, names: [name for name in names if not _is_tracked(name)],
+                )
+            else:
+                staging.mkdir(parents=True)
+            base = staging.resolve()
+            budget = limits.max_total_bytes
+            for info, relative in members:
+                target = staging / relative
+                if not target.resolve().is_relative_to(base):
+                    raise RestoreError("Chemin d'extraction non autorise dans l'archive.")
+                target.parent.mkdir(parents=True, exist_ok=True)
+                # Never write through a copied file: unlink and recreate it.
+                target.unlink(missing_ok=True)
+                with archive.open(info, "r") as source, target.open("wb") as dest:
+                    budget -= _copy_stream(source, dest, min(budget, info.file_size))
+            validate_tree(staging)
+            swap_directory(staging, data_dir)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return sorted({relative.as_posix() for _info, relative in members})
@@ -0,0 +1,89 @@
+"""Advisory cross-process locks for the JSON data files."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:  # POSIX (production under mod_wsgi)
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+
+def lock_path_for(path: Path) -> Path:
+    """Return the sidecar lock file used to guard ``path``."""
+    return path.with_name(f"{path.name}.lock")
+
+
+_WRITE_GATES: set[Path] = set()
+
+
+def write_gate_path(directory: Path) -> Path:
+    """Return the lock file gating writes to ``directory``; it lives next to it."""
+    return directory.with_name(f".{directory.name}.write.lock")
+
+
+def register_write_gate(directory: Path | str) -> None:
+    """Make every ``file_lock``/``data_write`` under ``directory`` go through its gate."""
+    _WRITE_GATES.add(Path(directory).resolve())
+
+
+@contextmanager
+def write_gate(directory: Path | str, exclusive: bool = False) -> Iterator[None]:
+    """Hold the gate of ``directory``: shared for writers, exclusive to replace it whole.
+
+    Writers hold the gate together; a restore holding it exclusively waits
+    for them to finish and keeps new ones out until the directory is swapped.
+    Windows has no shared locks, the gate is a no-op there.
+    """
+    if fcntl is None:  # pragma: no cover - Windows
+        yield
+        return
+    gate = write_gate_path(Path(directory))
+    gate.parent.mkdir(parents=True, exist_ok=True)
+    with gate.open("a+b") as handle:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def data_write(path: Path | str) -> Iterator[None]:
+    """Hold the shared gate of the registered directory containing ``path``, if any."""
+    resolved = Path(path).resolve()
+    directory = next((gate for gate in _WRITE_GATES if resolved.is_relative_to(gate)), None)
+    if directory is None:
+        yield
+        return
+    with write_gate(directory):
+        yield
+
+
+@contextmanager
+def file_lock(path: Path | str) -> Iterator[None]:
+    """Hold an exclusive lock on ``path`` (through a ``.lock`` sidecar) for the block.
+
+    The lock is advisory: it only serialises writers that also use it, which
+    is the case for every store built on top of this helper.
+    """
+    lock_path = lock_path_for(Path(path))
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with data_write(lock_path), lock_path.open("a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:  # pragma: no cover - Windows
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:  # pragma: no cover - Windows
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,136 @@
+"""Feature properties of large GeoJSON files, indexed apart from their geometries."""
+
+from __future__ import annotations
+
+import copy
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from app.utils.file_lock import file_lock
+from app.utils.utils_json import _resolve_path, load_json_file
+
+Properties = dict[str, Any]
+
+_UNLOADED = object()
+
+
+def properties_path_for(source: Path) -> Path:
+    """Return the sidecar holding the properties of ``source`` (dept2020.geojson -> dept2020.properties.json)."""
+    return source.with_name(f"{source.stem}.properties.json")
+
+
+class PropertiesIndex:
+    """Group the ``properties`` of every feature of a GeoJSON file by ``key_field``.
+
+    The properties are extracted once into a small sidecar file stamped with
+    the source signature (mtime and size); later processes read the sidecar
+    and never parse the geometries. The source is only parsed again when its
+    signature no longer matches. Lookups return copies.
+    """
+
+    def __init__(self, source: str | Path, key_field: str) -> None:
+        self.source = str(source)
+        self.key_field = key_field
+        self._path = _resolve_path(source)
+        self.sidecar = properties_path_for(self._path)
+        self._lock = threading.RLock()
+        self._signature: object = _UNLOADED
+        self._features: list[Properties] = []
+        # Positions in ``_features`` of each key, in file order.
+        self._by_key: dict[str, list[int]] = {}
+
+    def _source_signature(self) -> list[int] | None:
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _refresh(self) -> None:
+        signature = self._source_signature()
+        if signature is not None and signature == self._signature:
+            return
+        if signature is None and self._signature is not _UNLOADED:
+            # Source removed after loading: keep serving what we have.
+            return
+
+        features = self._read_sidecar(signature)
+        if features is None:
+            if signature is None:
+                raise FileNotFoundError(self._path)
+            features = self._extract(signature)
+        self._rebuild(features)
+        self._signature = signature
+
+    def _read_sidecar(self, signature: list[int] | None) -> list[Properties] | None:
+        try:
+            payload = json.loads(self.sidecar.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        if not isinstance(payload, dict) or not isinstance(payload.get("features"), list):
+            return None
+        if signature is not None and payload.get("source_signature") != signature:
+            return None
+        return payload["features"]
+
+    def _extract(self, signature: list[int]) -> list[Properties]:
+        with file_lock(self.sidecar):
+            # Another process may have written it while we waited for the lock.
+            features = self._read_sidecar(signature)
+            if features is not None:
+                return features
+            data = load_json_file(self.source)
+            features = [
+                dict(feature.get("properties") or {})
+                for feature in (data.get("features") or [] if isinstance(data, dict) else [])
+                if isinstance(feature, dict)
+            ]
+            tmp_path = self.sidecar.with_name(f".{self.sidecar.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(
+                json.dumps({"source_signature": signature, "features": features}, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, self.sidecar)
+            return features
+
+    def _rebuild(self, features: list[Properties]) -> None:
+        self._features = [feature for feature in features if isinstance(feature, dict)]
+        self._by_key = {}
+        for position, feature in enumerate(self._features):
+            self._by_key.setdefault(str(feature.get(self.key_field)), []).append(position)
+
+    def all(self) -> list[Properties]:
+        """Return the properties of every feature, in file order."""
+        with self._lock:
+            self._refresh()
+            return copy.deepcopy(self._features)
+
+    def get(self, key: object) -> list[Properties]:
+        """Return the properties of the features whose ``key_field`` equals ``key``."""
+        with self._lock:
+            self._refresh()
+            return copy.deepcopy([self._features[position] for position in self._by_key.get(str(key), [])])
+
+    def get_many(self, keys: set[str]) -> list[Properties]:
+        """Return, in file order, the properties whose ``key_field`` is one of ``keys``."""
+        with self._lock:
+            self._refresh()
+            positions = sorted(position for key in keys for position in self._by_key.get(str(key), []))
+            return copy.deepcopy([self._features[position] for position in positions])
+
+
+_INDEXES: dict[tuple[Path, str], PropertiesIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_properties_index(source: str | Path, key_field: str) -> PropertiesIndex:
+    """Return the shared index of ``source`` grouped by ``key_field``."""
+    key = (_resolve_path(source), key_field)
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = _INDEXES[key] = PropertiesIndex(source, key_field)
+        return index
@@ -0,0 +1,248 @@
+"""Simplified, quantized levels of detail of the boundary GeoJSON files.
+
+``scripts/build_lod.py`` writes, next to each source, ``lod/<name>.z<zoom>.json``
+files: geometries simplified with Douglas-Peucker for the given zoom, then
+snapped to an integer grid and delta-encoded. ``resolve_source`` picks the
+file matching a map zoom and ``read_geojson`` turns it back into GeoJSON.
+
+Rings are simplified independently, so borders shared by two shapes may not
+coincide exactly; at the tolerances used (under a pixel) this is invisible.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+from app.utils.utils_json import _resolve_path, load_json_file
+
+LOD_FORMAT = "karto-lod"
+LOD_VERSION = 1
+# Minimum zoom of each level -> simplification tolerance in degrees (about
+# half a screen pixel at that zoom). A level serves its zoom and the next
+# one; above the finest level the full-resolution source is used.
+LOD_LEVELS: dict[int, float] = {4: 0.04, 6: 0.01, 8: 0.0025, 10: 0.0006}
+# Grid step of the quantized coordinates, as a fraction of the tolerance.
+QUANTIZATION_RATIO = 0.1
+
+Point = Sequence[float]
+
+
+def lod_path(source: str | Path, zoom: int) -> Path:
+    """Return the level of detail file of ``source`` for ``zoom``."""
+    source = _resolve_path(source)
+    return source.parent / "lod" / f"{source.stem}.z{zoom}.json"
+
+
+def select_level(zoom: int | None, levels: Iterable[int] = LOD_LEVELS) -> int | None:
+    """Return the level to draw at ``zoom``, or None when full resolution is needed."""
+    ordered = sorted(levels)
+    if not ordered or zoom is None:
+        return None
+    if zoom > ordered[-1] + 1:
+        return None
+    eligible = [level for level in ordered if level <= zoom]
+    return eligible[-1] if eligible else ordered[0]
+
+
+def resolve_source(source: str | Path, zoom: int | None) -> Path:
+    """Return the file to load for a map drawn at ``zoom``.
+
+    Falls back to ``source`` when no level applies or when the level file is
+    missing or older than the source.
+    """
+    path = _resolve_path(source)
+    level = select_level(zoom)
+    if level is None:
+        return path
+    candidate = lod_path(path, level)
+    try:
+        if candidate.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+            return candidate
+    except FileNotFoundError:
+        if candidate.exists():
+            return candidate  # level files shipped without the heavy source
+    return path
+
+
+def read_geojson(path: str | Path) -> dict[str, Any]:
+    """Load a GeoJSON file or a level of detail file, returned as GeoJSON."""
+    data = load_json_file(str(path))
+    if isinstance(data, dict) and data.get("format") == LOD_FORMAT:
+        return decode_level(data)
+    return data
+
+
+def _perpendicular_distance(point: Point, start: Point, end: Point) -> float:
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    if dx == 0 and dy == 0:
+        return ((point[0] - start[0]) ** 2 + (point[1] - start[1]) ** 2) ** 0.5
+    return abs(dy * point[0] - dx * point[1] + end[0] * start[1] - end[1] * start[0]) / (dx * dx + dy * dy) ** 0.5
+
+
+def simplify_line(points: Sequence[Point], tolerance: float) -> list[Point]:
+    """Douglas-Peucker simplification keeping the first and last points."""
+    if len(points) < 3 or tolerance <= 0:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        index, distance = first, 0.0
+        for candidate in range(first + 1, last):
+            current = _perpendicular_distance(points[candidate], points[first], points[last])
+            if current > distance:
+                index, distance = candidate, current
+        if distance > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def simplify_ring(ring: Sequence[Point], tolerance: float, keep_shape: bool = False) -> list[Point] | None:
+    """Simplify a closed ring; None when it collapses below a triangle.
+
+    With ``keep_shape`` a collapsing ring is reduced to the triangle of its
+    most distant points instead, so small shapes stay visible.
+    """
+    if len(ring) < 4:
+        return None
+    # Split at the point farthest from the start so the closing point is not
+    # the only anchor of the whole ring.
+    far = max(range(len(ring)), key=lambda i: (ring[i][0] - ring[0][0]) ** 2 + (ring[i][1] - ring[0][1]) ** 2)
+    simplified = simplify_line(ring[: far + 1], tolerance)[:-1] + simplify_line(ring[far:], tolerance)
+    if len(simplified) >= 4:
+        return simplified
+    if not keep_shape or far == 0:
+        return None
+    apex = max(range(len(ring)), key=lambda i: _perpendicular_distance(ring[i], ring[0], ring[far]))
+    corners = sorted({0, far, apex})
+    return [ring[i] for i in corners] + [ring[0]] if len(corners) == 3 else None
+
+
+def _simplify_polygon(rings: Sequence[Sequence[Point]], tolerance: float) -> list[list[Point]] | None:
+    outer = simplify_ring(rings[0], tolerance, keep_shape=True) if rings else None
+    if outer is None:
+        return None
+    holes = [hole for hole in (simplify_ring(ring, tolerance) for ring in rings[1:]) if hole]
+    return [outer, *holes]
+
+
+def _encode_ring(ring: Sequence[Point], translate: tuple[float, float], step: float) -> list[int]:
+    flat: list[int] = []
+    previous_x = previous_y = 0
+    for x, y, *_ in ring:
+        qx = round((x - translate[0]) / step)
+        qy = round((y - translate[1]) / step)
+        if flat and qx == previous_x and qy == previous_y:
+            continue
+        flat.extend((qx - previous_x, qy - previous_y))
+        previous_x, previous_y = qx, qy
+    return flat
+
+
+def _decode_ring(flat: Sequence[int], translate: Sequence[float], step: float) -> list[list[float]]:
+    ring: list[list[float]] = []
+    x = y = 0
+    for index in range(0, len(flat) - 1, 2):
+        x += flat[index]
+        y += flat[index + 1]
+        ring.append([round(translate[0] + x * step, 7), round(translate[1] + y * step, 7)])
+    return ring
+
+
+def _iter_points(geometry: dict[str, Any]) -> Iterable[Point]:
+    coordinates = geometry.get("coordinates") or []
+    if geometry.get("type") == "Polygon":
+        polygons = [coordinates]
+    elif geometry.get("type") == "MultiPolygon":
+        polygons = coordinates
+    else:
+        return
+    for polygon in polygons:
+        for ring in polygon:
+            yield from ring
+
+
+def build_level(geojson: dict[str, Any], zoom: int, tolerance: float) -> dict[str, Any]:
+    """Return the level of detail payload of ``geojson`` for ``zoom``.
+
+    Only Polygon and MultiPolygon geometries are simplified; other geometry
+    types are kept as they are.
+    """
+    features = geojson.get("features") or []
+    points = [point for feature in features for point in _iter_points(feature.get("geometry") or {})]
+    translate = (min((p[0] for p in points), default=0.0), min((p[1] for p in points), default=0.0))
+    step = tolerance * QUANTIZATION_RATIO
+
+    encoded_features = []
+    for feature in features:
+        geometry = feature.get("geometry") or {}
+        kind = geometry.get("type")
+        if kind == "Polygon":
+            polygons = [geometry.get("coordinates") or []]
+        elif kind == "MultiPolygon":
+            polygons = geometry.get("coordinates") or []
+        else:
+            encoded_features.append({"properties": feature.get("properties"), "geometry": geometry})
+            continue
+        encoded_polygons = []
+        for polygon in polygons:
+            simplified = _simplify_polygon(polygon, tolerance)
+            if simplified:
+                encoded_polygons.append([_encode_ring(ring, translate, step) for ring in simplified])
+        if not encoded_polygons:
+            continue
+        encoded_features.append({
+            "properties": feature.get("properties"),
+            "geometry": {"type": "MultiPolygon" if kind == "MultiPolygon" else "Polygon", "rings": encoded_polygons},
+        })
+
+    return {
+        "format": LOD_FORMAT,
+        "version": LOD_VERSION,
+        "zoom": zoom,
+        "tolerance": tolerance,
+        "transform": {"translate": list(translate), "step": step},
+        "features": encoded_features,
+    }
+
+
+def decode_level(payload: dict[str, Any]) -> dict[str, Any]:
+    """Turn a level of detail payload back into a GeoJSON FeatureCollection."""
+    translate = payload["transform"]["translate"]
+    step = payload["transform"]["step"]
+    features = []
+    for feature in payload.get("features", []):
+        geometry = feature.get("geometry") or {}
+        if "rings" in geometry:
+            polygons = [[_decode_ring(ring, translate, step) for ring in polygon] for polygon in geometry["rings"]]
+            for polygon in polygons:
+                for ring in polygon:
+                    if ring and ring[0] != ring[-1]:
+                        ring.append(list(ring[0]))
+            if geometry["type"] == "Polygon":
+                geometry = {"type": "Polygon", "coordinates": polygons[0]}
+            else:
+                geometry = {"type": "MultiPolygon", "coordinates": polygons}
+        features.append({"type": "Feature", "properties": feature.get("properties"), "geometry": geometry})
+    return {"type": "FeatureCollection", "features": features}
+
+
+def write_levels(source: str | Path, levels: dict[int, float] = LOD_LEVELS) -> list[Path]:
+    """Write every level of detail of ``source``; return the files written."""
+    geojson = load_json_file(str(source))
+    written = []
+    for zoom, tolerance in sorted(levels.items()):
+        target = lod_path(source, zoom)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        payload = build_level(geojson, zoom, tolerance)
+        tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_path, target)
+        written.append(target)
+    return written
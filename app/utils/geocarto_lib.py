@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 import json
 from pathlib import Path
 from typing import Tuple, Optional
@@ -16,17 +17,18 @@ from app.utils.utils_geocarto import (
     normalize_label,
 )
 
-try:
-    from pyproj import Transformer  # type: ignore
-except ImportError:  # pragma: no cover - optional
-    Transformer = None  # type: ignore
 
-TRANSFORMER = None
-if Transformer is not None:  # pragma: no cover - best effort
+@lru_cache(maxsize=1)
+def _get_transformer():
+    """Return the EPSG:3945 -> WGS84 transformer, built on first use (None without pyproj)."""
     try:
-        TRANSFORMER = Transformer.from_crs("EPSG:3945", "EPSG:4326", always_xy=True)
+        from pyproj import Transformer  # type: ignore
+    except ImportError:  # pragma: no cover - optional
+        return None
+    try:  # pragma: no cover - best effort
+        return Transformer.from_crs("EPSG:3945", "EPSG:4326", always_xy=True)
     except Exception:  # pragma: no cover
-        TRANSFORMER = None
+        return None
 
 
 # Point vers le dossier app/ (et non app/utils) pour trouver app/data et app/data/icones
@@ -257,12 +259,13 @@ def generate_map(
             if temp1 is None or temp2 is None or temp1 > 100.0:
                 raise ValueError("Latitude invalide")
         except Exception:
-            if TRANSFORMER is not None:
+            transformer = _get_transformer()
+            if transformer is not None:
                 lon_value = parse_float(lon_raw)
                 lat_value = parse_float(lat_raw)
                 if lon_value is not None and lat_value is not None:
                     try:
-                        temp2, temp1 = TRANSFORMER.transform(lon_value, lat_value)
+                        temp2, temp1 = transformer.transform(lon_value, lat_value)
                     except Exception:
                         temp1, temp2 = 45.0, 1.0
                 else:
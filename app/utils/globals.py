@@ -2,19 +2,18 @@
 
 from __future__ import annotations
 
-import json
 from pathlib import Path
 from typing import Any
 
-DATA_DIR = Path("./app/data/users")
-
-
-def _load_json(filename: str) -> Any:
-    """Helper returning JSON content for the given filename."""
-    with (DATA_DIR / filename).open("r", encoding="utf-8") as file:
-        return json.load(file)
-
+from app.utils.rights_registry import RIGHTS_FILE, get_rights_registry
 
-DROITS = _load_json("droits.json")
+DATA_DIR = Path("./app/data/users")
 USER_FILE = str(DATA_DIR / "users.json")
 SAVE_USERS_FILE = USER_FILE
+
+
+def __getattr__(name: str) -> Any:
+    # DROITS is served by the shared registry, so it follows droits.json edits.
+    if name == "DROITS":
+        return get_rights_registry(RIGHTS_FILE).all()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
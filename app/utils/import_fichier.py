@@ -2,12 +2,31 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
 import mimetypes
 import os
+import tempfile
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, Dict
 
+from app.utils.file_lock import data_write, file_lock
+
+# Taille des blocs lus depuis le flux d'upload : la mémoire utilisée ne dépend pas du fichier.
+CHUNK_SIZE = 64 * 1024
+# Index empreinte -> fichier tenu dans chaque dossier cible pour dédoublonner les contenus.
+UPLOAD_INDEX_NAME = ".uploads.json"
+# Sous-dossier des fichiers en cours de réception : les y créer ne modifie pas
+# la date du dossier cible, qui sert de signature à l'index.
+UPLOAD_TMP_DIR = ".uploads.tmp"
+# Une date de dossier plus récente que ceci peut encore être partagée par une
+# écriture à venir (horloge grossière du système de fichiers) : elle ne vaut
+# pas signature et le dossier sera reparcouru.
+RACY_SIGNATURE_NS = 2 * 10**9
+
 # Extensions acceptées par défaut
 DEFAULT_ALLOWED_EXTENSIONS: Dict[str, set[str]] = {
     "image": {".png", ".jpg", ".jpeg", ".gif"},
@@ -110,34 +129,178 @@ def validate_mime(file_storage, policy: UploadPolicy) -> None:
         raise UploadError(f"Type MIME non autorisé: {mime_type}")
 
 
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stream_to_temp(file_storage, policy: UploadPolicy, directory: Path) -> tuple[Path, str]:
+    """Copie le flux par blocs dans un fichier temporaire de ``directory/.uploads.tmp``.
+
+    Retourne le fichier et son SHA-256, calculé pendant la copie. L'upload est
+    refusé dès que la taille maximale est dépassée, sans lire la suite.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    tmp_dir = ensure_directory(directory / UPLOAD_TMP_DIR)
+    handle, name = tempfile.mkstemp(prefix=".upload-", suffix=".tmp", dir=tmp_dir)
+    tmp_path = Path(name)
+    try:
+        with os.fdopen(handle, "wb") as dest:
+            while chunk := file_storage.stream.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > policy.max_size_bytes:
+                    raise UploadError(
+                        "Fichier trop volumineux. "
+                        f"Taille maximale: {policy.max_size_bytes // 1024 // 1024} Mo"
+                    )
+                digest.update(chunk)
+                dest.write(chunk)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return tmp_path, digest.hexdigest()
+
+
+class UploadIndex:
+    """Empreintes SHA-256 des fichiers d'un dossier d'upload (``.uploads.json``).
+
+    L'index est gardé en mémoire avec une table empreinte -> nom tenue à jour
+    à chaque écriture. Le dossier n'est reparcouru que lorsque sa signature
+    (inode, date, taille) change, c'est-à-dire quand un fichier y est ajouté,
+    supprimé ou renommé, y compris sans passer par l'upload ; seuls les
+    fichiers nouveaux ou modifiés sont alors relus. Un fichier réécrit sur
+    place sans changer le dossier n'est vu qu'au parcours suivant.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.path = directory / UPLOAD_INDEX_NAME
+        self.files: Dict[str, dict] = {}
+        self.by_digest: Dict[str, str] = {}
+        self._signature: tuple[int, int, int] | None = None
+
+    def _directory_signature(self) -> tuple[int, int, int]:
+        stat = self.directory.stat()
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _remember(self, signature: tuple[int, int, int]) -> None:
+        self._signature = signature if time.time_ns() - signature[1] > RACY_SIGNATURE_NS else None
+
+    def refresh(self) -> bool:
+        """Reparcourt le dossier s'il a changé ; retourne ``True`` dans ce cas."""
+        signature = self._directory_signature()
+        if signature == self._signature:
+            return False
+        try:
+            known = json.loads(self.path.read_text(encoding="utf-8")).get("files", {})
+        except (OSError, ValueError, AttributeError):
+            known = {}
+        known = {**known, **self.files}
+        files = {}
+        for path in self.directory.iterdir():
+            if path.name.startswith(".") or not path.is_file():
+                continue
+            stat = path.stat()
+            entry = known.get(path.name)
+            if not entry or entry.get("size") != stat.st_size or entry.get("mtime_ns") != stat.st_mtime_ns:
+                entry = {"sha256": _file_sha256(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            files[path.name] = entry
+        self.files = files
+        self.by_digest = {}
+        for name in sorted(files):
+            self.by_digest.setdefault(files[name]["sha256"], name)
+        self._remember(signature)
+        return True
+
+    def find(self, digest: str) -> Path | None:
+        name = self.by_digest.get(digest)
+        return self.directory / name if name is not None else None
+
+    def add(self, path: Path, digest: str) -> None:
+        stat = path.stat()
+        self.files[path.name] = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        self.by_digest.setdefault(digest, path.name)
+
+    def save(self) -> None:
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps({"files": self.files}, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+        # Nos propres écritures ne doivent pas provoquer de nouveau parcours.
+        self._remember(self._directory_signature())
+
+
+_INDEXES: Dict[Path, UploadIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_upload_index(directory: Path | str) -> UploadIndex:
+    """Retourne l'index partagé du dossier ``directory``."""
+    key = Path(directory).resolve()
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = _INDEXES[key] = UploadIndex(key)
+        return index
+
+
 def save_upload(file_storage, *, category: str, target_dir: Path | str) -> Path:
-    """Valide et enregistre un fichier uploadé selon la catégorie souhaitée."""
+    """Valide et enregistre un fichier uploadé selon la catégorie souhaitée.
+
+    Le fichier est écrit par blocs dans le dossier cible. Si un fichier au
+    contenu identique y existe déjà, c'est son chemin qui est retourné et
+    aucune copie n'est créée : le nom retourné est alors celui du fichier
+    existant, pas celui de l'upload, et c'est lui que l'appelant doit
+    enregistrer ou afficher.
+    """
     if category not in UPLOAD_POLICIES:
         raise UploadError(f"Catégorie inconnue: {category}")
 
     policy = UPLOAD_POLICIES[category]
     filename = secure_basename(file_storage.filename)
-    if not filename:
+    if not filename or filename.startswith("."):
         raise UploadError("Nom de fichier invalide")
 
     validate_extension(filename, policy)
-    validate_size(file_storage, policy)
     validate_mime(file_storage, policy)
 
     directory = ensure_directory(target_dir)
-    destination = directory / filename
-
-    # Éviter d'écraser un fichier existant en suffixant si nécessaire.
-    counter = 1
-    stem = Path(filename).stem
-    extension = Path(filename).suffix
-    while destination.exists():
-        destination = directory / f"{stem}_{counter}{extension}"
-        counter += 1
-
-    file_storage.stream.seek(0)
-    destination.write_bytes(file_storage.stream.read())
-    return destination
+    with data_write(directory):
+        return _store_upload(file_storage, policy, directory, filename)
+
+
+def _store_upload(file_storage, policy: UploadPolicy, directory: Path, filename: str) -> Path:
+    tmp_path, digest = stream_to_temp(file_storage, policy, directory)
+    try:
+        with file_lock(directory / UPLOAD_INDEX_NAME):
+            index = get_upload_index(directory)
+            rescanned = index.refresh()
+            existing = index.find(digest)
+            if existing is not None:
+                if rescanned:
+                    index.save()
+                return directory / existing.name
+
+            # Éviter d'écraser un fichier existant en suffixant si nécessaire.
+            destination = directory / filename
+            counter = 1
+            stem = Path(filename).stem
+            extension = Path(filename).suffix
+            while destination.exists():
+                destination = directory / f"{stem}_{counter}{extension}"
+                counter += 1
+
+            # mkstemp crée le fichier en 0600 ; les uploads restent lisibles comme avant.
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, destination)
+            index.add(destination, digest)
+            index.save()
+            return destination
+    finally:
+        tmp_path.unlink(missing_ok=True)
 
 
 def register_policy(name: str, policy: UploadPolicy) -> None:
@@ -149,7 +312,6 @@ def register_policy(name: str, policy: UploadPolicy) -> None:
 
 # Idées complémentaires :
 # - Connecter ce module à une base de données pour journaliser les uploads.
-# - Générer un nom unique et stocker un hash du fichier pour détecter les doublons.
 # - Intégrer une analyse antivirus ou un service de sandbox pour les PDF.
 # - Limiter le nombre d'uploads par utilisateur/heure pour éviter les abus.
 # - Ajouter une fonction de redimensionnement automatique des images avant stockage.
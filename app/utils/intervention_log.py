@@ -0,0 +1,305 @@
+"""Append-only JSON Lines log of maintenance interventions."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import datetime
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Iterable
+
+from app.utils.file_lock import file_lock
+from app.utils.utils_json import _resolve_path
+
+Intervention = dict[str, Any]
+
+DATE_FORMAT = "%d/%m/%y %H:%M:%S"
+DEFAULT_TAIL_SIZE = 50
+DEFAULT_PAGE_SIZE = 20
+
+# Position of an entry in its site's history: date, then id for entries logged at the same second.
+SortKey = tuple[datetime, int]
+
+
+def parse_intervention_date(raw_date: object) -> datetime:
+    """Parse the ``date`` field of an intervention, ``datetime.min`` when unknown."""
+    if isinstance(raw_date, str):
+        try:
+            return datetime.strptime(raw_date, DATE_FORMAT)
+        except ValueError:
+            pass
+    return datetime.min
+
+
+def _sort_key(entry: Intervention) -> SortKey:
+    try:
+        entry_id = int(entry.get("id") or 0)
+    except (TypeError, ValueError):
+        entry_id = 0
+    return parse_intervention_date(entry.get("date")), entry_id
+
+
+def format_cursor(key: SortKey) -> str:
+    """Opaque history cursor for the entry at ``key``."""
+    return f"{key[0].isoformat()}_{key[1]}"
+
+
+def parse_cursor(cursor: str) -> SortKey:
+    """Inverse of :func:`format_cursor`; raises ``ValueError`` on a malformed cursor."""
+    raw_date, _, raw_id = cursor.rpartition("_")
+    return datetime.fromisoformat(raw_date), int(raw_id)
+
+
+class InterventionLog:
+    """Interventions stored one JSON object per line, indexed in memory.
+
+    The log is only ever appended to, so the in-memory indexes (last id, the
+    most recent entries and the byte offsets of each site's entries) are kept
+    current by reading just the bytes added since the previous access, whether
+    they were written by this process or another one.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        legacy_path: Path | str | None = None,
+        tail_size: int = DEFAULT_TAIL_SIZE,
+    ) -> None:
+        self.path = _resolve_path(path)
+        self.legacy_path = _resolve_path(legacy_path) if legacy_path else None
+        self._lock = threading.RLock()
+        self._tail_size = tail_size
+        self._reset()
+
+    def _reset(self) -> None:
+        self._offset = 0
+        self._inode: int | None = None
+        self._last_id = 0
+        self._tail: deque[Intervention] = deque(maxlen=self._tail_size)
+        self._site_offsets: dict[str, list[int]] = {}
+        self._site_keys: dict[str, list[SortKey]] = {}
+        self._client_ids: dict[str, int] = {}
+
+    # -- indexing ------------------------------------------------------------
+
+    def _migrate_legacy(self) -> None:
+        """Convert the legacy commentaire.json array into the JSONL log once."""
+        if self.path.exists() or self.legacy_path is None or not self.legacy_path.exists():
+            return
+        try:
+            entries = json.loads(self.legacy_path.read_text(encoding="utf-8")) or []
+        except json.JSONDecodeError:
+            entries = []
+        if not isinstance(entries, list):
+            entries = []
+
+        # Oldest first, so that append order matches the chronological order.
+        entries = sorted(
+            (entry for entry in entries if isinstance(entry, dict)),
+            key=lambda entry: parse_intervention_date(entry.get("date")),
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            for entry in entries:
+                handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def _catch_up(self, locked: bool = False) -> None:
+        """Index the lines appended since the last call.
+
+        ``locked`` tells that the caller already holds the file lock.
+        """
+        if self._inode is None and not self.path.exists():
+            if locked:
+                self._migrate_legacy()
+            else:
+                with file_lock(self.path):
+                    self._migrate_legacy()
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self._reset()
+            return
+
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._reset()
+            self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+
+        with self.path.open("rb") as handle:
+            handle.seek(self._offset)
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    break  # partial line: a writer is still appending it
+                self._index_line(line, self._offset)
+                self._offset += len(line)
+
+    def _index_line(self, line: bytes, offset: int) -> None:
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            return
+        if not isinstance(entry, dict):
+            return
+        try:
+            self._last_id = max(self._last_id, int(entry.get("id", 0)))
+        except (TypeError, ValueError):
+            pass
+        self._tail.append(entry)
+        if entry.get("client_id"):
+            self._client_ids[str(entry["client_id"])] = int(entry.get("id") or 0)
+        # Offline devices sync entries dated before ones already logged: keep
+        # each site's (date, id) keys sorted, with the offsets at the same positions.
+        site_key = str(entry.get("emplacement"))
+        sort_key = _sort_key(entry)
+        keys = self._site_keys.setdefault(site_key, [])
+        position = bisect_right(keys, sort_key)
+        keys.insert(position, sort_key)
+        self._site_offsets.setdefault(site_key, []).insert(position, offset)
+
+    def _read_at(self, handle, offset: int) -> Intervention:
+        handle.seek(offset)
+        return json.loads(handle.readline())
+
+    # -- public API ------------------------------------------------------------
+
+    def append(self, entry: Intervention) -> Intervention:
+        """Assign the next id to ``entry`` and append it to the log."""
+        return self.append_many([entry])[0]
+
+    def append_many(self, entries: Iterable[Intervention]) -> list[Intervention]:
+        """Append several interventions in one locked write.
+
+        Entries carrying a ``client_id`` already present in the log (an offline
+        device retrying a sync) are not written again; the stored record is
+        returned in their place so callers can acknowledge them.
+        """
+        batch = list(entries)
+        with self._lock, file_lock(self.path):
+            self._catch_up(locked=True)
+            records: list[Intervention] = []
+            lines: list[bytes] = []
+            next_id = self._last_id
+            pending_client_ids: dict[str, Intervention] = {}
+            for entry in batch:
+                client_id = str(entry.get("client_id") or "")
+                if client_id and client_id in self._client_ids:
+                    records.append({"id": self._client_ids[client_id], "client_id": client_id, "duplicate": True})
+                    continue
+                if client_id and client_id in pending_client_ids:
+                    records.append(pending_client_ids[client_id])
+                    continue
+                next_id += 1
+                record = {"id": next_id, **{k: v for k, v in entry.items() if k != "id"}}
+                if client_id:
+                    pending_client_ids[client_id] = record
+                records.append(record)
+                lines.append((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+
+            if lines:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("ab") as handle:
+                    handle.write(b"".join(lines))
+                if self._inode is None:
+                    self._inode = self.path.stat().st_ino
+                for line in lines:
+                    self._index_line(line, self._offset)
+                    self._offset += len(line)
+        return records
+
+    def changes_since(self, version: int) -> tuple[list[Intervention], bool]:
+        """Return the interventions with an id above ``version``, oldest first.
+
+        Only the in-memory tail is consulted; the boolean is True when the
+        tail does not reach back to ``version`` and the result is truncated.
+        """
+        with self._lock:
+            self._catch_up()
+            tail = list(self._tail)
+        changes = [entry for entry in tail if int(entry.get("id") or 0) > version]
+        truncated = bool(tail) and len(changes) == len(tail) and int(tail[0].get("id") or 0) > version + 1
+        return changes, truncated
+
+    def recent(self, limit: int = 10) -> list[Intervention]:
+        """Return up to ``limit`` of the last logged interventions, most recent date first."""
+        with self._lock:
+            self._catch_up()
+            tail = list(self._tail)
+        tail.sort(key=_sort_key, reverse=True)
+        return tail[:limit]
+
+    def for_site(self, emplacement: object) -> list[Intervention]:
+        """Return the interventions recorded for ``emplacement``, most recent date first."""
+        with self._lock:
+            self._catch_up()
+            offsets = list(self._site_offsets.get(str(emplacement), []))
+        if not offsets:
+            return []
+        with self.path.open("rb") as handle:
+            return [self._read_at(handle, offset) for offset in reversed(offsets)]
+
+    def site_page(
+        self,
+        emplacement: object,
+        cursor: str | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> tuple[list[Intervention], str | None]:
+        """Return one page of a site's history, most recent first.
+
+        ``cursor`` is the opaque value returned as the second element by the
+        previous call (``None`` for the first page, and once the history is
+        exhausted); it names the (date, id) of the last entry shown, so
+        entries synced in the meantime neither shift nor repeat the next
+        page. A site's entries are indexed in that order, so the bounds are
+        resolved by bisection and a page only reads ``limit`` lines from
+        disk, whatever the size of the log. A malformed cursor raises
+        ``ValueError``.
+        """
+        before = parse_cursor(cursor) if cursor is not None else None
+        with self._lock:
+            self._catch_up()
+            site_key = str(emplacement)
+            offsets = self._site_offsets.get(site_key, [])
+            keys = self._site_keys.get(site_key, [])
+            low = bisect_left(keys, date_from, key=itemgetter(0)) if date_from else 0
+            high = bisect_right(keys, date_to, key=itemgetter(0)) if date_to else len(offsets)
+            if before is not None:
+                high = min(high, bisect_left(keys, before))
+            start = max(low, high - max(limit, 1))
+            page_offsets = offsets[start:high]
+            next_cursor = format_cursor(keys[start]) if start > low else None
+
+        if not page_offsets:
+            return [], None
+        with self.path.open("rb") as handle:
+            entries = [self._read_at(handle, offset) for offset in reversed(page_offsets)]
+        return entries, next_cursor
+
+    @property
+    def last_id(self) -> int:
+        """Highest intervention id recorded so far."""
+        with self._lock:
+            self._catch_up()
+            return self._last_id
+
+
+_LOGS: dict[Path, InterventionLog] = {}
+_LOGS_LOCK = threading.Lock()
+
+
+def get_intervention_log(path: Path | str, legacy_path: Path | str | None = None) -> InterventionLog:
+    """Return the shared log instance for ``path``."""
+    key = _resolve_path(path)
+    with _LOGS_LOCK:
+        log = _LOGS.get(key)
+        if log is None:
+            log = _LOGS[key] = InterventionLog(key, legacy_path)
+        return log
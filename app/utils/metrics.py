@@ -0,0 +1,190 @@
+"""Per-endpoint request metrics rendered in the Prometheus text format."""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterable
+
+from flask import Flask, Response, request
+
+from app.utils.utils_json import add_io_observer
+
+# Upper bounds of the fixed histogram buckets (+Inf is implicit).
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# JSON reads/writes of the current request: [loads, saves], None outside a timed request.
+_json_io: ContextVar[list[int] | None] = ContextVar("karto_json_io", default=None)
+
+
+class Histogram:
+    """Cumulative fixed-bucket histogram."""
+
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds: Iterable[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def buckets(self) -> list[tuple[str, int]]:
+        """Return ``(le, cumulative count)`` pairs, ending with ``+Inf``."""
+        cumulative = 0
+        rows = []
+        for bound, count in zip([*map(_format_bound, self.bounds), "+Inf"], self.counts):
+            cumulative += count
+            rows.append((bound, cumulative))
+        return rows
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound)) if not float(bound).is_integer() or bound < 1 else str(int(bound))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestMetrics:
+    """Latency, response size and JSON file IO, per endpoint and method."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.sizes: dict[tuple[str, str], Histogram] = {}
+        self.statuses: dict[tuple[str, str, str], int] = {}
+        self.json_loads: dict[str, int] = {}
+        self.json_saves: dict[str, int] = {}
+
+    def record(
+        self,
+        endpoint: str,
+        method: str,
+        status: int,
+        duration: float,
+        size: int | None,
+        loads: int,
+        saves: int,
+    ) -> None:
+        key = (endpoint, method)
+        with self._lock:
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(duration)
+            if size is not None:
+                self.sizes.setdefault(key, Histogram(SIZE_BUCKETS)).observe(size)
+            status_key = (endpoint, method, str(status))
+            self.statuses[status_key] = self.statuses.get(status_key, 0) + 1
+            if loads:
+                self.json_loads[endpoint] = self.json_loads.get(endpoint, 0) + loads
+            if saves:
+                self.json_saves[endpoint] = self.json_saves.get(endpoint, 0) + saves
+
+    def render(self, extra_counters: dict[str, int] | None = None) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines: list[str] = []
+        with self._lock:
+            self._render_histograms(
+                lines,
+                "karto_request_duration_seconds",
+                "Request latency by endpoint.",
+                self.latency,
+            )
+            self._render_histograms(
+                lines,
+                "karto_response_size_bytes",
+                "Response body size by endpoint (streamed responses excluded).",
+                self.sizes,
+            )
+            lines.append("# HELP karto_requests_total Requests by endpoint and status.")
+            lines.append("# TYPE karto_requests_total counter")
+            for (endpoint, method, status), count in sorted(self.statuses.items()):
+                lines.append(
+                    f'karto_requests_total{{endpoint="{_escape(endpoint)}",method="{method}",'
+                    f'status="{status}"}} {count}'
+                )
+            for name, help_text, counters in (
+                ("karto_json_loads_total", "JSON files read by endpoint.", self.json_loads),
+                ("karto_json_saves_total", "JSON files written by endpoint.", self.json_saves),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for endpoint, count in sorted(counters.items()):
+                    lines.append(f'{name}{{endpoint="{_escape(endpoint)}"}} {count}')
+        if extra_counters:
+            lines.append("# HELP karto_login_attempts_total Login attempts seen by the rate limiter.")
+            lines.append("# TYPE karto_login_attempts_total counter")
+            for result, count in sorted(extra_counters.items()):
+                lines.append(f'karto_login_attempts_total{{result="{_escape(result)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histograms(
+        lines: list[str], name: str, help_text: str, histograms: dict[tuple[str, str], Histogram]
+    ) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for (endpoint, method), histogram in sorted(histograms.items()):
+            labels = f'endpoint="{_escape(endpoint)}",method="{method}"'
+            for bound, cumulative in histogram.buckets():
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.total:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+def _count_json_io(operation: str, _path: Path) -> None:
+    counts = _json_io.get()
+    if counts is not None:
+        counts[0 if operation == "load" else 1] += 1
+
+
+_OBSERVER_INSTALLED = False
+
+
+def init_metrics(app: Flask) -> RequestMetrics:
+    """Instrument ``app`` and store the collector in ``app.extensions["metrics"]``.
+
+    When ``METRICS_ENABLED`` is false the hooks return after a single config
+    lookup, and JSON file accesses are not counted.
+    """
+    global _OBSERVER_INSTALLED
+    metrics = RequestMetrics()
+    app.extensions["metrics"] = metrics
+    if not _OBSERVER_INSTALLED:
+        add_io_observer(_count_json_io)
+        _OBSERVER_INSTALLED = True
+
+    @app.before_request
+    def _start_timer() -> None:
+        if not app.config.get("METRICS_ENABLED"):
+            return
+        request.environ["karto.metrics"] = (time.perf_counter(), _json_io.set([0, 0]))
+
+    @app.after_request
+    def _record(response: Response) -> Response:
+        started = request.environ.pop("karto.metrics", None)
+        if started is None:
+            return response
+        start, token = started
+        counts = _json_io.get() or [0, 0]
+        _json_io.reset(token)
+        metrics.record(
+            request.endpoint or "unmatched",
+            request.method,
+            response.status_code,
+            time.perf_counter() - start,
+            None if response.is_streamed else response.calculate_content_length(),
+            counts[0],
+            counts[1],
+        )
+        return response
+
+    return metrics
@@ -0,0 +1,89 @@
+"""In-process fan-out of notification changes to waiting listeners."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from app.utils.notification_store import NotificationStore, get_notification_store
+
+DEFAULT_WATCH_INTERVAL = 1.0
+
+
+class NotificationHub:
+    """Wake up listeners whenever the notification store changes.
+
+    Writes made through the store in this process publish immediately. Writes
+    made by other processes (other mod_wsgi workers) are picked up by a watcher
+    thread that stats the store file once per ``watch_interval`` while at least
+    one listener is connected, so idle processes do no work at all.
+    """
+
+    def __init__(self, store: NotificationStore, watch_interval: float = DEFAULT_WATCH_INTERVAL) -> None:
+        self.store = store
+        self.watch_interval = watch_interval
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._listeners = 0
+        self._watcher: threading.Thread | None = None
+        store.add_listener(self.publish)
+
+    @property
+    def generation(self) -> int:
+        """Counter incremented on every published change."""
+        return self._generation
+
+    def publish(self) -> None:
+        """Signal every waiting listener that the store changed."""
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+
+    def wait(self, generation: int, timeout: float) -> int:
+        """Block until a change newer than ``generation`` or ``timeout`` seconds.
+
+        Returns the current generation; it equals ``generation`` on timeout.
+        """
+        with self._condition:
+            self._listeners += 1
+            self._ensure_watcher()
+            try:
+                self._condition.wait_for(lambda: self._generation != generation, timeout)
+                return self._generation
+            finally:
+                self._listeners -= 1
+
+    def _ensure_watcher(self) -> None:
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._watcher = threading.Thread(
+            target=self._watch, name="notification-hub-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def _watch(self) -> None:
+        signature = self.store.signature()
+        while True:
+            time.sleep(self.watch_interval)
+            with self._condition:
+                if not self._listeners:
+                    self._watcher = None
+                    return
+            current = self.store.signature()
+            if current != signature:
+                signature = current
+                self.publish()
+
+
+_HUBS: dict[int, NotificationHub] = {}
+_HUBS_LOCK = threading.Lock()
+
+
+def get_notification_hub(filepath: str) -> NotificationHub:
+    """Return the shared hub attached to the store for ``filepath``."""
+    store = get_notification_store(filepath)
+    with _HUBS_LOCK:
+        hub = _HUBS.get(id(store))
+        if hub is None:
+            hub = _HUBS[id(store)] = NotificationHub(store)
+        return hub
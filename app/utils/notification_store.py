@@ -0,0 +1,280 @@
+"""Cached access to notifications.json with per-recipient indexes."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from app.utils.file_lock import file_lock
+from app.utils.utils_json import _resolve_path, load_json_file, save_json_file
+
+Notification = dict[str, Any]
+
+# Read notifications older than this are moved out of the active file.
+DEFAULT_RETENTION_DAYS = 90
+# Minimum delay between two automatic compactions triggered by a write.
+COMPACTION_INTERVAL_SECONDS = 24 * 3600
+
+_UNLOADED = object()
+
+_ID_LOCK = threading.Lock()
+_last_id_ms = 0
+_last_id_seq = 0
+
+
+def new_notification_id() -> str:
+    """Return a time-ordered UUIDv7 string.
+
+    A 12-bit counter fills the ``rand_a`` field so that ids generated within
+    the same millisecond stay unique and sortable inside a process; the 62
+    random bits keep them unique across processes.
+    """
+    global _last_id_ms, _last_id_seq
+    with _ID_LOCK:
+        millis = time.time_ns() // 1_000_000
+        if millis > _last_id_ms:
+            sequence = 0
+        else:
+            millis = _last_id_ms
+            sequence = _last_id_seq + 1
+            if sequence > 0xFFF:
+                millis += 1
+                sequence = 0
+        _last_id_ms, _last_id_seq = millis, sequence
+
+    random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (
+        (millis & ((1 << 48) - 1)) << 80
+        | 0x7 << 76
+        | sequence << 64
+        | 0b10 << 62
+        | random_bits
+    )
+    return str(uuid.UUID(int=value))
+
+
+class NotificationStore:
+    """Keep notifications in memory, indexed by recipient and by id.
+
+    The file signature (mtime and size) is checked on each access so that a
+    write made by another process invalidates the cache. Writes made through
+    the store update the indexes in place and never trigger a reload.
+
+    Read notifications older than ``retention_days`` are moved to monthly
+    archive files (``notifications-YYYY-MM.json``) at most once per
+    ``COMPACTION_INTERVAL_SECONDS``, piggybacking on a regular write, so the
+    active file only holds unread and recent notifications.
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        retention_days: int | None = DEFAULT_RETENTION_DAYS,
+        archive_dir: str | Path | None = None,
+    ) -> None:
+        self.filepath = filepath
+        self._path = _resolve_path(filepath)
+        self.retention_days = retention_days
+        self.archive_dir = _resolve_path(archive_dir) if archive_dir else self._path.parent / "archive"
+        self._last_compaction: float | None = None
+        self._lock = threading.RLock()
+        self._signature: object = _UNLOADED
+        self._notifications: list[Notification] = []
+        self._by_recipient: dict[str, list[Notification]] = {}
+        self._by_id: dict[str, list[Notification]] = {}
+        self._unread: dict[str, int] = {}
+        self._listeners: list[Callable[[], None]] = []
+
+    # -- cache maintenance -------------------------------------------------
+
+    def _file_signature(self) -> tuple[int, int] | None:
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self) -> None:
+        """Reload the file when its signature changed since the last access."""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+
+        data = load_json_file(self.filepath) if signature is not None else []
+        self._rebuild(data if isinstance(data, list) else [])
+        self._signature = signature
+
+    def _rebuild(self, notifications: list[Notification]) -> None:
+        self._notifications = []
+        self._by_recipient = {}
+        self._by_id = {}
+        self._unread = {}
+        for notification in notifications:
+            if isinstance(notification, dict):
+                self._index(notification)
+
+    def _index(self, notification: Notification) -> None:
+        recipient = str(notification.get("recipient_id"))
+        self._notifications.append(notification)
+        self._by_recipient.setdefault(recipient, []).append(notification)
+        self._by_id.setdefault(str(notification.get("id")), []).append(notification)
+        if not notification.get("is_read"):
+            self._unread[recipient] = self._unread.get(recipient, 0) + 1
+
+    def _persist(self) -> None:
+        if self.retention_days is not None and (
+            self._last_compaction is None
+            or time.monotonic() - self._last_compaction >= COMPACTION_INTERVAL_SECONDS
+        ):
+            self._archive_expired(datetime.utcnow())
+        save_json_file(self.filepath, self._notifications)
+        self._signature = self._file_signature()
+        for listener in list(self._listeners):
+            listener()
+
+    def signature(self) -> tuple[int, int] | None:
+        """Return the current on-disk signature of the store file."""
+        return self._file_signature()
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """Register ``callback`` to be called after every write made through the store."""
+        self._listeners.append(callback)
+
+    def configure_retention(
+        self, retention_days: int | None, archive_dir: str | Path | None = None
+    ) -> None:
+        """Change the retention policy; ``None`` disables compaction."""
+        with self._lock:
+            self.retention_days = retention_days
+            if archive_dir:
+                self.archive_dir = _resolve_path(archive_dir)
+
+    # -- retention -----------------------------------------------------------
+
+    def _is_expired(self, notification: Notification, cutoff: datetime) -> bool:
+        if not notification.get("is_read"):
+            return False
+        try:
+            created = datetime.fromisoformat(str(notification.get("created_at", "")).replace("Z", ""))
+        except ValueError:
+            return False
+        return created.replace(tzinfo=None) < cutoff
+
+    def _archive_expired(self, now: datetime) -> int:
+        """Move expired notifications to the archive files; return how many moved."""
+        self._last_compaction = time.monotonic()
+        cutoff = now - timedelta(days=self.retention_days or 0)
+        kept: list[Notification] = []
+        expired_by_month: dict[str, list[Notification]] = {}
+        for notification in self._notifications:
+            if self._is_expired(notification, cutoff):
+                month = str(notification.get("created_at", ""))[:7]
+                expired_by_month.setdefault(month, []).append(notification)
+            else:
+                kept.append(notification)
+
+        if not expired_by_month:
+            return 0
+
+        # Archives are written before the active file so a crash can at worst
+        # duplicate a notification, never lose it.
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        for month, entries in sorted(expired_by_month.items()):
+            archive_path = self.archive_dir / f"notifications-{month}.json"
+            archived = load_json_file(str(archive_path)) if archive_path.exists() else []
+            save_json_file(str(archive_path), list(archived or []) + entries)
+
+        self._rebuild(kept)
+        return sum(len(entries) for entries in expired_by_month.values())
+
+    def compact(self, now: datetime | None = None) -> int:
+        """Archive expired read notifications immediately; return how many moved."""
+        if self.retention_days is None:
+            return 0
+        with self._lock, file_lock(self._path):
+            self._refresh()
+            moved = self._archive_expired(now or datetime.utcnow())
+            if moved:
+                save_json_file(self.filepath, self._notifications)
+                self._signature = self._file_signature()
+            return moved
+
+    # -- read API ------------------------------------------------------------
+
+    def unread_count(self, recipient_id: object) -> int:
+        """Return the number of unread notifications for ``recipient_id``."""
+        with self._lock:
+            self._refresh()
+            return self._unread.get(str(recipient_id), 0)
+
+    def for_recipient(self, recipient_id: object) -> list[Notification]:
+        """Return copies of every notification addressed to ``recipient_id``."""
+        with self._lock:
+            self._refresh()
+            return [dict(item) for item in self._by_recipient.get(str(recipient_id), [])]
+
+    def unread_for(self, recipient_id: object) -> list[Notification]:
+        """Return copies of the unread notifications addressed to ``recipient_id``."""
+        with self._lock:
+            self._refresh()
+            if not self._unread.get(str(recipient_id)):
+                return []
+            return [
+                dict(item)
+                for item in self._by_recipient.get(str(recipient_id), [])
+                if not item.get("is_read")
+            ]
+
+    # -- write API -----------------------------------------------------------
+
+    def add(self, notification: Notification) -> Notification:
+        """Append ``notification`` to the store and persist it."""
+        self.add_many([notification])
+        return notification
+
+    def add_many(self, notifications: Iterable[Notification]) -> list[Notification]:
+        """Append every notification in a single locked read-modify-write."""
+        batch = list(notifications)
+        if not batch:
+            return batch
+        with self._lock, file_lock(self._path):
+            self._refresh()
+            for notification in batch:
+                self._index(notification)
+            self._persist()
+        return batch
+
+    def mark_read(self, notif_id: object) -> int:
+        """Flag every notification with ``notif_id`` as read; return how many changed."""
+        with self._lock, file_lock(self._path):
+            self._refresh()
+            changed = 0
+            for notification in self._by_id.get(str(notif_id), []):
+                if notification.get("is_read"):
+                    continue
+                notification["is_read"] = True
+                recipient = str(notification.get("recipient_id"))
+                self._unread[recipient] = max(self._unread.get(recipient, 0) - 1, 0)
+                changed += 1
+            if changed:
+                self._persist()
+            return changed
+
+
+_STORES: dict[str, NotificationStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_notification_store(filepath: str) -> NotificationStore:
+    """Return the shared store instance for ``filepath``."""
+    key = str(_resolve_path(filepath))
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = _STORES[key] = NotificationStore(filepath)
+        return store
@@ -0,0 +1,41 @@
+"""Password hashing with a configurable target method and cost."""
+
+from __future__ import annotations
+
+from flask import current_app, has_app_context
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash
+
+# Same parameters as werkzeug's default, spelled out so that stored hashes
+# can be compared with the target.
+DEFAULT_PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+
+
+def normalize_method(method: str) -> str:
+    """Return ``method`` with werkzeug's implicit parameters made explicit."""
+    name, *params = method.split(":")
+    if name == "scrypt":
+        defaults = ["32768", "8", "1"]
+    elif name == "pbkdf2":
+        defaults = ["sha256", str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ":".join([name, *params, *defaults[len(params):]])
+
+
+def target_method() -> str:
+    """Hash method new and rehashed passwords use (``PASSWORD_HASH_METHOD``)."""
+    method = DEFAULT_PASSWORD_HASH_METHOD
+    if has_app_context():
+        method = current_app.config.get("PASSWORD_HASH_METHOD") or method
+    return normalize_method(method)
+
+
+def hash_password(password: str) -> str:
+    """Hash ``password`` with the target method."""
+    return generate_password_hash(password, method=target_method())
+
+
+def needs_rehash(pwhash: str) -> bool:
+    """True when ``pwhash`` was not produced with the target method and cost."""
+    method = pwhash.split("$", 1)[0]
+    return normalize_method(method) != target_method()
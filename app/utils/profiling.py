@@ -0,0 +1,77 @@
+"""On-demand cProfile capture of single requests, restricted to administrators."""
+
+from __future__ import annotations
+
+import cProfile
+import re
+from datetime import datetime
+from pathlib import Path
+
+from flask import Flask, Response, request, session
+
+PROFILE_QUERY_FLAG = "_profile"
+PROFILE_HEADER = "X-Profile"
+PROFILE_ACCESS_LEVEL = 5
+DEFAULT_PROFILE_KEEP = 50
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def profile_dir(app: Flask) -> Path:
+    """Directory holding the captured ``.prof`` files (``PROFILE_DIR``)."""
+    return Path(app.config.get("PROFILE_DIR") or Path(app.instance_path) / "profiles")
+
+
+def list_profiles(app: Flask) -> list[Path]:
+    """Return the captured profiles, most recent first."""
+    directory = profile_dir(app)
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob("*.prof"), key=lambda path: path.name, reverse=True)
+
+
+def _requested() -> bool:
+    if request.args.get(PROFILE_QUERY_FLAG) != "1" and request.headers.get(PROFILE_HEADER) != "1":
+        return False
+    user = session.get("user") or {}
+    return user.get("access_level", 0) >= PROFILE_ACCESS_LEVEL
+
+
+def _prune(app: Flask) -> None:
+    keep = int(app.config.get("PROFILE_KEEP", DEFAULT_PROFILE_KEEP))
+    for path in list_profiles(app)[keep:]:
+        path.unlink(missing_ok=True)
+
+
+def init_profiling(app: Flask) -> None:
+    """Profile the requests that ask for it with ``?_profile=1`` or ``X-Profile: 1``.
+
+    Only level 5 sessions can trigger a capture; for everybody else the flag
+    is ignored. The stats file is written to ``profile_dir`` and its name is
+    returned in the ``X-Profile-File`` response header.
+    """
+
+    @app.before_request
+    def _start_profile() -> None:
+        if not _requested():
+            return
+        profiler = cProfile.Profile()
+        request.environ["karto.profiler"] = profiler
+        profiler.enable()
+
+    @app.after_request
+    def _stop_profile(response: Response) -> Response:
+        profiler = request.environ.pop("karto.profiler", None)
+        if profiler is None:
+            return response
+        profiler.disable()
+
+        directory = profile_dir(app)
+        directory.mkdir(parents=True, exist_ok=True)
+        endpoint = _UNSAFE_CHARS.sub("_", request.endpoint or "unmatched")
+        filename = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{endpoint}.prof"
+        profiler.dump_stats(directory / filename)
+        _prune(app)
+        app.logger.info("Request %s profiled to %s", request.path, filename)
+        response.headers["X-Profile-File"] = filename
+        return response
@@ -0,0 +1,184 @@
+"""Token-bucket rate limiting for the login form."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Protocol, Sequence
+
+from app.utils.utils_json import _resolve_path
+
+# (key, capacity, refill rate in tokens per second)
+BucketSpec = tuple[str, float, float]
+
+DEFAULT_MAX_KEYS = 10_000
+
+
+class BucketBackend(Protocol):
+    def take(self, specs: Sequence[BucketSpec], now: float) -> str | None:
+        """Take one token from every bucket, or none; return the first empty key."""
+
+    def reset(self, key: str) -> None:
+        """Refill the bucket ``key``."""
+
+
+class MemoryBuckets:
+    """Buckets of one process, bounded to ``max_keys`` in LRU order.
+
+    An evicted bucket simply starts full again the next time it is used, so
+    the bound never lets an attacker through faster than the configured rate
+    unless they spread attempts over more keys than ``max_keys``.
+    """
+
+    def __init__(self, max_keys: int = DEFAULT_MAX_KEYS) -> None:
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def _level(self, key: str, capacity: float, rate: float, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        return min(capacity, tokens + (now - updated) * rate)
+
+    def take(self, specs: Sequence[BucketSpec], now: float) -> str | None:
+        with self._lock:
+            levels = [(key, self._level(key, capacity, rate, now)) for key, capacity, rate in specs]
+            for key, tokens in levels:
+                if tokens < 1:
+                    return key
+            for key, tokens in levels:
+                self._buckets[key] = (tokens - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return None
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteBuckets:
+    """Buckets shared by every worker through a small SQLite file."""
+
+    PRUNE_EVERY = 256
+
+    def __init__(self, path: Path | str, max_keys: int = DEFAULT_MAX_KEYS) -> None:
+        self.path = _resolve_path(path)
+        self.max_keys = max_keys
+        self._local = threading.local()
+        self._writes = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def take(self, specs: Sequence[BucketSpec], now: float) -> str | None:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            keys = [key for key, _, _ in specs]
+            rows = dict(
+                (key, (tokens, updated))
+                for key, tokens, updated in conn.execute(
+                    f"SELECT key, tokens, updated FROM buckets WHERE key IN ({','.join('?' * len(keys))})",
+                    keys,
+                )
+            )
+            levels = []
+            for key, capacity, rate in specs:
+                tokens, updated = rows.get(key, (capacity, now))
+                levels.append((key, min(capacity, tokens + (now - updated) * rate)))
+            for key, tokens in levels:
+                if tokens < 1:
+                    conn.execute("ROLLBACK")
+                    return key
+            conn.executemany(
+                "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                [(key, tokens - 1, now) for key, tokens in levels],
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                # Keep the most recently used buckets only.
+                conn.execute(
+                    "DELETE FROM buckets WHERE key NOT IN "
+                    "(SELECT key FROM buckets ORDER BY updated DESC LIMIT ?)",
+                    (self.max_keys,),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return None
+
+    def reset(self, key: str) -> None:
+        self._connect().execute("DELETE FROM buckets WHERE key = ?", (key,))
+
+
+class LoginRateLimiter:
+    """Throttle login attempts per login and per client address.
+
+    Each attempt takes one token from the bucket of the login and one from the
+    bucket of the address; a bucket of ``capacity`` tokens refills completely
+    in ``window`` seconds. ``check`` is meant to run before the password hash
+    is computed, so rejected attempts cost no CPU.
+    """
+
+    def __init__(
+        self,
+        backend: BucketBackend,
+        per_login: int = 5,
+        per_ip: int = 20,
+        window: float = 60.0,
+    ) -> None:
+        self.backend = backend
+        self.per_login = per_login
+        self.per_ip = per_ip
+        self.window = window
+        self._counter_lock = threading.Lock()
+        self.counters = {"allowed": 0, "rejected_login": 0, "rejected_ip": 0}
+
+    @staticmethod
+    def login_key(login: str) -> str:
+        return f"login:{login.strip().lower()}"
+
+    @staticmethod
+    def ip_key(address: str | None) -> str:
+        return f"ip:{address or 'unknown'}"
+
+    def check(self, login: str, address: str | None, now: float | None = None) -> bool:
+        """Consume one attempt for ``login`` and ``address``; False when throttled."""
+        specs = [
+            (self.login_key(login), float(self.per_login), self.per_login / self.window),
+            (self.ip_key(address), float(self.per_ip), self.per_ip / self.window),
+        ]
+        empty = self.backend.take(specs, time.time() if now is None else now)
+        counter = "allowed" if empty is None else f"rejected_{empty.split(':', 1)[0]}"
+        with self._counter_lock:
+            self.counters[counter] += 1
+        return empty is None
+
+    def reset_login(self, login: str) -> None:
+        """Forget the failed attempts of ``login`` after a successful login."""
+        self.backend.reset(self.login_key(login))
+
+    def stats(self) -> dict[str, int]:
+        """Return a copy of the attempt counters of this process."""
+        with self._counter_lock:
+            return dict(self.counters)
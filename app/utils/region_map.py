@@ -0,0 +1,145 @@
+"""Region picker map rendered once per source version and cached on disk."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote
+
+from app.utils.file_lock import file_lock
+from app.utils.geo_lod import read_geojson
+from app.utils.utils_json import _resolve_path
+
+# Stands for the region code in the details URL handed to ``RegionMapCache.current``.
+REGION_PLACEHOLDER = "__REGION__"
+ARTIFACT_PREFIX = "regions-"
+REGION_MAP_ZOOM = 6
+# Previous versions kept so pages already open in another process still load.
+KEEP_ARTIFACTS = 3
+
+
+def render_region_map(geojson: dict[str, Any], details_url: str) -> str:
+    """Return the folium HTML page with one clickable shape per region."""
+    import folium  # deferred: heavy import, only needed when a map is built
+
+    region_map = folium.Map(location=[45.0, 2.0], zoom_start=REGION_MAP_ZOOM)
+    for feature in geojson.get("features", []):
+        properties = feature.get("properties") or {}
+        name = properties.get("libgeo", "Inconnu")
+        region_id = properties.get("reg", "Inconnu")
+        href = details_url.replace(REGION_PLACEHOLDER, quote(str(region_id)))
+        folium.GeoJson(
+            feature,
+            popup=folium.Popup(f'<a href="{href}" target="_top">Voir {name}</a>'),
+            tooltip=name,
+            highlight_function=lambda _: {"fillColor": "green"},
+        ).add_to(region_map)
+    return region_map.get_root().render()
+
+
+class RegionMapCache:
+    """Serve the region map from a file named after the hash of its inputs.
+
+    The first request builds the map synchronously. When the geojson changes
+    afterwards, requests keep getting the previous file while a background
+    thread renders the new one; the source is hashed again only when its
+    mtime or size change.
+    """
+
+    def __init__(self, source: str | Path, cache_dir: str | Path) -> None:
+        self.source = str(source)
+        self._source_path = _resolve_path(source)
+        self.cache_dir = Path(cache_dir)
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._digest: tuple[tuple[int, int], str] | None = None
+        self._latest: str | None = None
+        self._worker: threading.Thread | None = None
+
+    def _source_digest(self) -> str:
+        stat = self._source_path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if self._digest is None or self._digest[0] != signature:
+            self._digest = (signature, hashlib.sha256(self._source_path.read_bytes()).hexdigest())
+        return self._digest[1]
+
+    def artifact_name(self, details_url: str) -> str:
+        """File name of the map for the current source and ``details_url``."""
+        with self._lock:
+            digest = self._source_digest()
+        key = hashlib.sha256(f"{digest}\n{details_url}".encode()).hexdigest()[:16]
+        return f"{ARTIFACT_PREFIX}{key}.html"
+
+    def _artifacts(self) -> list[Path]:
+        if not self.cache_dir.is_dir():
+            return []
+        return sorted(
+            self.cache_dir.glob(f"{ARTIFACT_PREFIX}*.html"),
+            key=lambda path: path.stat().st_mtime_ns,
+            reverse=True,
+        )
+
+    def current(self, details_url: str) -> str:
+        """Return the file name to serve, building or scheduling it as needed.
+
+        ``details_url`` is the region page URL with ``REGION_PLACEHOLDER`` in
+        place of the region code.
+        """
+        name = self.artifact_name(details_url)
+        if (self.cache_dir / name).exists():
+            self._latest = name
+            return name
+
+        stale = self._latest
+        if stale is None or not (self.cache_dir / stale).exists():
+            artifacts = self._artifacts()
+            stale = artifacts[0].name if artifacts else None
+        if stale is None:
+            self.build(name, details_url)
+            return name
+
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self.build, args=(name, details_url), name="region-map", daemon=True
+                )
+                self._worker.start()
+        return stale
+
+    def build(self, name: str, details_url: str) -> None:
+        """Render the map into ``cache_dir / name`` unless another worker already did."""
+        target = self.cache_dir / name
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self._build_lock, file_lock(target):
+            if not target.exists():
+                html = render_region_map(read_geojson(self.source), details_url)
+                tmp_path = target.with_name(f".{name}.{os.getpid()}.tmp")
+                tmp_path.write_text(html, encoding="utf-8")
+                os.replace(tmp_path, target)
+            self._latest = name
+            for old in self._artifacts()[KEEP_ARTIFACTS:]:
+                old.unlink(missing_ok=True)
+                old.with_name(f"{old.name}.lock").unlink(missing_ok=True)
+
+    def wait(self, timeout: float | None = None) -> None:
+        """Block until the pending background build, if any, is finished."""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+
+_CACHES: dict[tuple[Path, Path], RegionMapCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_region_map_cache(source: str | Path, cache_dir: str | Path) -> RegionMapCache:
+    """Return the shared cache instance for ``source`` rendered into ``cache_dir``."""
+    key = (_resolve_path(source), Path(cache_dir).resolve())
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = _CACHES[key] = RegionMapCache(source, cache_dir)
+        return cache
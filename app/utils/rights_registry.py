@@ -0,0 +1,106 @@
+"""Cached access-level definitions (droits.json), indexed by level."""
+
+from __future__ import annotations
+
+import copy
+import threading
+from pathlib import Path
+from typing import Any
+
+from app.utils.file_lock import file_lock
+from app.utils.utils_json import _resolve_path, load_json_file, save_json_file
+
+RIGHTS_FILE = "./app/data/users/droits.json"
+
+Right = dict[str, Any]
+
+_UNLOADED = object()
+
+
+class RightsRegistry:
+    """Keep the access levels in memory, indexed by ``Niveau``.
+
+    Like the user directory, the file signature is checked on each access so
+    that a hand edit is picked up; writes made through ``save`` reindex in
+    place. A missing or unreadable file behaves as an empty list.
+    """
+
+    def __init__(self, filepath: str = RIGHTS_FILE) -> None:
+        self.filepath = filepath
+        self._path = _resolve_path(filepath)
+        self._lock = threading.RLock()
+        self._signature: object = _UNLOADED
+        self._rights: list[Right] = []
+        self._by_level: dict[int, Right] = {}
+
+    def _file_signature(self) -> tuple[int, int] | None:
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self) -> None:
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        data: Any = []
+        if signature is not None:
+            try:
+                data = load_json_file(self.filepath)
+            except ValueError:  # invalid JSON: keep serving an empty registry
+                data = []
+        self._rebuild(data if isinstance(data, list) else [])
+        self._signature = signature
+
+    def _rebuild(self, rights: list[Right]) -> None:
+        self._rights = [right for right in rights if isinstance(right, dict)]
+        self._by_level = {}
+        for right in self._rights:
+            try:
+                self._by_level.setdefault(int(right.get("Niveau")), right)
+            except (TypeError, ValueError):
+                continue
+
+    def all(self) -> list[Right]:
+        """Return a copy of every access level, in file order."""
+        with self._lock:
+            self._refresh()
+            return copy.deepcopy(self._rights)
+
+    def get(self, level: object) -> Right | None:
+        """Return a copy of the access level ``level``."""
+        try:
+            key = int(level)  # type: ignore[arg-type]
+        except (TypeError, ValueError):
+            return None
+        with self._lock:
+            self._refresh()
+            right = self._by_level.get(key)
+            return dict(right) if right is not None else None
+
+    def definition(self, level: object) -> str | None:
+        """Return the textual definition of ``level``, if any."""
+        right = self.get(level)
+        return right.get("Definition") if right else None
+
+    def save(self, rights: list[Right]) -> None:
+        """Write ``rights`` to the file and index them without a reload."""
+        with self._lock, file_lock(self._path):
+            save_json_file(self.filepath, rights)
+            self._rebuild(copy.deepcopy(rights))
+            self._signature = self._file_signature()
+
+
+_REGISTRIES: dict[Path, RightsRegistry] = {}
+_REGISTRIES_LOCK = threading.Lock()
+
+
+def get_rights_registry(filepath: str = RIGHTS_FILE) -> RightsRegistry:
+    """Return the shared registry for ``filepath``."""
+    key = _resolve_path(filepath)
+    with _REGISTRIES_LOCK:
+        registry = _REGISTRIES.get(key)
+        if registry is None:
+            registry = _REGISTRIES[key] = RightsRegistry(filepath)
+        return registry
@@ -0,0 +1,191 @@
+"""Versioned change log of the site records (recap.json)."""
+
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable
+
+from app.utils.file_lock import file_lock
+from app.utils.utils_json import _resolve_path, load_json_file
+
+SiteRecord = dict[str, Any]
+
+
+def site_key(record: SiteRecord, position: int) -> str:
+    """Stable key of a site record: its ``INDEX``, else its position."""
+    value = record.get("INDEX")
+    return str(value if value not in (None, "") else position)
+
+
+CHANGES_SUFFIX = ".changes.jsonl"
+
+
+def is_change_log(name: str) -> bool:
+    """True for a change log file name.
+
+    Snapshot and backup restores leave these logs alone: a restored site file
+    is then synced as new changes, so versions never go backwards.
+    """
+    return name.endswith(CHANGES_SUFFIX)
+
+
+def changes_path_for(data_path: Path | str) -> Path:
+    """Return the change log stored next to ``data_path`` (recap.json -> recap.changes.jsonl)."""
+    path = _resolve_path(data_path)
+    return path.with_name(f"{path.stem}{CHANGES_SUFFIX}")
+
+
+class SiteChangeLog:
+    """Append-only log of site upserts and deletions, one JSON object per line.
+
+    Every line carries a monotonically increasing ``version``. The latest
+    state of each site is kept in memory, ordered by the version of its last
+    change, so ``changes_since`` only walks the records changed after the
+    requested version.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = _resolve_path(path)
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        # A replaced or lost log must be resynced with the site file.
+        self._source_signature: tuple[int, int] | None = None
+        self._offset = 0
+        self._inode: int | None = None
+        self._version = 0
+        # key -> (version, record or None for a tombstone), oldest change first.
+        self._latest: dict[str, tuple[int, SiteRecord | None]] = {}
+
+    def _catch_up(self) -> None:
+        """Apply the lines appended since the last call."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self._reset()
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._reset()
+            self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with self.path.open("rb") as handle:
+            handle.seek(self._offset)
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    break  # partial line: a writer is still appending it
+                self._offset += len(line)
+                try:
+                    self._apply(json.loads(line))
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    continue
+
+    def _apply(self, change: dict[str, Any]) -> None:
+        version = int(change["version"])
+        key = str(change["key"])
+        record = change.get("record") if change.get("op") == "upsert" else None
+        self._latest.pop(key, None)
+        self._latest[key] = (version, record)
+        self._version = max(self._version, version)
+
+    # -- public API ------------------------------------------------------------
+
+    def sync(self, records: Iterable[SiteRecord]) -> int:
+        """Record the differences between ``records`` and the logged state.
+
+        Added and modified sites are logged as upserts, sites no longer present
+        as tombstones. Called after every write of recap.json, it also picks up
+        edits made outside the application. Returns the current version.
+        """
+        current = {site_key(record, position): record for position, record in enumerate(records)}
+        with self._lock, file_lock(self.path):
+            self._catch_up()
+            now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            version = self._version
+            changes = []
+            for key, record in current.items():
+                known = self._latest.get(key)
+                if known is None or known[1] != record:
+                    version += 1
+                    changes.append({"version": version, "op": "upsert", "key": key, "record": record, "at": now})
+            for key, (_, record) in self._latest.items():
+                if record is not None and key not in current:
+                    version += 1
+                    changes.append({"version": version, "op": "delete", "key": key, "at": now})
+            if not changes:
+                return self._version
+
+            lines = [(json.dumps(change, ensure_ascii=False) + "\n").encode("utf-8") for change in changes]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("ab") as handle:
+                handle.write(b"".join(lines))
+            if self._inode is None:
+                self._inode = self.path.stat().st_ino
+            for change, line in zip(changes, lines):
+                self._apply(change)
+                self._offset += len(line)
+            return self._version
+
+    def sync_file(self, data_path: Path | str) -> int:
+        """Sync with the site file ``data_path`` if it changed since the last call."""
+        path = _resolve_path(data_path)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return self.version
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            self._catch_up()
+            if signature == self._source_signature:
+                return self.version
+            records = load_json_file(str(path))
+            version = self.sync(records if isinstance(records, list) else [])
+            self._source_signature = signature
+            return version
+
+    def changes_since(self, version: int) -> tuple[int, list[SiteRecord], list[str]]:
+        """Return ``(current_version, upserted_records, deleted_keys)`` after ``version``.
+
+        Only the last state of each site is returned, however many times it
+        changed in between.
+        """
+        with self._lock:
+            self._catch_up()
+            upserts: list[SiteRecord] = []
+            deleted: list[str] = []
+            for key in reversed(self._latest):
+                changed_at, record = self._latest[key]
+                if changed_at <= version:
+                    break
+                if record is None:
+                    deleted.append(key)
+                else:
+                    upserts.append(record)
+            upserts.reverse()
+            deleted.reverse()
+            return self._version, upserts, deleted
+
+    @property
+    def version(self) -> int:
+        """Version of the last recorded change (0 when the log is empty)."""
+        with self._lock:
+            self._catch_up()
+            return self._version
+
+
+_LOGS: dict[Path, SiteChangeLog] = {}
+_LOGS_LOCK = threading.Lock()
+
+
+def get_site_change_log(data_path: Path | str) -> SiteChangeLog:
+    """Return the shared change log of the site file ``data_path``."""
+    key = changes_path_for(data_path)
+    with _LOGS_LOCK:
+        log = _LOGS.get(key)
+        if log is None:
+            log = _LOGS[key] = SiteChangeLog(key)
+        return log
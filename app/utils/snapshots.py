@@ -0,0 +1,285 @@
+"""Incremental, content-addressed snapshots of app/data."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterable
+
+from flask import current_app, has_request_context, session
+
+from app.utils.file_lock import data_write, file_lock
+from app.utils.site_changes import is_change_log
+
+Manifest = dict[str, Any]
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_SNAPSHOT_KEEP = 200
+_SNAPSHOT_ID = re.compile(r"^[0-9]{8}T[0-9]{9}Z$")
+
+
+def _is_tracked(relative: str) -> bool:
+    """Lock sidecars, in-flight temporary files and change logs are not snapshotted."""
+    name = relative.rsplit("/", 1)[-1]
+    return not (name.endswith(".lock") or (name.startswith(".") and name.endswith(".tmp")) or is_change_log(name))
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SnapshotStore:
+    """Snapshots of ``data_dir`` stored under ``root``.
+
+    File contents live once in ``objects/<sha256[:2]>/<sha256>``; each
+    snapshot is a manifest ``manifests/<id>.json`` mapping relative paths to
+    their hash, size and mtime. Files whose size and mtime match the previous
+    manifest are not read again, so a snapshot where nothing changed costs a
+    directory walk and writes nothing.
+    """
+
+    def __init__(self, data_dir: str | Path, root: str | Path, keep: int = DEFAULT_SNAPSHOT_KEEP) -> None:
+        self.data_dir = Path(data_dir)
+        self.root = Path(root)
+        self.keep = keep
+        self._lock = threading.RLock()
+
+    @property
+    def _objects(self) -> Path:
+        return self.root / "objects"
+
+    @property
+    def _manifests(self) -> Path:
+        return self.root / "manifests"
+
+    def _object_path(self, digest: str) -> Path:
+        return self._objects / digest[:2] / digest
+
+    def _manifest_path(self, snapshot_id: str) -> Path:
+        if not _SNAPSHOT_ID.match(snapshot_id):
+            raise KeyError(snapshot_id)
+        return self._manifests / f"{snapshot_id}.json"
+
+    def _walk(self) -> dict[str, os.stat_result]:
+        if not self.data_dir.is_dir():
+            return {}
+        files = {}
+        for path in self.data_dir.rglob("*"):
+            relative = path.relative_to(self.data_dir).as_posix()
+            if path.is_file() and _is_tracked(relative):
+                files[relative] = path.stat()
+        return files
+
+    def _scan(self, previous: Manifest | None) -> dict[str, dict[str, Any]]:
+        """Return the current entries, hashing only files changed since ``previous``."""
+        known = (previous or {}).get("files", {})
+        entries = {}
+        for relative, stat in sorted(self._walk().items()):
+            entry = known.get(relative)
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                entries[relative] = entry
+                continue
+            try:
+                digest = _hash_file(self.data_dir / relative)
+            except FileNotFoundError:
+                continue
+            entries[relative] = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        return entries
+
+    def _store_object(self, source: Path, digest: str) -> str:
+        """Copy ``source`` into the object store unless ``digest`` is already there.
+
+        Returns the digest of what was actually copied, which differs from
+        ``digest`` when the file was replaced since it was hashed.
+        """
+        if self._object_path(digest).exists():
+            return digest
+        self._objects.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._objects / f".{os.getpid()}.{threading.get_ident()}.tmp"
+        copied = hashlib.sha256()
+        with source.open("rb") as src, tmp_path.open("wb") as dest:
+            while chunk := src.read(CHUNK_SIZE):
+                copied.update(chunk)
+                dest.write(chunk)
+        target = self._object_path(copied.hexdigest())
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, target)
+        return copied.hexdigest()
+
+    def list(self) -> list[Manifest]:
+        """Return every manifest, most recent first."""
+        if not self._manifests.is_dir():
+            return []
+        manifests = []
+        for path in sorted(self._manifests.glob("*.json"), reverse=True):
+            try:
+                manifests.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue
+        return manifests
+
+    def get(self, snapshot_id: str) -> Manifest:
+        """Return the manifest of ``snapshot_id``; ``KeyError`` when unknown."""
+        try:
+            return json.loads(self._manifest_path(snapshot_id).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise KeyError(snapshot_id) from None
+
+    def latest(self) -> Manifest | None:
+        manifests = sorted(self._manifests.glob("*.json"), reverse=True) if self._manifests.is_dir() else []
+        return self.get(manifests[0].stem) if manifests else None
+
+    def create(self, reason: str, user: str | None = None, protect: Iterable[str] = ()) -> Manifest:
+        """Snapshot the data directory; returns the latest manifest when nothing changed.
+
+        Manifests listed in ``protect`` survive the pruning that follows.
+        """
+        with self._lock, file_lock(self.root / "snapshots"):
+            previous = self.latest()
+            entries = self._scan(previous)
+            if previous is not None and _digests(previous["files"]) == _digests(entries):
+                return previous
+            for relative, entry in list(entries.items()):
+                try:
+                    entry["sha256"] = self._store_object(self.data_dir / relative, entry["sha256"])
+                except FileNotFoundError:
+                    del entries[relative]
+
+            now = datetime.now(timezone.utc)
+            stamp = now
+            snapshot_id = _format_id(stamp)
+            # Ids sort chronologically; never reuse or go before the previous one.
+            while previous is not None and snapshot_id <= previous["id"]:
+                stamp += timedelta(milliseconds=1)
+                snapshot_id = _format_id(stamp)
+            manifest = {
+                "id": snapshot_id,
+                "created_at": now.isoformat(timespec="seconds"),
+                "reason": reason,
+                "user": user,
+                "file_count": len(entries),
+                "total_size": sum(entry["size"] for entry in entries.values()),
+                "files": entries,
+            }
+            self._manifests.mkdir(parents=True, exist_ok=True)
+            path = self._manifest_path(snapshot_id)
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+            os.replace(tmp_path, path)
+            self._prune(set(protect))
+            return manifest
+
+    def diff(self, snapshot_id: str, against: str | None = None) -> dict[str, list[str]]:
+        """Compare ``snapshot_id`` with ``against`` (another snapshot, or the current files).
+
+        ``added`` lists the paths present in ``against`` only, ``removed`` the
+        paths present in ``snapshot_id`` only.
+        """
+        base = _digests(self.get(snapshot_id)["files"])
+        if against is None:
+            with self._lock:
+                other = _digests(self._scan(self.latest()))
+        else:
+            other = _digests(self.get(against)["files"])
+        return {
+            "added": sorted(set(other) - set(base)),
+            "removed": sorted(set(base) - set(other)),
+            "modified": sorted(path for path in set(base) & set(other) if base[path] != other[path]),
+        }
+
+    def restore(self, snapshot_id: str, paths: Iterable[str] | None = None,
+                user: str | None = None) -> list[str]:
+        """Bring the data directory (or only ``paths``) back to ``snapshot_id``.
+
+        The current state is snapshotted first, so a restore can be undone.
+        Returns the relative paths written or deleted.
+        """
+        manifest = self.get(snapshot_id)
+        # Restoring the oldest snapshot of a full store must not prune it away.
+        self.create(f"avant restauration de {snapshot_id}", user, protect={snapshot_id})
+        wanted = set(paths) if paths is not None else None
+        changes = self.diff(snapshot_id)
+        touched: list[str] = []
+        with self._lock, file_lock(self.root / "snapshots"), data_write(self.data_dir):
+            for relative in changes["removed"] + changes["modified"]:
+                if wanted is not None and relative not in wanted:
+                    continue
+                target = self.data_dir / relative
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+                with self._object_path(manifest["files"][relative]["sha256"]).open("rb") as src, \
+                        tmp_path.open("wb") as dest:
+                    while chunk := src.read(CHUNK_SIZE):
+                        dest.write(chunk)
+                os.replace(tmp_path, target)
+                touched.append(relative)
+            for relative in changes["added"]:
+                if wanted is not None and relative not in wanted:
+                    continue
+                (self.data_dir / relative).unlink(missing_ok=True)
+                touched.append(relative)
+        return sorted(touched)
+
+    def _prune(self, protected: set[str] = frozenset()) -> None:
+        manifests = sorted(self._manifests.glob("*.json"), reverse=True)
+        expired = [path for path in manifests[self.keep:] if path.stem not in protected]
+        if not expired:
+            return
+        for path in expired:
+            path.unlink(missing_ok=True)
+        referenced = {
+            entry["sha256"] for manifest in self.list() for entry in manifest.get("files", {}).values()
+        }
+        for path in self._objects.glob("*/*"):
+            if path.name not in referenced and not path.name.startswith("."):
+                path.unlink(missing_ok=True)
+
+
+def _digests(entries: dict[str, dict[str, Any]]) -> dict[str, str]:
+    return {relative: entry["sha256"] for relative, entry in entries.items()}
+
+
+def _format_id(stamp: datetime) -> str:
+    return stamp.strftime("%Y%m%dT%H%M%S%f")[:-3] + "Z"
+
+
+_STORES: dict[tuple[Path, Path], SnapshotStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_snapshot_store() -> SnapshotStore:
+    """Return the shared store of the current app (``SNAPSHOT_DIR``, ``SNAPSHOT_KEEP``).
+
+    ``SNAPSHOT_DATA_DIR`` replaces app/data as the snapshotted directory, for
+    tools serving the app on another dataset.
+    """
+    data_dir = Path(current_app.config.get("SNAPSHOT_DATA_DIR") or Path(current_app.root_path) / "data")
+    root = Path(current_app.config.get("SNAPSHOT_DIR") or Path(current_app.instance_path) / "snapshots")
+    key = (data_dir.resolve(), root.resolve())
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = _STORES[key] = SnapshotStore(data_dir, root)
+        store.keep = int(current_app.config.get("SNAPSHOT_KEEP") or DEFAULT_SNAPSHOT_KEEP)
+        return store
+
+
+def snapshot_before(reason: str) -> Manifest | None:
+    """Snapshot app/data before a destructive write; failures are logged, not raised."""
+    if not current_app.config.get("SNAPSHOTS_ENABLED", True):
+        return None
+    user = (session.get("user") or {}).get("login") if has_request_context() else None
+    try:
+        return get_snapshot_store().create(reason, user)
+    except Exception as exc:  # pragma: no cover - defensive logging
+        current_app.logger.warning("Snapshot before %s failed: %s", reason, exc)
+        return None
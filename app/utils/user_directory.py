@@ -0,0 +1,139 @@
+"""Cached access to users.json, indexed by login and by id."""
+
+from __future__ import annotations
+
+import copy
+import threading
+from pathlib import Path
+from typing import Any
+
+from app.utils.file_lock import file_lock
+from app.utils.utils_json import _resolve_path, load_json_file, save_json_file
+
+User = dict[str, Any]
+
+_UNLOADED = object()
+
+
+class UserDirectory:
+    """Keep the user accounts in memory with O(1) lookups by ``Login`` and ``id``.
+
+    The file signature (mtime and size) is checked on each access, so an edit
+    made by another process or by hand invalidates the cache. Lookups return
+    copies: callers may modify them freely and write the result back through
+    ``save``.
+    """
+
+    def __init__(self, filepath: str) -> None:
+        self.filepath = filepath
+        self._path = _resolve_path(filepath)
+        self._lock = threading.RLock()
+        self._signature: object = _UNLOADED
+        self._users: list[User] = []
+        self._by_login: dict[str, User] = {}
+        self._by_id: dict[str, User] = {}
+
+    def _file_signature(self) -> tuple[int, int] | None:
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self) -> None:
+        """Reload the file when its signature changed since the last access.
+
+        A missing file raises ``FileNotFoundError``, as ``load_json_file`` does.
+        """
+        signature = self._file_signature()
+        if signature is None:
+            raise FileNotFoundError(self._path)
+        if signature == self._signature:
+            return
+        data = load_json_file(self.filepath)
+        self._rebuild(data if isinstance(data, list) else [])
+        self._signature = signature
+
+    def _rebuild(self, users: list[User]) -> None:
+        self._users = [user for user in users if isinstance(user, dict)]
+        self._by_login = {}
+        self._by_id = {}
+        for user in self._users:
+            if user.get("Login") is not None:
+                self._by_login.setdefault(str(user["Login"]), user)
+            if user.get("id"):
+                self._by_id.setdefault(str(user["id"]), user)
+
+    def signature(self) -> tuple[int, int] | None:
+        """Signature of the file the cache currently reflects."""
+        with self._lock:
+            self._refresh()
+            return self._signature  # type: ignore[return-value]
+
+    def version(self) -> str:
+        """Short stamp of the current file content, changing with every write."""
+        signature = self.signature()
+        return "%x.%x" % signature  # type: ignore[str-format]
+
+    def all(self) -> list[User]:
+        """Return a copy of every user, in file order."""
+        with self._lock:
+            self._refresh()
+            return copy.deepcopy(self._users)
+
+    def by_login(self, login: str) -> User | None:
+        """Return a copy of the user whose ``Login`` is ``login``."""
+        with self._lock:
+            self._refresh()
+            user = self._by_login.get(str(login))
+            return copy.deepcopy(user) if user is not None else None
+
+    def by_id(self, user_id: str) -> User | None:
+        """Return a copy of the user whose ``id`` is ``user_id``."""
+        with self._lock:
+            self._refresh()
+            user = self._by_id.get(str(user_id))
+            return copy.deepcopy(user) if user is not None else None
+
+    def save(self, users: list[User]) -> None:
+        """Write ``users`` to the file and index them without a reload."""
+        with self._lock, file_lock(self._path):
+            self._write(users)
+
+    def update(self, login: str, changes: User) -> User | None:
+        """Apply ``changes`` to the user ``login`` and save, reading the file under the lock.
+
+        Unlike ``all()`` followed by ``save()``, no write made in between by
+        another request or process can be lost. Returns a copy of the updated
+        user, ``None`` when there is no such login.
+        """
+        with self._lock, file_lock(self._path):
+            self._signature = _UNLOADED
+            self._refresh()
+            users = copy.deepcopy(self._users)
+            record = next((user for user in users if str(user.get("Login")) == str(login)), None)
+            if record is None:
+                return None
+            record.update(changes)
+            self._write(users)
+            return copy.deepcopy(record)
+
+    def _write(self, users: list[User]) -> None:
+        """Write ``users`` and index them; the caller holds the file lock."""
+        save_json_file(self.filepath, users)
+        self._rebuild(copy.deepcopy(users))
+        self._signature = self._file_signature()
+
+
+_DIRECTORIES: dict[Path, UserDirectory] = {}
+_DIRECTORIES_LOCK = threading.Lock()
+
+
+def get_user_directory(filepath: str) -> UserDirectory:
+    """Return the shared directory instance for ``filepath``."""
+    key = _resolve_path(filepath)
+    with _DIRECTORIES_LOCK:
+        directory = _DIRECTORIES.get(key)
+        if directory is None:
+            directory = _DIRECTORIES[key] = UserDirectory(filepath)
+        return directory
@@ -3,12 +3,32 @@
 from __future__ import annotations
 
 import json
+import logging
+import os
+import threading
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable
+
+from app.utils.file_lock import data_write
 
 # Base directory of the project (repository root).
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
+logger = logging.getLogger(__name__)
+
+# Callbacks notified with ("load" | "save", path) on every file access.
+_IO_OBSERVERS: list[Callable[[str, Path], None]] = []
+
+
+def add_io_observer(callback: Callable[[str, Path], None]) -> None:
+    """Register ``callback`` to be told about each JSON file load and save."""
+    _IO_OBSERVERS.append(callback)
+
+
+def _notify_io(operation: str, path: Path) -> None:
+    for callback in _IO_OBSERVERS:
+        callback(operation, path)
+
 
 def _resolve_path(filepath: str | Path) -> Path:
     """Return an absolute path, resolving relative paths against the app root."""
@@ -53,34 +73,48 @@ def add_record(base: list[dict[str, Any]], new_record: dict[str, Any]) -> list[d
 def load_json_file(filepath: str) -> Any:
     """Read a JSON file and return its content."""
     path = _resolve_path(filepath)
+    if _IO_OBSERVERS:
+        _notify_io("load", path)
     try:
         with path.open("r", encoding="utf-8") as file:
             data = json.load(file)
-        print(f"File loaded successfully: {path}")
+        logger.debug("File loaded successfully: %s", path)
         return data
     except FileNotFoundError:
-        print(f"Error: file not found -> {path}")
+        logger.warning("File not found: %s", path)
         raise
     except json.JSONDecodeError as exc:
-        print(f"JSON format error for {path}: {exc}")
+        logger.error("JSON format error for %s: %s", path, exc)
         raise
     except Exception as exc:  # pragma: no cover - defensive logging
-        print(f"Unexpected error while reading {path}: {exc}")
+        logger.exception("Unexpected error while reading %s: %s", path, exc)
         raise
 
 
 def save_json_file(filepath: str, data: Any) -> None:
-    """Persist JSON data to the specified filepath."""
+    """Persist JSON data to the specified filepath.
+
+    The content is written to a temporary file next to the target and moved
+    over it, so concurrent readers see either the old or the new document,
+    never a partial one.
+    """
     path = _resolve_path(filepath)
+    if _IO_OBSERVERS:
+        _notify_io("save", path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
     try:
-        with path.open("w", encoding="utf-8") as file:
-            json.dump(data, file, indent=4, ensure_ascii=False)
-        print(f"File saved successfully: {path}")
+        with data_write(path):
+            with tmp_path.open("w", encoding="utf-8") as file:
+                json.dump(data, file, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        logger.debug("File saved successfully: %s", path)
     except OSError as exc:
-        print(f"Error while saving {path}: {exc}")
+        tmp_path.unlink(missing_ok=True)
+        logger.error("Error while saving %s: %s", path, exc)
         raise
     except Exception as exc:  # pragma: no cover - defensive logging
-        print(f"Unexpected error while saving {path}: {exc}")
+        tmp_path.unlink(missing_ok=True)
+        logger.exception("Unexpected error while saving %s: %s", path, exc)
         raise
 
 
@@ -89,7 +123,7 @@ def update_record(base: list[dict[str, Any]], index: int, updates: dict[str, Any
     for record in base:
         if record.get("INDEX") == index:
             record.update(updates)
-            print(f"Record with index {index} updated.")
+            logger.debug("Record with index %s updated.", index)
             return base
     raise ValueError(f"No record found with index {index}.")
 
@@ -99,7 +133,7 @@ def sort_records(base: Iterable[dict[str, Any]], field: str, reverse: bool = Fal
     try:
         return sorted(base, key=lambda value: value.get(field, ""), reverse=reverse)
     except Exception as exc:
-        print(f"Error while sorting by field {field}: {exc}")
+        logger.warning("Error while sorting by field %s: %s", field, exc)
         raise
 
 
@@ -0,0 +1,85 @@
+"""ZIP archives produced chunk by chunk, for streamed downloads."""
+
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator
+
+CHUNK_SIZE = 64 * 1024
+# Formats that are already compressed: deflating them again costs CPU for nothing.
+STORED_SUFFIXES = frozenset({
+    ".7z", ".docx", ".gif", ".gz", ".jpeg", ".jpg", ".mp4", ".odt", ".ods", ".pdf",
+    ".png", ".pptx", ".webp", ".xlsx", ".zip",
+})
+ZIP64_THRESHOLD = 2 ** 31 - 1
+
+
+class _ChunkSink:
+    """Write-only file object buffering what ``ZipFile`` writes until drained."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def compression_for(path: Path) -> int:
+    """Return ``ZIP_STORED`` for already-compressed formats, ``ZIP_DEFLATED`` otherwise."""
+    return zipfile.ZIP_STORED if path.suffix.lower() in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+
+
+def is_internal(relative: Path) -> bool:
+    """True for lock sidecars and hidden files or folders (upload index, temporary files)."""
+    return relative.name.endswith(".lock") or any(part.startswith(".") for part in relative.parts)
+
+
+def iter_tree(directory: Path, prefix: str) -> Iterator[tuple[Path, str]]:
+    """Yield ``(path, arcname)`` for every data file under ``directory``, in a stable order."""
+    if not directory.is_dir():
+        return
+    for path in sorted(directory.rglob("*")):
+        relative = path.relative_to(directory)
+        if path.is_file() and not is_internal(relative):
+            yield path, f"{prefix}/{relative.as_posix()}"
+
+
+def iter_zip(entries: Iterable[tuple[Path, str]], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a ZIP archive of ``entries`` while it is being written.
+
+    Files are read ``chunk_size`` bytes at a time, so memory does not depend
+    on the archive size. Files that vanish while the archive is built are
+    skipped.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for path, arcname in entries:
+            try:
+                info = zipfile.ZipInfo.from_file(path, arcname)
+                source = path.open("rb")
+            except FileNotFoundError:
+                continue
+            info.compress_type = compression_for(path)
+            with source, archive.open(info, "w", force_zip64=info.file_size > ZIP64_THRESHOLD) as dest:
+                while chunk := source.read(chunk_size):
+                    dest.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    data = sink.drain()
+    if data:
+        yield data
@@ -0,0 +1,179 @@
+"""Synthetic datasets scaled from the sizes of the bundled data files."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import shutil
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+APP_DATA = REPO_ROOT / "app" / "data"
+
+# Record counts of the bundled files, used as the 1x reference.
+BASE_COUNTS = {"sites": 572, "users": 11, "notifications": 10, "comments": 38}
+
+# Static inputs of generate_map that do not grow with the number of sites.
+STATIC_SITE_FILES = ("co.geojson", "commune_asst_collectif.json", "type_site.json", "communes.json")
+
+BENCH_PASSWORD = "benchmark-password"
+
+
+def _write_json_list(path: Path, records: Iterable[dict[str, Any]]) -> int:
+    """Stream ``records`` to ``path`` as a JSON array, without holding them in memory."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with path.open("w", encoding="utf-8") as handle:
+        handle.write("[\n")
+        for record in records:
+            if count:
+                handle.write(",\n")
+            handle.write(json.dumps(record, ensure_ascii=False))
+            count += 1
+        handle.write("\n]\n")
+    return count
+
+
+def _sites(count: int, rng: random.Random) -> Iterator[dict[str, Any]]:
+    templates = json.loads((APP_DATA / "sites" / "recap.json").read_text(encoding="utf-8"))
+    for index in range(count):
+        template = templates[index % len(templates)]
+        copy_number = index // len(templates)
+        record = dict(template)
+        record["INDEX"] = str(index + 1)
+        if copy_number:
+            record["NOM"] = f"{template.get('NOM', 'Site')} #{copy_number}"
+        lat = float(template.get("LAT") or 45.15) + rng.uniform(-0.05, 0.05)
+        lon = float(template.get("LONG") or 1.5) + rng.uniform(-0.05, 0.05)
+        record["LAT"] = f"{lat:.6f}"
+        record["LONG"] = f"{lon:.6f}"
+        yield record
+
+
+def _users(count: int, rng: random.Random, pwhash: str) -> list[dict[str, Any]]:
+    return [
+        {
+            "Nom": f"Nom{index}",
+            "Prenom": f"Prenom{index}",
+            "Login": f"user{index}",
+            "Mot de passe": pwhash,
+            "Niveau acces": rng.randint(1, 5),
+            "Notification": rng.random() < 0.7,
+            "Email": f"user{index}@example.invalid",
+            "Date_connec": None,
+            "Contrat": [],
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        }
+        for index in range(count)
+    ]
+
+
+def _notifications(count: int, rng: random.Random, user_ids: list[str]) -> Iterator[dict[str, Any]]:
+    start = datetime(2025, 1, 1)
+    for index in range(count):
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "recipient_id": rng.choice(user_ids),
+            "sender_id": rng.choice(user_ids),
+            "message": f"Notification de test {index}",
+            "url": "",
+            "is_read": rng.random() < 0.6,
+            "created_at": (start + timedelta(minutes=index)).isoformat(),
+        }
+
+
+def _comments(count: int, rng: random.Random, site_count: int) -> Iterator[dict[str, Any]]:
+    start = datetime(2023, 1, 1)
+    from app.utils.intervention_log import DATE_FORMAT
+
+    for index in range(count):
+        yield {
+            "id": index + 1,
+            "date": (start + timedelta(hours=index)).strftime(DATE_FORMAT),
+            "emplacement": rng.randint(1, max(site_count, 1)),
+            "utilisateur": f"Prenom{index % 50} Nom{index % 50}",
+            "commentaire": f"Intervention de test {index}",
+            "site": "",
+        }
+
+
+def generate_datasets(target: Path, scale: int, seed: int = 42) -> dict[str, Any]:
+    """Write a scaled copy of the application data under ``target``.
+
+    ``target`` mirrors the layout of ``app/`` (``target/data/sites/recap.json``
+    and so on), so it can stand in for the application directory. Returns the
+    paths and record counts of the generated files.
+    """
+    from app.utils.passwords import hash_password
+
+    rng = random.Random(seed)
+    data = target / "data"
+    counts = {name: base * scale for name, base in BASE_COUNTS.items()}
+
+    sites_dir = data / "sites"
+    sites_dir.mkdir(parents=True, exist_ok=True)
+    for name in STATIC_SITE_FILES:
+        source = APP_DATA / "sites" / name
+        if source.exists():
+            shutil.copy2(source, sites_dir / name)
+    icons = data / "icones"
+    if not icons.exists():
+        shutil.copytree(APP_DATA / "icones", icons)
+
+    # One hash shared by every account: hashing thousands of passwords would
+    # dominate the generation time.
+    pwhash = hash_password(BENCH_PASSWORD)
+    users = _users(counts["users"], rng, pwhash)
+    user_ids = [user["id"] for user in users]
+
+    paths = {
+        "sites": sites_dir / "recap.json",
+        "users": data / "users" / "users.json",
+        "rights": data / "users" / "droits.json",
+        "notifications": data / "notif" / "notifications.json",
+        "comments": data / "maintenance" / "commentaire.json",
+    }
+    _write_json_list(paths["sites"], _sites(counts["sites"], rng))
+    _write_json_list(paths["users"], users)
+    paths["rights"].write_text((APP_DATA / "users" / "droits.json").read_text(encoding="utf-8"), encoding="utf-8")
+    _write_json_list(paths["notifications"], _notifications(counts["notifications"], rng, user_ids))
+    _write_json_list(paths["comments"], _comments(counts["comments"], rng, counts["sites"]))
+
+    return {
+        "root": target,
+        "scale": scale,
+        "counts": counts,
+        "paths": paths,
+        "admin": users[0],
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Génère un jeu de données synthétique (recap, users, notifications, commentaires) à l'échelle voulue."
+    )
+    p.add_argument("output", help="Dossier de sortie (structure identique à app/)")
+    p.add_argument("--scale", type=int, default=10, help="Facteur appliqué aux volumes actuels (défaut: 10)")
+    p.add_argument("--seed", type=int, default=42, help="Graine du générateur aléatoire (défaut: 42)")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    dataset = generate_datasets(Path(args.output), args.scale, args.seed)
+    for name, count in dataset["counts"].items():
+        print(f"{name:<14} {count:>9}")
+    print(f"Mot de passe de tous les comptes: {BENCH_PASSWORD}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
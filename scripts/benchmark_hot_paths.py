@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_SCALES = "10,100"
+DEFAULT_RESULTS_DIR = REPO_ROOT / "bench_results"
+# Median slowdown above which a benchmark is reported as a regression.
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+# Near the first site of the generated data, so searches return results.
+SEARCH_POSITION = {"latitude": "45.247", "longitude": "1.462"}
+
+
+def _add_repo_to_syspath() -> None:
+    # Ensure we can import from the local 'app' package when running directly
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description=(
+            "Chronomètre les chemins critiques de l'application sur des jeux de données synthétiques "
+            "(10x, 100x, 1000x les volumes actuels) et enregistre les résultats en JSON."
+        )
+    )
+    p.add_argument(
+        "--scales",
+        default=DEFAULT_SCALES,
+        help=f"Facteurs d'échelle séparés par des virgules (défaut: {DEFAULT_SCALES}, 1000 possible)",
+    )
+    p.add_argument(
+        "--only",
+        default="",
+        help="Benchmarks à lancer, séparés par des virgules (défaut: tous)",
+    )
+    p.add_argument("--rounds", type=int, default=5, help="Mesures par benchmark (défaut: 5)")
+    p.add_argument(
+        "--budget",
+        type=float,
+        default=60.0,
+        help=(
+            "Temps maximal en secondes par benchmark, échauffement compris ; un benchmark qui le dépasse "
+            "n'est pas relancé aux échelles supérieures (défaut: 60)"
+        ),
+    )
+    p.add_argument("--output", default=None, help="Fichier JSON de résultats (défaut: bench_results/<commit>-<date>.json)")
+    p.add_argument("--compare", default=None, help="Fichier JSON d'un run précédent à comparer")
+    p.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help="Ralentissement relatif de la médiane signalé comme régression (défaut: 0.10)",
+    )
+    p.add_argument("--list", action="store_true", help="Liste les benchmarks disponibles et quitte")
+    return p.parse_args()
+
+
+class Bench:
+    """Application and client pointed at one generated dataset."""
+
+    def __init__(self, dataset: dict[str, Any]) -> None:
+        from app import create_app
+
+        self.dataset = dataset
+        self.root: Path = dataset["root"]
+        self.paths: dict[str, Path] = dataset["paths"]
+        _point_modules_at(dataset)
+
+        self.app = create_app()
+        self.app.config.update(
+            TESTING=True,
+            SECRET_KEY="benchmark",
+            NOTIFICATION_STORE=str(self.paths["notifications"]),
+            # Saves snapshot the generated data, never app/data.
+            SNAPSHOT_DIR=str(self.root / "snapshots"),
+            SNAPSHOT_DATA_DIR=str(self.root / "data"),
+        )
+        admin = dataset["admin"]
+        self.session_user = {
+            "login": admin["Login"],
+            "uuid": admin["id"],
+            "access_level": 5,
+            "nom": admin["Nom"],
+            "prenom": admin["Prenom"],
+        }
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess["user"] = dict(self.session_user)
+
+    def get(self, url: str, **kwargs: Any) -> bytes:
+        response = self.client.get(url, **kwargs)
+        _check(response, url)
+        return response.get_data()
+
+    def post(self, url: str, **kwargs: Any) -> bytes:
+        response = self.client.post(url, **kwargs)
+        _check(response, url)
+        return response.get_data()
+
+
+def _check(response: Any, url: str) -> None:
+    if response.status_code >= 300:
+        raise RuntimeError(f"{url} a répondu {response.status_code}")
+
+
+def _point_modules_at(dataset: dict[str, Any]) -> None:
+    """Redirect the data file constants and the write gate of the application to ``dataset``.
+
+    The snapshot store is redirected through the app config, in ``Bench``.
+    """
+    from app.blueprints.auth import auth as auth_view
+    from app.blueprints.carto_modif import edit_sites
+    from app.blueprints.gestion_user import users
+    from app.blueprints.notif import notif
+    import app.blueprints.pr_maint as pr_maint
+    from app.utils import auth, geocarto_lib
+    from app.utils.file_lock import register_write_gate
+
+    root: Path = dataset["root"]
+    paths: dict[str, Path] = dataset["paths"]
+    edit_sites.DATA_FILE = str(paths["sites"])
+    pr_maint.RECUP_FILE = paths["sites"]
+    pr_maint.COMMENT_FILE = paths["comments"]
+    auth.USER_FILE = str(paths["users"])
+    auth_view.USER_FILE_PATH = str(paths["users"])
+    users.USER_FILE = str(paths["users"])
+    users._data_dir = lambda: root / "data"
+    notif.USER_FILE = str(paths["users"])
+    notif.NOTIFICATION_FILE = str(paths["notifications"])
+    geocarto_lib.BASE_DIR = root
+    register_write_gate(root / "data")
+
+
+def _bench_generate_map(bench: Bench) -> Callable[[], object]:
+    from app.utils.geocarto_lib import generate_map
+
+    output = bench.root / "carte.html"
+    return lambda: generate_map(output)
+
+
+def _bench_search_post(bench: Bench) -> Callable[[], object]:
+    return lambda: bench.get("/maintenance/recherche", query_string=SEARCH_POSITION)
+
+
+def _bench_list_records(bench: Bench) -> Callable[[], object]:
+    return lambda: bench.get("/edit-sites/")
+
+
+def _bench_inject_template_globals(bench: Bench) -> Callable[[], object]:
+    from flask import session
+
+    processor = next(
+        func
+        for func in bench.app.template_context_processors[None]
+        if func.__name__ == "inject_template_globals"
+    )
+
+    def run() -> object:
+        with bench.app.test_request_context("/"):
+            session["user"] = dict(bench.session_user)
+            return processor()
+
+    return run
+
+
+def _bench_verify_user(bench: Bench) -> Callable[[], object]:
+    from bench_datasets import BENCH_PASSWORD
+
+    from app.utils.auth import verify_user
+
+    # The last account, so lookups cannot rely on file order.
+    login = f"user{bench.dataset['counts']['users'] - 1}"
+
+    def run() -> object:
+        with bench.app.test_request_context("/"):
+            if verify_user(login, BENCH_PASSWORD) is None:
+                raise RuntimeError(f"Authentification de {login} refusée")
+
+    return run
+
+
+def _bench_notification_create(bench: Bench) -> Callable[[], object]:
+    payload = {"recipient_id": bench.session_user["uuid"], "message": "benchmark", "url": ""}
+    return lambda: bench.post("/notif/notify", json=payload)
+
+
+def _bench_notification_read(bench: Bench) -> Callable[[], object]:
+    return lambda: bench.get("/notif/poll", query_string={"timeout": "0"})
+
+
+def _bench_download_backup(bench: Bench) -> Callable[[], object]:
+    return lambda: bench.get("/users/backup/download")
+
+
+BENCHMARKS: dict[str, Callable[[Bench], Callable[[], object]]] = {
+    "generate_map": _bench_generate_map,
+    "search_post": _bench_search_post,
+    "list_records": _bench_list_records,
+    "inject_template_globals": _bench_inject_template_globals,
+    "verify_user": _bench_verify_user,
+    "notification_create": _bench_notification_create,
+    "notification_read": _bench_notification_read,
+    "download_backup": _bench_download_backup,
+}
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(func: Callable[[], object], rounds: int, budget: float) -> dict[str, Any]:
+    """Time ``func`` after one warm-up call; timings are in milliseconds.
+
+    The warm-up counts against ``budget`` and a round only starts when the
+    previous call fits in the time left. When no round fits, the warm-up is
+    the only measure (``cold``).
+    """
+    started = time.perf_counter()
+    func()
+    last = time.perf_counter() - started
+    deadline = started + budget
+    timings: list[float] = []
+    for _ in range(max(rounds, 1)):
+        start = time.perf_counter()
+        if start + last > deadline:
+            break
+        func()
+        last = time.perf_counter() - start
+        timings.append(last * 1000)
+    cold = not timings
+    if cold:
+        timings.append(last * 1000)
+    ordered = sorted(timings)
+    return {
+        "rounds": len(timings),
+        "cold": cold,
+        "over_budget": time.perf_counter() - started > budget,
+        "min_ms": ordered[0],
+        "median_ms": statistics.median(ordered),
+        "mean_ms": statistics.fmean(ordered),
+        "p95_ms": _percentile(ordered, 0.95),
+        "max_ms": ordered[-1],
+        "stdev_ms": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+    }
+
+
+def _git_revision() -> dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "app"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def run(scales: list[int], names: list[str], rounds: int, budget: float) -> dict[str, Any]:
+    from bench_datasets import generate_datasets
+
+    results: list[dict[str, Any]] = []
+    # Benchmark -> scale at which one call already exceeded the budget.
+    over_budget: dict[str, int] = {}
+    with tempfile.TemporaryDirectory(prefix="karto-bench-") as workdir:
+        for scale in sorted(scales):
+            print(f"\n== Échelle x{scale} ==")
+            dataset = generate_datasets(Path(workdir) / f"x{scale}", scale)
+            bench = Bench(dataset)
+            for name in names:
+                if name in over_budget:
+                    print(f"{name:<26} ignoré: budget dépassé dès x{over_budget[name]}")
+                    results.append({"name": name, "scale": scale, "skipped": f"over budget at x{over_budget[name]}"})
+                    continue
+                try:
+                    stats = measure(BENCHMARKS[name](bench), rounds, budget)
+                except Exception as exc:
+                    print(f"{name:<26} ÉCHEC: {exc}")
+                    results.append({"name": name, "scale": scale, "error": str(exc)})
+                    continue
+                print(
+                    f"{name:<26} médiane {stats['median_ms']:>10.1f} ms   "
+                    f"p95 {stats['p95_ms']:>10.1f} ms   ({stats['rounds']} mesures{', à froid' if stats['cold'] else ''})"
+                )
+                results.append({"name": name, "scale": scale, "counts": dataset["counts"], "stats": stats})
+                if stats["over_budget"]:
+                    over_budget[name] = scale
+    return {
+        **_git_revision(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "rounds": rounds,
+        "benchmarks": results,
+    }
+
+
+def compare(previous: dict[str, Any], current: dict[str, Any], threshold: float) -> int:
+    """Print the median ratio of every benchmark present in both runs; return the regression count."""
+    before = {
+        (entry["name"], entry["scale"]): entry["stats"]["median_ms"]
+        for entry in previous.get("benchmarks", [])
+        if "stats" in entry
+    }
+    regressions = 0
+    print(f"\nComparaison avec {str(previous.get('commit'))[:10]} (médianes):")
+    for entry in current["benchmarks"]:
+        old = before.get((entry["name"], entry["scale"]))
+        if old is None or "stats" not in entry:
+            continue
+        new = entry["stats"]["median_ms"]
+        ratio = new / old if old else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  RÉGRESSION"
+            regressions += 1
+        print(f"{entry['name']:<26} x{entry['scale']:<5} {old:>10.1f} -> {new:>10.1f} ms  ({ratio:.2f}x){flag}")
+    return regressions
+
+
+def main() -> int:
+    _add_repo_to_syspath()
+    args = parse_args()
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    names = [name.strip() for name in args.only.split(",") if name.strip()] or list(BENCHMARKS)
+    unknown = sorted(set(names) - set(BENCHMARKS))
+    if unknown:
+        print(f"Benchmarks inconnus: {', '.join(unknown)} (voir --list)")
+        return 2
+    scales = [int(value) for value in args.scales.split(",") if value.strip()]
+
+    report = run(scales, names, args.rounds, args.budget)
+
+    output = Path(args.output) if args.output else (
+        DEFAULT_RESULTS_DIR / f"{str(report['commit'] or 'local')[:10]}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nRésultats: {output}")
+
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if compare(previous, report, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Candidates from the cheapest to the most expensive, per algorithm.
+SCRYPT_CANDIDATES = [f"scrypt:{2 ** exp}:8:1" for exp in range(14, 19)]
+PBKDF2_CANDIDATES = [f"pbkdf2:sha256:{n}" for n in (200_000, 400_000, 600_000, 1_000_000, 1_500_000)]
+
+
+def _add_repo_to_syspath() -> None:
+    # Ensure we can import from the local 'app' package when running directly
+    repo_root = Path(__file__).resolve().parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description=(
+            "Mesure le temps de vérification d'un mot de passe pour plusieurs méthodes de hachage "
+            "et propose la valeur de PASSWORD_HASH_METHOD adaptée à cette machine."
+        )
+    )
+    p.add_argument(
+        "--target-ms",
+        type=float,
+        default=250.0,
+        help="Latence de vérification visée en millisecondes (défaut: 250)",
+    )
+    p.add_argument("--runs", type=int, default=5, help="Nombre de mesures par méthode (défaut: 5)")
+    p.add_argument(
+        "--algorithm",
+        choices=("scrypt", "pbkdf2", "all"),
+        default="scrypt",
+        help="Famille de méthodes à mesurer (défaut: scrypt)",
+    )
+    return p.parse_args()
+
+
+def measure(method: str, runs: int) -> float:
+    """Median time, in milliseconds, of one ``check_password_hash`` with ``method``."""
+    from werkzeug.security import check_password_hash, generate_password_hash
+
+    pwhash = generate_password_hash("benchmark-password", method=method)
+    timings = []
+    for _ in range(max(runs, 1)):
+        start = time.perf_counter()
+        check_password_hash(pwhash, "benchmark-password")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> int:
+    _add_repo_to_syspath()
+    from app.utils.passwords import DEFAULT_PASSWORD_HASH_METHOD
+
+    args = parse_args()
+    candidates = {
+        "scrypt": SCRYPT_CANDIDATES,
+        "pbkdf2": PBKDF2_CANDIDATES,
+        "all": SCRYPT_CANDIDATES + PBKDF2_CANDIDATES,
+    }[args.algorithm]
+
+    best: tuple[str, float] | None = None
+    print(f"{'méthode':<28} {'médiane (ms)':>12}")
+    for method in candidates:
+        try:
+            elapsed = measure(method, args.runs)
+        except ValueError as exc:  # e.g. scrypt memory limit of the OpenSSL build
+            print(f"{method:<28} {'indisponible':>12} ({exc})")
+            continue
+        print(f"{method:<28} {elapsed:>12.1f}")
+        # Keep the most expensive method that still fits the latency budget.
+        if elapsed <= args.target_ms and (best is None or elapsed > best[1]):
+            best = (method, elapsed)
+
+    if best is None:
+        print(f"\nAucune méthode sous {args.target_ms:.0f} ms ; conserver {DEFAULT_PASSWORD_HASH_METHOD}.")
+        return 1
+    print(f"\nRecommandation ({best[1]:.1f} ms) :\nPASSWORD_HASH_METHOD={best[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+DEFAULT_SOURCES = (
+    "./app/data/geojson/region2020.geojson",
+    "./app/data/geojson/dept2020.geojson",
+    "./app/data/sites/co.geojson",
+)
+
+
+def _add_repo_to_syspath() -> None:
+    # Ensure we can import from the local 'app' package when running directly
+    repo_root = Path(__file__).resolve().parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description=(
+            "Produit les niveaux de détail simplifiés et quantifiés (dossier lod/ à côté de chaque source) "
+            "des contours de régions, départements et communes."
+        )
+    )
+    p.add_argument(
+        "sources",
+        nargs="*",
+        default=list(DEFAULT_SOURCES),
+        help="Fichiers GeoJSON à traiter (défaut: region2020, dept2020 et co.geojson)",
+    )
+    return p.parse_args()
+
+
+def main() -> int:
+    _add_repo_to_syspath()
+    from app.utils.geo_lod import LOD_LEVELS, write_levels
+    from app.utils.utils_json import _resolve_path
+
+    args = parse_args()
+    missing = 0
+    for source in args.sources:
+        path = _resolve_path(source)
+        if not path.exists():
+            print(f"{source}: introuvable, ignoré")
+            missing += 1
+            continue
+        size = path.stat().st_size
+        print(f"{path.name} ({size / 1024:.0f} Ko)")
+        for target, tolerance in zip(write_levels(path), (LOD_LEVELS[zoom] for zoom in sorted(LOD_LEVELS))):
+            level_size = target.stat().st_size
+            print(
+                f"  {target.name:<32} tolérance {tolerance:<7g} {level_size / 1024:>8.0f} Ko "
+                f"({level_size / size:.0%})"
+            )
+    return 1 if missing == len(args.sources) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
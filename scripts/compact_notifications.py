@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+
+def _add_repo_to_syspath() -> None:
+    # Ensure we can import from the local 'app' package when running directly
+    repo_root = Path(__file__).resolve().parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Archive les notifications lues plus anciennes que la durée de rétention."
+    )
+    p.add_argument(
+        "--store",
+        default="./app/data/notif/notifications.json",
+        help="Fichier de notifications actif (défaut: app/data/notif/notifications.json)",
+    )
+    p.add_argument("--days", type=int, default=90, help="Durée de rétention en jours (défaut: 90)")
+    p.add_argument(
+        "--archive-dir",
+        default=None,
+        help="Dossier des archives mensuelles (défaut: <dossier du store>/archive)",
+    )
+    return p.parse_args()
+
+
+def main() -> int:
+    _add_repo_to_syspath()
+    from app.utils.notification_store import NotificationStore
+
+    args = parse_args()
+    store = NotificationStore(args.store, retention_days=args.days, archive_dir=args.archive_dir)
+    moved = store.compact()
+    print(f"Notifications archivées: {moved} (dossier: {store.archive_dir})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass, field
+from http.cookiejar import CookieJar
+from pathlib import Path
+from typing import Any, Iterator
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Relative frequency of each step inside a journey (login opens every journey).
+STEP_WEIGHTS = {
+    "home": 4,
+    "site_list": 3,
+    "site_edit": 3,
+    "site_save": 1,
+    "gps_search": 4,
+    "notification_poll": 6,
+    "map_regeneration": 0.1,
+}
+STEPS = ("login", *STEP_WEIGHTS)
+# Centre of the bundled sites, searches around it return a few candidates.
+SEARCH_CENTER = (45.15, 1.50)
+
+
+def _add_repo_to_syspath() -> None:
+    # Ensure we can import from the local 'app' package when running directly
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description=(
+            "Simule des utilisateurs concurrents (connexion, accueil, liste et édition de sites, "
+            "recherche GPS, notifications, régénération de carte) et mesure débit, latences et erreurs par étape."
+        )
+    )
+    target = p.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Instance déjà démarrée, ex. http://127.0.0.1:5000")
+    target.add_argument(
+        "--serve",
+        action="store_true",
+        help=(
+            "Démarre l'application localement sur un jeu de données synthétique temporaire "
+            "(app/data et les instantanés de instance/ ne sont pas modifiés)"
+        ),
+    )
+    p.add_argument("--scale", type=int, default=1, help="Avec --serve : facteur d'échelle des données (défaut: 1)")
+    p.add_argument("--login", help="Avec --url : identifiant utilisé par les utilisateurs simulés")
+    p.add_argument("--password", help="Avec --url : mot de passe associé")
+    p.add_argument("--workers", type=int, default=8, help="Utilisateurs simulés en parallèle (défaut: 8)")
+    p.add_argument("--duration", type=float, default=30.0, help="Durée du test en secondes (défaut: 30)")
+    p.add_argument(
+        "--journey-steps",
+        type=int,
+        default=20,
+        help="Étapes par parcours avant déconnexion et nouvelle connexion (défaut: 20)",
+    )
+    p.add_argument(
+        "--max-index",
+        type=int,
+        default=500,
+        help="Avec --url : plus grand index de site édité (défaut: 500)",
+    )
+    p.add_argument("--no-map", action="store_true", help="Exclut la régénération de carte des parcours")
+    p.add_argument("--no-write", action="store_true", help="Exclut l'enregistrement de sites (lecture seule)")
+    p.add_argument("--seed", type=int, default=None, help="Graine pour rejouer le même enchaînement")
+    p.add_argument("--output", default=None, help="Écrit le rapport JSON dans ce fichier")
+    args = p.parse_args()
+    if args.url and not (args.login and args.password):
+        p.error("--url nécessite --login et --password")
+    return args
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects as responses so each step is timed on its own."""
+
+    def redirect_request(self, *args: Any, **kwargs: Any) -> None:
+        return None
+
+
+@dataclass
+class StepStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: dict[str, int] = field(default_factory=dict)
+
+
+class Recorder:
+    """Thread-safe collection of the step timings of every worker."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.steps: dict[str, StepStats] = {name: StepStats() for name in STEPS}
+
+    def add(self, step: str, elapsed: float, status: int | str, ok: bool) -> None:
+        with self._lock:
+            stats = self.steps[step]
+            stats.latencies.append(elapsed)
+            stats.statuses[str(status)] = stats.statuses.get(str(status), 0) + 1
+            if not ok:
+                stats.errors += 1
+
+    def report(self, wall_time: float) -> dict[str, Any]:
+        rows = {}
+        with self._lock:
+            for name, stats in self.steps.items():
+                if not stats.latencies:
+                    continue
+                ordered = sorted(stats.latencies)
+                rows[name] = {
+                    "requests": len(ordered),
+                    "errors": stats.errors,
+                    "error_rate": stats.errors / len(ordered),
+                    "throughput_rps": len(ordered) / wall_time,
+                    "mean_ms": statistics.fmean(ordered) * 1000,
+                    "p50_ms": _percentile(ordered, 0.50) * 1000,
+                    "p95_ms": _percentile(ordered, 0.95) * 1000,
+                    "p99_ms": _percentile(ordered, 0.99) * 1000,
+                    "max_ms": ordered[-1] * 1000,
+                    "statuses": dict(sorted(stats.statuses.items())),
+                }
+        return rows
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Worker:
+    """One simulated user, with its own cookie jar."""
+
+    def __init__(self, base_url: str, login: str, password: str, options: argparse.Namespace,
+                 recorder: Recorder, rng: random.Random) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.login_value = login
+        self.password = password
+        self.options = options
+        self.recorder = recorder
+        self.rng = rng
+        self.opener: urllib.request.OpenerDirector | None = None
+        self.weights = dict(STEP_WEIGHTS)
+        if options.no_map:
+            self.weights.pop("map_regeneration")
+        if options.no_write:
+            self.weights.pop("site_save")
+
+    def _request(self, step: str, path: str, data: dict[str, str] | None = None,
+                 expect_redirect_to: str | None = None) -> None:
+        assert self.opener is not None
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        start = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + path, data=body, timeout=120) as response:
+                response.read()
+                status: int | str = response.status
+                location = ""
+        except urllib.error.HTTPError as exc:
+            exc.read()
+            status = exc.code
+            location = exc.headers.get("Location", "")
+        except OSError as exc:
+            self.recorder.add(step, time.perf_counter() - start, type(exc).__name__, False)
+            return
+        elapsed = time.perf_counter() - start
+
+        if isinstance(status, int) and 300 <= status < 400:
+            # A redirect to the login page means the session was refused.
+            ok = "/auth/" not in location and (
+                expect_redirect_to is None or expect_redirect_to in location
+            )
+        else:
+            ok = isinstance(status, int) and status < 400 and expect_redirect_to is None
+        self.recorder.add(step, elapsed, status, ok)
+
+    def _site_index(self) -> int:
+        return self.rng.randrange(max(self.options.max_index, 1))
+
+    def _run_step(self, step: str) -> None:
+        if step == "home":
+            self._request(step, "/")
+        elif step == "site_list":
+            self._request(step, "/edit-sites/")
+        elif step == "site_edit":
+            self._request(step, f"/edit-sites/edit/{self._site_index()}")
+        elif step == "site_save":
+            # Fields missing from the form keep their value: the save rewrites
+            # recap.json without changing the record.
+            self._request(step, f"/edit-sites/edit/{self._site_index()}", data={},
+                          expect_redirect_to="/edit-sites/")
+        elif step == "gps_search":
+            lat = SEARCH_CENTER[0] + self.rng.uniform(-0.1, 0.1)
+            lon = SEARCH_CENTER[1] + self.rng.uniform(-0.1, 0.1)
+            query = urllib.parse.urlencode({"latitude": f"{lat:.5f}", "longitude": f"{lon:.5f}"})
+            self._request(step, f"/maintenance/recherche?{query}")
+        elif step == "notification_poll":
+            self._request(step, "/notif/poll?timeout=0")
+        elif step == "map_regeneration":
+            self._request(step, "/edit-sites/regenerate-map", data={}, expect_redirect_to="/edit-sites/")
+
+    def run(self, deadline: float) -> None:
+        names = list(self.weights)
+        weights = list(self.weights.values())
+        while time.monotonic() < deadline:
+            self.opener = urllib.request.build_opener(
+                urllib.request.HTTPCookieProcessor(CookieJar()), _NoRedirect()
+            )
+            self._request("login", "/auth/", data={"login": self.login_value, "password": self.password},
+                          expect_redirect_to="/")
+            for _ in range(self.options.journey_steps):
+                if time.monotonic() >= deadline:
+                    break
+                self._run_step(self.rng.choices(names, weights)[0])
+
+
+@contextlib.contextmanager
+def _preserved(path: Path) -> Iterator[None]:
+    """Restore ``path`` (or its absence) once the block exits."""
+    previous = path.read_bytes() if path.exists() else None
+    try:
+        yield
+    finally:
+        if previous is None:
+            path.unlink(missing_ok=True)
+        else:
+            path.write_bytes(previous)
+
+
+@contextlib.contextmanager
+def _local_server(scale: int) -> Iterator[tuple[str, list[dict[str, Any]], int]]:
+    """Serve the app on a generated dataset; yield (url, credentials, site count)."""
+    from bench_datasets import BENCH_PASSWORD, generate_datasets
+    from benchmark_hot_paths import Bench
+    from werkzeug.serving import make_server
+
+    # Every simulated user logs in from 127.0.0.1.
+    os.environ.setdefault("LOGIN_RATE_LIMIT_PER_IP", "1000000")
+    os.environ.setdefault("LOGIN_RATE_LIMIT_PER_LOGIN", "1000000")
+
+    with tempfile.TemporaryDirectory(prefix="karto-load-") as workdir:
+        dataset = generate_datasets(Path(workdir), scale)
+        # Bench also points the snapshot store and the write gate at the dataset.
+        app = Bench(dataset).app
+        users = json.loads(dataset["paths"]["users"].read_text(encoding="utf-8"))
+        credentials = [
+            {"login": user["Login"], "password": BENCH_PASSWORD}
+            for user in users
+            if int(user.get("Niveau acces", 0)) >= 4
+        ]
+        map_output = Path(app.root_path) / "static" / "global" / "ouvrages.html"
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        with _preserved(map_output):
+            thread.start()
+            try:
+                yield f"http://127.0.0.1:{server.port}", credentials, dataset["counts"]["sites"]
+            finally:
+                server.shutdown()
+                thread.join()
+
+
+def _print_report(rows: dict[str, Any], wall_time: float, workers: int) -> None:
+    total = sum(row["requests"] for row in rows.values())
+    errors = sum(row["errors"] for row in rows.values())
+    print(f"\n{workers} utilisateurs, {wall_time:.1f} s, {total} requêtes ({total / wall_time:.1f}/s), {errors} erreurs\n")
+    print(f"{'étape':<20} {'req':>6} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'erreurs':>8}")
+    for name, row in rows.items():
+        print(
+            f"{name:<20} {row['requests']:>6} {row['throughput_rps']:>7.1f} {row['p50_ms']:>9.1f} "
+            f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['error_rate']:>7.1%}"
+        )
+
+
+def run(base_url: str, credentials: list[dict[str, str]], options: argparse.Namespace) -> dict[str, Any]:
+    rng = random.Random(options.seed)
+    recorder = Recorder()
+    workers = [
+        Worker(base_url, cred["login"], cred["password"], options, recorder, random.Random(rng.random()))
+        for cred in (credentials[i % len(credentials)] for i in range(options.workers))
+    ]
+    start = time.monotonic()
+    deadline = start + options.duration
+    threads = [threading.Thread(target=worker.run, args=(deadline,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_time = time.monotonic() - start
+    rows = recorder.report(wall_time)
+    _print_report(rows, wall_time, options.workers)
+    return {
+        "target": base_url,
+        "workers": options.workers,
+        "duration_s": wall_time,
+        "journey_steps": options.journey_steps,
+        "steps": rows,
+    }
+
+
+def main() -> int:
+    _add_repo_to_syspath()
+    args = parse_args()
+
+    if args.serve:
+        with _local_server(args.scale) as (base_url, credentials, site_count):
+            if not credentials:
+                print("Aucun compte de niveau 4 ou plus dans le jeu généré.")
+                return 1
+            args.max_index = site_count
+            report = run(base_url, credentials, args)
+        report["scale"] = args.scale
+    else:
+        report = run(args.url, [{"login": args.login, "password": args.password}], args)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nRapport: {args.output}")
+    errors = sum(row["errors"] for row in report["steps"].values())
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
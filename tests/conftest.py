@@ -95,6 +95,7 @@ def app(tmp_path, monkeypatch):
         SECRET_KEY="test-secret",
         WTF_CSRF_ENABLED=False,
         NOTIFICATION_STORE=str(notif_store),
+        SNAPSHOT_DIR=str(Path(tmp_path) / "snapshots"),
     )
 
     # Auto-authenticate only for certain paths during tests to satisfy route protections
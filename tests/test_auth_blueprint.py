@@ -185,3 +185,22 @@ def test_change_password_rejects_bad_current_password(client, monkeypatch, tmp_p
 
     updated_users = json.loads(user_file.read_text(encoding="utf-8"))
     assert updated_users[0]["Mot de passe"] == hashed_password
+
+
+def test_login_is_throttled_before_password_check(app, client, monkeypatch):
+    calls = []
+
+    def fake_verify_user(login_value, password):
+        calls.append(login_value)
+        return None
+
+    monkeypatch.setattr("app.blueprints.auth.auth.verify_user", fake_verify_user)
+    per_login = app.config["LOGIN_RATE_LIMIT_PER_LOGIN"]
+
+    for _ in range(per_login):
+        client.post("/auth/", data={"login": "alice", "password": "wrong"})
+    response = client.post("/auth/", data={"login": "Alice", "password": "wrong"})
+
+    assert response.status_code == 429
+    assert len(calls) == per_login
+    assert app.extensions["login_limiter"].stats()["rejected_login"] == 1
@@ -99,3 +99,101 @@ def test_login_required_redirects_when_no_session(app):
 
     assert response.status_code == 302
     assert "/auth/" in response.location
+
+
+def test_user_directory_indexes_and_reloads_on_change(tmp_path):
+    from app.utils.user_directory import UserDirectory
+
+    user_file = _write_users(tmp_path, [{"Login": "alice", "id": "a1", "Nom": "A"}])
+    directory = UserDirectory(str(user_file))
+
+    assert directory.by_id("a1")["Login"] == "alice"
+    directory.by_login("alice")["Nom"] = "changed"
+    assert directory.by_login("alice")["Nom"] == "A"
+
+    user_file.write_text(
+        json.dumps([{"Login": "alice", "id": "a1", "Nom": "A"}, {"Login": "bob", "id": "b2"}]),
+        encoding="utf-8",
+    )
+    assert directory.by_login("bob")["id"] == "b2"
+
+    users = directory.all()
+    users[0]["Nom"] = "Alice"
+    directory.save(users)
+    assert directory.by_id("a1")["Nom"] == "Alice"
+    assert json.loads(user_file.read_text(encoding="utf-8"))[0]["Nom"] == "Alice"
+
+
+def test_verify_user_rehashes_to_target_method(app, monkeypatch, tmp_path):
+    user_file = _write_users(
+        tmp_path,
+        [{"Login": "alice", "Mot de passe": generate_password_hash("secret", method="pbkdf2:sha256:2000")}],
+    )
+    monkeypatch.setattr(auth, "USER_FILE", str(user_file))
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+
+    assert auth.verify_user("alice", "wrong") is None
+    stored = json.loads(user_file.read_text(encoding="utf-8"))[0]["Mot de passe"]
+    assert stored.startswith("pbkdf2:sha256:2000$")
+
+    assert auth.verify_user("alice", "secret") is not None
+    stored = json.loads(user_file.read_text(encoding="utf-8"))[0]["Mot de passe"]
+    assert stored.startswith("pbkdf2:sha256:1000$")
+    assert auth.verify_user("alice", "secret") is not None
+
+
+def test_rehash_keeps_users_added_while_hashing(app, monkeypatch, tmp_path):
+    user_file = _write_users(
+        tmp_path,
+        [{"Login": "alice", "Mot de passe": generate_password_hash("secret", method="pbkdf2:sha256:2000")}],
+    )
+    monkeypatch.setattr(auth, "USER_FILE", str(user_file))
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+    real_hash = auth.hash_password
+
+    def slow_hash(password):
+        # An administrator adds a user while the new hash is computed.
+        users = json.loads(user_file.read_text(encoding="utf-8"))
+        user_file.write_text(json.dumps(users + [{"Login": "bob"}]), encoding="utf-8")
+        return real_hash(password)
+
+    monkeypatch.setattr(auth, "hash_password", slow_hash)
+    assert auth.verify_user("alice", "secret") is not None
+
+    stored = json.loads(user_file.read_text(encoding="utf-8"))
+    assert [user["Login"] for user in stored] == ["alice", "bob"]
+    assert stored[0]["Mot de passe"].startswith("pbkdf2:sha256:1000$")
+
+
+def test_needs_rehash_expands_default_parameters(app):
+    from app.utils.passwords import needs_rehash
+
+    app.config["PASSWORD_HASH_METHOD"] = "scrypt"
+    assert not needs_rehash("scrypt:32768:8:1$salt$hash")
+    assert needs_rehash("scrypt:16384:8:1$salt$hash")
+    assert needs_rehash("pbkdf2:sha256:600000$salt$hash")
+
+
+def test_stale_session_is_refreshed_from_users_file(app, client, monkeypatch, tmp_path):
+    user_file = _write_users(tmp_path, [{"Login": "alice", "Niveau acces": 2, "id": "a1"}])
+    monkeypatch.setattr(auth, "USER_FILE", str(user_file))
+    with app.test_request_context("/"):
+        stamped = auth.build_session_user(
+            {"Login": "alice", "Niveau acces": 2, "id": "a1"}, auth.current_users_version()
+        )
+    with client.session_transaction() as session:
+        session["user"] = stamped
+
+    user_file.write_text(
+        json.dumps([{"Login": "alice", "Niveau acces": 5, "id": "a1", "Nom": "Admin"}]), encoding="utf-8"
+    )
+    client.get("/auth/")
+    with client.session_transaction() as session:
+        assert session["user"]["access_level"] == 5
+        assert session["user"]["nom"] == "Admin"
+        assert session["user"]["connecte_le"] == stamped["connecte_le"]
+
+    user_file.write_text(json.dumps([]), encoding="utf-8")
+    client.get("/auth/")
+    with client.session_transaction() as session:
+        assert "user" not in session
@@ -0,0 +1,183 @@
+import io
+import json
+import random
+import re
+import zipfile
+
+import pytest
+
+from app.blueprints.gestion_user import users as users_bp
+from app.utils.backup_restore import RestoreError, RestoreLimits, restore_archive
+from app.utils.file_lock import file_lock
+from app.utils.zip_stream import iter_zip
+
+
+@pytest.fixture()
+def data_tree(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    (data_dir / "sites").mkdir(parents=True)
+    (data_dir / "icones").mkdir()
+    (data_dir / "sites" / "recap.json").write_text(json.dumps([{"INDEX": "1"}] * 200), encoding="utf-8")
+    (data_dir / "icones" / "step.png").write_bytes(b"\x89PNG" + bytes(range(256)) * 8)
+    # Upload index and lock sidecars stay out of the archive.
+    (data_dir / "icones" / ".uploads.json").write_text('{"files": {}}', encoding="utf-8")
+    (data_dir / "icones" / ".uploads.json.lock").write_text("", encoding="utf-8")
+    (data_dir / "sites" / "recap.json.lock").write_text("", encoding="utf-8")
+    ouvrages_dir = tmp_path / "ouvrages"
+    ouvrages_dir.mkdir()
+    (ouvrages_dir / "fiche.pdf").write_bytes(b"%PDF-1.4 fiche")
+
+    monkeypatch.setattr(users_bp, "_data_dir", lambda: data_dir)
+    monkeypatch.setattr(users_bp, "_ouvrages_dir", lambda: ouvrages_dir)
+    return data_dir
+
+
+def _login_admin(client):
+    with client.session_transaction() as session:
+        session["user"] = {"login": "admin", "uuid": "u-admin", "access_level": 5}
+
+
+def test_download_backup_streams_zip(client, data_tree):
+    _login_admin(client)
+
+    response = client.get("/users/backup/download")
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert "karto-data-backup-" in response.headers["Content-Disposition"]
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        assert archive.testzip() is None
+        infos = {info.filename: info for info in archive.infolist()}
+        assert set(infos) == {"data/sites/recap.json", "data/icones/step.png"}
+        assert infos["data/sites/recap.json"].compress_type == zipfile.ZIP_DEFLATED
+        assert infos["data/icones/step.png"].compress_type == zipfile.ZIP_STORED
+        assert archive.read("data/icones/step.png") == (data_tree / "icones" / "step.png").read_bytes()
+
+
+def test_download_backup_can_include_ouvrages(client, data_tree):
+    _login_admin(client)
+
+    response = client.get("/users/backup/download?ouvrages=1")
+
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        assert archive.read("static/ouvrages/fiche.pdf") == b"%PDF-1.4 fiche"
+
+
+def test_iter_zip_yields_while_reading(tmp_path):
+    big = tmp_path / "big.bin"
+    big.write_bytes(random.Random(0).randbytes(1024 * 1024))
+
+    chunks = list(iter_zip([(big, "big.bin")], chunk_size=16 * 1024))
+
+    assert len(chunks) > 10
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.read("big.bin") == big.read_bytes()
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def _staging_leftovers(data_dir):
+    # The write gate (.data.write.lock) stays next to the data directory.
+    return [path.name for path in data_dir.parent.iterdir() if path.name.startswith(".") and path.suffix != ".lock"]
+
+
+def test_restore_route_swaps_validated_archive(client, data_tree):
+    _login_admin(client)
+    recap = [{"INDEX": "7", "NOM": "STEP", "LAT": 45.1, "LONG": 1.5}]
+    archive = _zip({
+        "data/sites/recap.json": json.dumps(recap),
+        "data/notif/new.json": "[]",
+        "static/ouvrages/fiche.pdf": b"%PDF",
+    })
+
+    response = client.post(
+        "/users/backup/restore",
+        data={"file": (archive, "backup.zip")},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 302
+    assert json.loads((data_tree / "sites" / "recap.json").read_text(encoding="utf-8")) == recap
+    assert (data_tree / "notif" / "new.json").exists()
+    # Files absent from the archive are kept; no staging directory is left behind.
+    assert (data_tree / "icones" / "step.png").exists()
+    assert _staging_leftovers(data_tree) == []
+
+
+@pytest.mark.parametrize(
+    ("members", "message"),
+    [
+        ({"data/sites/recap.json": "[{"}, "JSON valide"),
+        ({"data/sites/recap.json": json.dumps([{"INDEX": "1"}])}, "champ(s) manquant(s) NOM, LAT, LONG"),
+        ({"data/../escape.json": "[]"}, "non autorise"),
+    ],
+)
+def test_restore_refuses_invalid_archive_without_touching_data(data_tree, members, message):
+    before = (data_tree / "sites" / "recap.json").read_bytes()
+
+    with pytest.raises(RestoreError, match=re.escape(message)):
+        restore_archive(_zip(members), data_tree)
+
+    assert (data_tree / "sites" / "recap.json").read_bytes() == before
+    assert not (data_tree.parent / "escape.json").exists()
+    assert _staging_leftovers(data_tree) == []
+
+
+def test_restore_limits_reject_zip_bombs(data_tree):
+    bomb = _zip({"data/sites/zeros.bin": b"\0" * (4 * 1024 * 1024)})
+    with pytest.raises(RestoreError, match="taux de compression"):
+        restore_archive(bomb, data_tree)
+
+    with pytest.raises(RestoreError, match="Mo une fois decompressee"):
+        restore_archive(_zip({"a.json": "[]" * 1024}), data_tree, RestoreLimits(max_total_bytes=1024))
+
+    with pytest.raises(RestoreError, match="plus de 1 fichiers"):
+        restore_archive(_zip({"a.json": "[]", "b.json": "[]"}), data_tree, RestoreLimits(max_files=1))
+
+
+def test_restore_waits_for_writers_and_keeps_their_writes(data_tree):
+    import threading
+
+    from app.utils.file_lock import register_write_gate
+    from app.utils.utils_json import save_json_file
+
+    register_write_gate(data_tree)
+    notifications = data_tree / "notif" / "notifications.json"
+    notifications.parent.mkdir()
+    archive = _zip({"data/sites/recap.json": json.dumps([{"INDEX": "2", "NOM": "X", "LAT": 1, "LONG": 2}])})
+    restored = threading.Event()
+
+    def restore():
+        restore_archive(archive, data_tree)
+        restored.set()
+
+    with file_lock(notifications):
+        worker = threading.Thread(target=restore)
+        worker.start()
+        # The restore cannot start its copy while a writer holds a data lock.
+        assert not restored.wait(0.2)
+        save_json_file(notifications, [{"id": 1}])
+    worker.join(5)
+
+    assert restored.is_set()
+    assert json.loads(notifications.read_text(encoding="utf-8")) == [{"id": 1}]
+    assert json.loads((data_tree / "sites" / "recap.json").read_text(encoding="utf-8"))[0]["INDEX"] == "2"
+
+
+def test_restore_keeps_the_live_change_log(data_tree):
+    (data_tree / "sites" / "recap.json").write_text(
+        json.dumps([{"INDEX": "1", "NOM": "A", "LAT": 1, "LONG": 2}]), encoding="utf-8"
+    )
+    log = data_tree / "sites" / "recap.changes.jsonl"
+    log.write_text('{"version": 9}\n', encoding="utf-8")
+
+    restore_archive(_zip({"data/sites/recap.changes.jsonl": '{"version": 1}\n'}), data_tree)
+
+    assert log.read_text(encoding="utf-8") == '{"version": 9}\n'
@@ -135,3 +135,71 @@ def test_edit_record_requires_level_four(client):
 
     assert response.status_code == 200
     assert b"Niveau requis" in response.data
+
+
+def test_changes_endpoint_returns_deltas_and_tombstones(app, client, monkeypatch, tmp_path):
+    sites = [
+        {"INDEX": "1", "COMMUNE": "Alpha", "NOM": "Site A", "TYPE": "STEP", "LAT": "45.0", "LONG": "1.0", "ETAT": "ES"},
+        {"INDEX": "2", "COMMUNE": "Beta", "NOM": "Site B", "TYPE": "STEP", "LAT": "45.1", "LONG": "1.1", "ETAT": "ES"},
+    ]
+    data_file = _write_sites(tmp_path, sites)
+    monkeypatch.setattr(edit_sites, "DATA_FILE", str(data_file))
+    type_file = tmp_path / "types.json"
+    type_file.write_text(json.dumps(["STEP"]), encoding="utf-8")
+    monkeypatch.setattr(edit_sites, "TYPE_FILE", str(type_file))
+
+    initial = client.get("/edit-sites/changes").get_json()
+    assert initial["version"] == 2
+    assert [record["NOM"] for record in initial["changed"]] == ["Site A", "Site B"]
+
+    response = client.post("/edit-sites/edit/0", data={"NOM": "Site A bis", "TYPE": "STEP"})
+    assert response.status_code == 302
+    # Simulate a deletion made outside the application.
+    saved = json.loads(data_file.read_text(encoding="utf-8"))
+    data_file.write_text(json.dumps(saved[:1]), encoding="utf-8")
+
+    delta = client.get(f"/edit-sites/changes?since={initial['version']}").get_json()
+    assert [record["NOM"] for record in delta["changed"]] == ["Site A bis"]
+    assert delta["deleted"] == ["2"]
+    assert delta["version"] == 4
+
+    etag = client.get(f"/edit-sites/changes?since={delta['version']}").headers["ETag"]
+    unchanged = client.get(f"/edit-sites/changes?since={delta['version']}", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+
+
+def test_changes_stay_monotonic_across_a_snapshot_restore(app, client, monkeypatch, tmp_path):
+    from app.utils.snapshots import SnapshotStore
+
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    data_file = data_dir / "recap.json"
+    data_file.write_text(
+        json.dumps([{"INDEX": "1", "NOM": "Site A", "TYPE": "STEP", "LAT": "45.0", "LONG": "1.0", "ETAT": "ES"}]),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(edit_sites, "DATA_FILE", str(data_file))
+    type_file = tmp_path / "types.json"
+    type_file.write_text(json.dumps(["STEP"]), encoding="utf-8")
+    monkeypatch.setattr(edit_sites, "TYPE_FILE", str(type_file))
+    store = SnapshotStore(data_dir, tmp_path / "snapshots")
+
+    initial = client.get("/edit-sites/changes").get_json()
+    snapshot = store.create("avant edition")
+    client.post("/edit-sites/edit/0", data={"NOM": "Site A bis", "TYPE": "STEP"})
+    seen = client.get(f"/edit-sites/changes?since={initial['version']}").get_json()
+    assert [record["NOM"] for record in seen["changed"]] == ["Site A bis"]
+
+    # The restore rolls recap.json back but not its change log, so the
+    # rollback reaches clients as a newer version.
+    store.restore(snapshot["id"])
+    after = client.get(f"/edit-sites/changes?since={seen['version']}").get_json()
+    assert after["reset"] is False
+    assert after["version"] > seen["version"]
+    assert [record["NOM"] for record in after["changed"]] == ["Site A"]
+
+    # A client ahead of the log (log lost or rolled back) is told to resync.
+    (data_dir / "recap.changes.jsonl").unlink()
+    reset = client.get(f"/edit-sites/changes?since={after['version'] + 5}").get_json()
+    assert reset["reset"] is True
+    assert [record["NOM"] for record in reset["changed"]] == ["Site A"]
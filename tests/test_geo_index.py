@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from app.blueprints.Contrat import regions as regions_bp
+from app.utils import geo_index
+from app.utils.geo_index import PropertiesIndex, properties_path_for
+
+
+def _write_departments(path, departments):
+    features = [
+        {
+            "type": "Feature",
+            "properties": {"dep": dep, "libgeo": name, "reg": reg},
+            "geometry": {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]]},
+        }
+        for dep, name, reg in departments
+    ]
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}), encoding="utf-8")
+
+
+def test_index_groups_properties_and_writes_sidecar(tmp_path):
+    source = tmp_path / "dept2020.geojson"
+    _write_departments(source, [("19", "Corrèze", "75"), ("35", "Ille-et-Vilaine", "53"), ("87", "Haute-Vienne", 75)])
+
+    index = PropertiesIndex(source, "reg")
+
+    assert [d["dep"] for d in index.get("75")] == ["19", "87"]
+    assert [d["dep"] for d in index.get_many({"53", "75"})] == ["19", "35", "87"]
+    sidecar = json.loads(properties_path_for(source).read_text(encoding="utf-8"))
+    assert "geometry" not in json.dumps(sidecar)
+
+
+def test_index_reads_sidecar_without_parsing_source(tmp_path, monkeypatch):
+    source = tmp_path / "dept2020.geojson"
+    _write_departments(source, [("19", "Corrèze", "75")])
+    PropertiesIndex(source, "reg").all()
+
+    def fail(_):
+        raise AssertionError("geometry file parsed again")
+
+    monkeypatch.setattr(geo_index, "load_json_file", fail)
+    assert PropertiesIndex(source, "reg").get("75")[0]["libgeo"] == "Corrèze"
+
+
+def test_index_rebuilds_when_source_changes(tmp_path):
+    source = tmp_path / "dept2020.geojson"
+    _write_departments(source, [("19", "Corrèze", "75")])
+    index = PropertiesIndex(source, "reg")
+    assert len(index.get("75")) == 1
+
+    _write_departments(source, [("19", "Corrèze", "75"), ("23", "Creuse", "75")])
+
+    assert [d["dep"] for d in index.get("75")] == ["19", "23"]
+    assert [d["dep"] for d in PropertiesIndex(source, "reg").get("75")] == ["19", "23"]
+
+
+def test_index_missing_source_and_sidecar_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        PropertiesIndex(tmp_path / "absent.geojson", "reg").all()
+
+
+def test_region_details_lists_departments_from_index(client, tmp_path, monkeypatch):
+    source = tmp_path / "dept2020.geojson"
+    _write_departments(source, [("19", "Corrèze", "75"), ("35", "Ille-et-Vilaine", "53")])
+    monkeypatch.setattr(regions_bp, "DEPARTMENT_FILE", str(source))
+    with client.session_transaction() as session:
+        session["user"] = {"login": "viewer", "uuid": "u1", "access_level": 1}
+
+    response = client.get("/regions/region/75")
+
+    assert response.status_code == 200
+    assert "Corrèze" in response.get_data(as_text=True)
+    assert "Ille-et-Vilaine" not in response.get_data(as_text=True)
@@ -0,0 +1,77 @@
+import json
+import os
+
+from app.utils import geo_lod
+
+
+def _square(x0, y0, size, points_per_side=50):
+    ring = []
+    for corner in ((0, 0), (1, 0), (1, 1), (0, 1)):
+        ring.append([x0 + corner[0] * size, y0 + corner[1] * size])
+    # Densify every side with points lying on it.
+    dense = []
+    for start, end in zip(ring, ring[1:] + ring[:1]):
+        for step in range(points_per_side):
+            t = step / points_per_side
+            dense.append([start[0] + (end[0] - start[0]) * t, start[1] + (end[1] - start[1]) * t])
+    dense.append(list(dense[0]))
+    return dense
+
+
+def _collection(*rings):
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "properties": {"reg": str(i)}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+            for i, ring in enumerate(rings)
+        ],
+    }
+
+
+def test_simplify_line_drops_collinear_points():
+    line = [[0, 0], [1, 0.0001], [2, 0], [3, 0]]
+    assert geo_lod.simplify_line(line, 0.01) == [[0, 0], [3, 0]]
+    assert geo_lod.simplify_line(line, 0.00001) == line
+
+
+def test_build_and_decode_level_round_trip():
+    geojson = _collection(_square(1.0, 45.0, 1.0), _square(1.3, 45.3, 0.001))
+
+    payload = geo_lod.build_level(geojson, 6, 0.01)
+    decoded = geo_lod.decode_level(json.loads(json.dumps(payload)))
+
+    big, tiny = (feature["geometry"]["coordinates"][0] for feature in decoded["features"])
+    # The dense square is back to its corners, within the quantization step.
+    assert len(big) == 5
+    assert big[0] == big[-1]
+    for (x, y), (ex, ey) in zip(big, [[1, 45], [2, 45], [2, 46], [1, 46], [1, 45]]):
+        assert abs(x - ex) <= 0.001 and abs(y - ey) <= 0.001
+    # Shapes smaller than the tolerance are kept as a triangle.
+    assert len(tiny) == 4
+    assert [f["properties"] for f in decoded["features"]] == [{"reg": "0"}, {"reg": "1"}]
+
+
+def test_select_level_by_zoom():
+    assert geo_lod.select_level(2) == 4
+    assert geo_lod.select_level(6) == 6
+    assert geo_lod.select_level(7) == 6
+    assert geo_lod.select_level(11) == 10
+    assert geo_lod.select_level(13) is None
+
+
+def test_resolve_source_prefers_fresh_level_file(tmp_path):
+    source = tmp_path / "region2020.geojson"
+    source.write_text(json.dumps(_collection(_square(1.0, 45.0, 1.0))), encoding="utf-8")
+    assert geo_lod.resolve_source(source, 6) == source
+
+    geo_lod.write_levels(source)
+    level = geo_lod.resolve_source(source, 6)
+    assert level == tmp_path / "lod" / "region2020.z6.json"
+    assert level.stat().st_size < source.stat().st_size
+    assert geo_lod.read_geojson(level)["features"][0]["properties"] == {"reg": "0"}
+    assert geo_lod.resolve_source(source, 14) == source
+
+    # A source edited after the levels were built is used directly.
+    later = level.stat().st_mtime_ns + 1_000_000_000
+    os.utime(source, ns=(later, later))
+    assert geo_lod.resolve_source(source, 6) == source
@@ -0,0 +1,66 @@
+import io
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app.utils import import_fichier
+from app.utils.import_fichier import UploadError, save_upload
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+
+def _upload(content, filename="icon.png", mimetype="image/png"):
+    return FileStorage(stream=io.BytesIO(content), filename=filename, content_type=mimetype)
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    first = save_upload(_upload(PNG), category="image", target_dir=tmp_path)
+    again = save_upload(_upload(PNG, filename="copie.png"), category="image", target_dir=tmp_path)
+    other = save_upload(_upload(PNG + b"x"), category="image", target_dir=tmp_path)
+
+    assert first == again == tmp_path / "icon.png"
+    assert other == tmp_path / "icon_1.png"
+    assert sorted(path.name for path in tmp_path.iterdir() if not path.name.startswith(".")) == [
+        "icon.png",
+        "icon_1.png",
+    ]
+
+
+def test_files_added_outside_uploads_are_indexed(tmp_path):
+    (tmp_path / "step.png").write_bytes(PNG)
+
+    assert save_upload(_upload(PNG), category="image", target_dir=tmp_path) == tmp_path / "step.png"
+
+
+def test_size_cutoff_stops_reading(tmp_path, monkeypatch):
+    policy = import_fichier.UploadPolicy(
+        allowed_extensions={".png"}, max_size_bytes=2 * import_fichier.CHUNK_SIZE, mime_prefixes=("image/",)
+    )
+    monkeypatch.setitem(import_fichier.UPLOAD_POLICIES, "image", policy)
+    stream = io.BytesIO(b"\0" * (10 * import_fichier.CHUNK_SIZE))
+
+    with pytest.raises(UploadError, match="trop volumineux"):
+        save_upload(FileStorage(stream=stream, filename="big.png", content_type="image/png"),
+                    category="image", target_dir=tmp_path)
+
+    assert stream.tell() <= 3 * import_fichier.CHUNK_SIZE
+    assert [path for path in tmp_path.iterdir() if path.name != import_fichier.UPLOAD_TMP_DIR] == []
+    assert list((tmp_path / import_fichier.UPLOAD_TMP_DIR).iterdir()) == []
+
+
+def test_unchanged_directory_is_not_rescanned(tmp_path, monkeypatch):
+    (tmp_path / "step.png").write_bytes(PNG)
+    save_upload(_upload(PNG + b"a", filename="a.png"), category="image", target_dir=tmp_path)
+
+    hashed = []
+    real_sha256 = import_fichier._file_sha256
+    monkeypatch.setattr(import_fichier, "_file_sha256", lambda path: hashed.append(path.name) or real_sha256(path))
+
+    assert save_upload(_upload(PNG), category="image", target_dir=tmp_path) == tmp_path / "step.png"
+    save_upload(_upload(PNG + b"b", filename="b.png"), category="image", target_dir=tmp_path)
+    assert hashed == []
+
+    # A file dropped by hand changes the directory: only that file is read.
+    (tmp_path / "manual.png").write_bytes(PNG + b"c")
+    assert save_upload(_upload(PNG + b"c"), category="image", target_dir=tmp_path) == tmp_path / "manual.png"
+    assert hashed == ["manual.png"]
@@ -0,0 +1,135 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app.utils.intervention_log import InterventionLog
+
+
+def test_migrates_legacy_file_in_chronological_order(tmp_path):
+    legacy = tmp_path / "commentaire.json"
+    legacy.write_text(
+        json.dumps(
+            [
+                {"id": 7, "date": "02/01/25 08:00:00", "emplacement": 1, "commentaire": "b"},
+                {"id": 3, "date": "01/01/25 08:00:00", "emplacement": "2", "commentaire": "a"},
+                {"id": 5, "date": "22-01-20", "emplacement": 1, "commentaire": "old"},
+            ]
+        ),
+        encoding="utf-8",
+    )
+    log = InterventionLog(tmp_path / "commentaire.jsonl", legacy_path=legacy)
+
+    assert [entry["commentaire"] for entry in log.recent(10)] == ["b", "a", "old"]
+    assert log.last_id == 7
+    assert (tmp_path / "commentaire.jsonl").exists()
+
+
+def test_append_assigns_ids_and_updates_indexes(tmp_path):
+    log = InterventionLog(tmp_path / "commentaire.jsonl")
+
+    first = log.append({"emplacement": 4, "commentaire": "one"})
+    second = log.append({"emplacement": 5, "commentaire": "two", "id": 99})
+    third = log.append({"emplacement": 4, "commentaire": "three"})
+
+    assert [first["id"], second["id"], third["id"]] == [1, 2, 3]
+    assert [entry["commentaire"] for entry in log.recent(2)] == ["three", "two"]
+    assert [entry["commentaire"] for entry in log.for_site("4")] == ["three", "one"]
+    lines = (tmp_path / "commentaire.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 3
+
+
+def test_picks_up_lines_appended_by_another_writer(tmp_path):
+    path = tmp_path / "commentaire.jsonl"
+    writer = InterventionLog(path)
+    reader = InterventionLog(path)
+    writer.append({"emplacement": 1, "commentaire": "first"})
+    assert reader.last_id == 1
+
+    writer.append({"emplacement": 1, "commentaire": "second"})
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write('{"id": 3, "emplacement": 1, "commen')  # partial line
+
+    assert [entry["commentaire"] for entry in reader.for_site(1)] == ["second", "first"]
+
+
+def test_site_page_paginates_with_cursor_and_date_range(tmp_path):
+    log = InterventionLog(tmp_path / "commentaire.jsonl")
+    for day in range(1, 8):
+        log.append({"emplacement": 9, "date": f"0{day}/03/25 10:00:00", "commentaire": f"d{day}"})
+        log.append({"emplacement": 1, "date": f"0{day}/03/25 11:00:00", "commentaire": "other"})
+
+    page, cursor = log.site_page(9, limit=3)
+    assert [entry["commentaire"] for entry in page] == ["d7", "d6", "d5"]
+    page, cursor = log.site_page(9, cursor=cursor, limit=3)
+    assert [entry["commentaire"] for entry in page] == ["d4", "d3", "d2"]
+    page, cursor = log.site_page(9, cursor=cursor, limit=3)
+    assert [entry["commentaire"] for entry in page] == ["d1"]
+    assert cursor is None
+
+    page, cursor = log.site_page(
+        "9",
+        limit=2,
+        date_from=datetime(2025, 3, 2),
+        date_to=datetime(2025, 3, 4, 23, 59),
+    )
+    assert [entry["commentaire"] for entry in page] == ["d4", "d3"]
+    page, cursor = log.site_page("9", cursor=cursor, limit=2, date_from=datetime(2025, 3, 2))
+    assert [entry["commentaire"] for entry in page] == ["d2"]
+    assert cursor is None
+
+
+def test_site_page_orders_entries_synced_out_of_order(tmp_path):
+    log = InterventionLog(tmp_path / "commentaire.jsonl")
+    log.append({"emplacement": 9, "date": "10/03/25 10:00:00", "commentaire": "d10"})
+    log.append({"emplacement": 9, "date": "12/03/25 10:00:00", "commentaire": "d12"})
+    # An offline device syncs an older entry afterwards.
+    log.append_many([{"emplacement": 9, "date": "05/03/25 10:00:00", "commentaire": "d5", "client_id": "c1"}])
+
+    page, cursor = log.site_page(9, date_from=datetime(2025, 3, 1), date_to=datetime(2025, 3, 6))
+    assert [entry["commentaire"] for entry in page] == ["d5"]
+    assert cursor is None
+    page, _ = log.site_page(9, date_from=datetime(2025, 3, 11))
+    assert [entry["commentaire"] for entry in page] == ["d12"]
+    assert [entry["commentaire"] for entry in log.site_page(9)[0]] == ["d12", "d10", "d5"]
+
+    # A fresh reader indexing the file from disk sees the same order.
+    reader = InterventionLog(tmp_path / "commentaire.jsonl")
+    assert [entry["commentaire"] for entry in reader.for_site(9)] == ["d12", "d10", "d5"]
+
+
+def test_recent_is_sorted_by_date(tmp_path):
+    log = InterventionLog(tmp_path / "commentaire.jsonl")
+    log.append({"emplacement": 1, "date": "10/03/25 10:00:00", "commentaire": "d10"})
+    log.append({"emplacement": 2, "date": "05/03/25 10:00:00", "commentaire": "d5"})
+    log.append({"emplacement": 3, "date": "12/03/25 10:00:00", "commentaire": "d12"})
+
+    assert [entry["commentaire"] for entry in log.recent(3)] == ["d12", "d10", "d5"]
+
+
+def test_site_page_cursor_is_stable_when_older_entries_are_synced(tmp_path):
+    log = InterventionLog(tmp_path / "commentaire.jsonl")
+    for day in (2, 4, 6, 8):
+        log.append({"emplacement": 9, "date": f"0{day}/03/25 10:00:00", "commentaire": f"d{day}"})
+
+    page, cursor = log.site_page(9, limit=2)
+    assert [entry["commentaire"] for entry in page] == ["d8", "d6"]
+
+    # Entries synced between two pages, one newer and one older than the cursor.
+    log.append_many([
+        {"emplacement": 9, "date": "07/03/25 10:00:00", "commentaire": "d7"},
+        {"emplacement": 9, "date": "03/03/25 10:00:00", "commentaire": "d3"},
+    ])
+    page, cursor = log.site_page(9, cursor=cursor, limit=2)
+    assert [entry["commentaire"] for entry in page] == ["d4", "d3"]
+    page, cursor = log.site_page(9, cursor=cursor, limit=2)
+    assert [entry["commentaire"] for entry in page] == ["d2"]
+    assert cursor is None
+
+
+def test_site_page_rejects_malformed_cursor(tmp_path):
+    log = InterventionLog(tmp_path / "commentaire.jsonl")
+    log.append({"emplacement": 9, "commentaire": "x"})
+
+    with pytest.raises(ValueError):
+        log.site_page(9, cursor="12")
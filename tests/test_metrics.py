@@ -0,0 +1,61 @@
+import json
+
+from app.blueprints.rights import niveau_user as rights_bp_module
+
+
+def _login_admin(client):
+    with client.session_transaction() as session:
+        session["user"] = {"login": "admin", "uuid": "u-admin", "access_level": 5}
+
+
+def test_metrics_disabled_by_default(app, client):
+    _login_admin(client)
+
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_report_latency_and_json_io(app, client, tmp_path, monkeypatch):
+    rights_file = tmp_path / "droits.json"
+    rights_file.write_text(json.dumps([{"Niveau": 1, "Definition": "Base"}]), encoding="utf-8")
+    monkeypatch.setattr(rights_bp_module, "DATA_FILE", str(rights_file))
+    app.config["METRICS_ENABLED"] = True
+    _login_admin(client)
+
+    client.get("/rights/")
+    client.get("/rights/")
+    body = client.get("/metrics").get_data(as_text=True)
+
+    assert 'karto_request_duration_seconds_count{endpoint="user_rights.index",method="GET"} 2' in body
+    assert 'karto_request_duration_seconds_bucket{endpoint="user_rights.index",method="GET",le="+Inf"} 2' in body
+    assert 'karto_requests_total{endpoint="user_rights.index",method="GET",status="200"} 2' in body
+    assert 'karto_json_loads_total{endpoint="user_rights.index"}' in body
+    assert "karto_response_size_bytes_count" in body
+    assert 'karto_login_attempts_total{result="allowed"} 0' in body
+
+
+def test_metrics_require_admin(app, client):
+    app.config["METRICS_ENABLED"] = True
+    with client.session_transaction() as session:
+        session["user"] = {"login": "tech", "uuid": "u3", "access_level": 3}
+
+    response = client.get("/metrics")
+
+    assert b"karto_request_duration_seconds" not in response.data
+
+
+def test_profile_flag_captures_admin_requests_only(app, client, tmp_path):
+    app.config["PROFILE_DIR"] = str(tmp_path / "profiles")
+    with client.session_transaction() as session:
+        session["user"] = {"login": "tech", "uuid": "u3", "access_level": 3}
+    assert "X-Profile-File" not in client.get("/?_profile=1").headers
+
+    _login_admin(client)
+    response = client.get("/", headers={"X-Profile": "1"})
+    name = response.headers["X-Profile-File"]
+    assert (tmp_path / "profiles" / name).exists()
+
+    listing = client.get("/metrics/profiles").get_json()
+    assert [item["name"] for item in listing["profiles"]] == [name]
+    download = client.get(f"/metrics/profiles/{name}")
+    assert download.status_code == 200
+    assert download.data
@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+
+from app.blueprints.notif import notif as notif_bp
+from app.utils.notification_hub import NotificationHub
+from app.utils.notification_store import NotificationStore
+
+
+def _setup(tmp_path, monkeypatch, notifications):
+    notif_file = tmp_path / "notifications.json"
+    notif_file.write_text(json.dumps(notifications), encoding="utf-8")
+    monkeypatch.setattr(notif_bp, "NOTIFICATION_FILE", str(notif_file))
+    return notif_file
+
+
+def _login(client):
+    with client.session_transaction() as session:
+        session["user"] = {"login": "u3", "uuid": "u3", "access_level": 3}
+
+
+def test_stream_sends_initial_unread_snapshot(app, client, tmp_path, monkeypatch):
+    _setup(
+        tmp_path,
+        monkeypatch,
+        [{"id": "1", "recipient_id": "u3", "message": "hello", "is_read": False, "created_at": "a"}],
+    )
+    app.config.update(NOTIFICATION_STREAM_TIMEOUT=0.05, NOTIFICATION_HEARTBEAT=0.01)
+    _login(client)
+
+    response = client.get("/notif/stream")
+    body = response.get_data(as_text=True)
+
+    assert response.mimetype == "text/event-stream"
+    assert "event: init" in body
+    init_line = next(line for line in body.splitlines() if line.startswith("data: "))
+    payload = json.loads(init_line[len("data: "):])
+    assert payload["unread"] == 1
+    assert payload["notifications"][0]["message"] == "hello"
+
+
+def test_poll_returns_notifications_newer_than_cursor(app, client, tmp_path, monkeypatch):
+    _setup(
+        tmp_path,
+        monkeypatch,
+        [
+            {"id": "1", "recipient_id": "u3", "message": "old", "is_read": False, "created_at": "2025-01-01"},
+            {"id": "2", "recipient_id": "u3", "message": "new", "is_read": False, "created_at": "2025-02-01"},
+        ],
+    )
+    _login(client)
+
+    response = client.get("/notif/poll?since=2025-01-15&count=1&timeout=0")
+    payload = response.get_json()
+
+    assert payload["unread"] == 2
+    assert [item["message"] for item in payload["notifications"]] == ["new"]
+    assert payload["cursor"] == "2025-02-01"
+
+
+def test_poll_times_out_without_changes(app, client, tmp_path, monkeypatch):
+    _setup(
+        tmp_path,
+        monkeypatch,
+        [{"id": "1", "recipient_id": "u3", "message": "old", "is_read": False, "created_at": "2025-01-01"}],
+    )
+    app.config["NOTIFICATION_POLL_TIMEOUT"] = 0.05
+    _login(client)
+
+    payload = client.get("/notif/poll?since=2025-01-01&count=1").get_json()
+
+    assert payload == {"unread": 1, "notifications": [], "cursor": "2025-01-01"}
+
+
+def test_hub_wakes_listener_on_store_write(tmp_path):
+    store_file = tmp_path / "notifications.json"
+    store_file.write_text("[]", encoding="utf-8")
+    store = NotificationStore(str(store_file))
+    hub = NotificationHub(store, watch_interval=0.01)
+    generation = hub.generation
+
+    timer = threading.Timer(
+        0.05, store.add, args=({"id": "1", "recipient_id": "a", "is_read": False},)
+    )
+    timer.start()
+    try:
+        assert hub.wait(generation, timeout=2) != generation
+    finally:
+        timer.cancel()
+
+
+def test_bulk_notify_assigns_distinct_ids(app, client, tmp_path, monkeypatch):
+    notif_file = _setup(tmp_path, monkeypatch, [])
+    _login(client)
+
+    response = client.post(
+        "/notif/notify-bulk",
+        json={"recipient_ids": ["a", "b", "c", "a"], "message": "maintenance"},
+    )
+    payload = response.get_json()
+
+    assert payload["count"] == 3
+    assert len(set(payload["ids"])) == 3
+    saved = json.loads(notif_file.read_text(encoding="utf-8"))
+    assert sorted(item["recipient_id"] for item in saved) == ["a", "b", "c"]
+
+    client.post(f"/notif/read/{payload['ids'][0]}")
+    saved = json.loads(notif_file.read_text(encoding="utf-8"))
+    assert [item["is_read"] for item in saved] == [True, False, False]
+
+
+def test_only_notification_page_opens_the_stream(app, client, tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch, [])
+    _login(client)
+
+    home = client.get("/").get_data(as_text=True)
+    assert "data-notification-stream" not in home
+    assert "data-notification-poll" not in home
+    assert "js/notification.js" not in home
+
+    page = client.get("/notif/view").get_data(as_text=True)
+    assert 'data-notification-stream="/notif/stream"' in page
+
+    app.config["NOTIFICATION_STREAM_ENABLED"] = False
+    page = client.get("/notif/view").get_data(as_text=True)
+    assert "data-notification-stream" not in page
+    assert 'data-notification-poll="/notif/poll"' in page
+    assert client.get("/notif/stream").status_code == 404
+
+
+def test_poll_with_empty_cursor_waits_for_changes(app, client, tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch, [])
+    app.config["NOTIFICATION_POLL_TIMEOUT"] = 0.2
+    _login(client)
+
+    assert client.get("/notif/poll").get_json() == {"unread": 0, "notifications": [], "cursor": ""}
+
+    started = time.monotonic()
+    payload = client.get("/notif/poll?since=&count=0").get_json()
+    assert time.monotonic() - started >= 0.2
+    assert payload == {"unread": 0, "notifications": [], "cursor": ""}
@@ -0,0 +1,143 @@
+import json
+import os
+from datetime import datetime
+
+from app.utils.notification_store import (
+    NotificationStore,
+    get_notification_store,
+    new_notification_id,
+)
+
+
+def _write(path, notifications):
+    path.write_text(json.dumps(notifications), encoding="utf-8")
+
+
+def test_unread_count_and_recipient_index(tmp_path):
+    store_file = tmp_path / "notifications.json"
+    _write(
+        store_file,
+        [
+            {"id": "1", "recipient_id": "a", "is_read": False, "created_at": "2025-01-01"},
+            {"id": "2", "recipient_id": "b", "is_read": False, "created_at": "2025-01-02"},
+            {"id": "3", "recipient_id": "a", "is_read": True, "created_at": "2025-01-03"},
+        ],
+    )
+    store = NotificationStore(str(store_file))
+
+    assert store.unread_count("a") == 1
+    assert store.unread_count("missing") == 0
+    assert [item["id"] for item in store.for_recipient("a")] == ["1", "3"]
+    assert [item["id"] for item in store.unread_for("a")] == ["1"]
+
+
+def test_add_and_mark_read_update_counter_and_file(tmp_path):
+    store_file = tmp_path / "notifications.json"
+    _write(store_file, [])
+    store = NotificationStore(str(store_file))
+
+    store.add({"id": "10", "recipient_id": "a", "is_read": False, "created_at": "x"})
+    assert store.unread_count("a") == 1
+
+    assert store.mark_read("10") == 1
+    assert store.unread_count("a") == 0
+    assert store.mark_read("10") == 0
+
+    saved = json.loads(store_file.read_text(encoding="utf-8"))
+    assert saved == [{"id": "10", "recipient_id": "a", "is_read": True, "created_at": "x"}]
+
+
+def test_external_write_invalidates_cache(tmp_path):
+    store_file = tmp_path / "notifications.json"
+    _write(store_file, [])
+    store = NotificationStore(str(store_file))
+    assert store.unread_count("a") == 0
+
+    _write(store_file, [{"id": "1", "recipient_id": "a", "is_read": False}])
+    stat = store_file.stat()
+    os.utime(store_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert store.unread_count("a") == 1
+
+
+def test_missing_file_behaves_as_empty_store(tmp_path):
+    store = NotificationStore(str(tmp_path / "absent.json"))
+
+    assert store.unread_count("a") == 0
+    assert store.for_recipient("a") == []
+
+
+def test_get_notification_store_is_shared_per_path(tmp_path):
+    path = str(tmp_path / "notifications.json")
+
+    assert get_notification_store(path) is get_notification_store(path)
+
+
+def test_compact_archives_old_read_notifications(tmp_path):
+    store_file = tmp_path / "notifications.json"
+    _write(
+        store_file,
+        [
+            {"id": "1", "recipient_id": "a", "is_read": True, "created_at": "2024-01-05T10:00:00"},
+            {"id": "2", "recipient_id": "a", "is_read": False, "created_at": "2024-01-06T10:00:00"},
+            {"id": "3", "recipient_id": "a", "is_read": True, "created_at": "2024-03-30T10:00:00"},
+        ],
+    )
+    store = NotificationStore(str(store_file), retention_days=30)
+
+    moved = store.compact(now=datetime(2024, 4, 1))
+
+    assert moved == 1
+    assert [item["id"] for item in store.for_recipient("a")] == ["2", "3"]
+    active = json.loads(store_file.read_text(encoding="utf-8"))
+    assert [item["id"] for item in active] == ["2", "3"]
+    archived = json.loads((tmp_path / "archive" / "notifications-2024-01.json").read_text(encoding="utf-8"))
+    assert [item["id"] for item in archived] == ["1"]
+
+
+def test_first_write_triggers_compaction(tmp_path):
+    store_file = tmp_path / "notifications.json"
+    _write(
+        store_file,
+        [{"id": "1", "recipient_id": "a", "is_read": True, "created_at": "2000-01-01T00:00:00"}],
+    )
+    store = NotificationStore(str(store_file), retention_days=30, archive_dir=tmp_path / "old")
+
+    store.add({"id": "2", "recipient_id": "a", "is_read": False, "created_at": "2999-01-01T00:00:00"})
+
+    active = json.loads(store_file.read_text(encoding="utf-8"))
+    assert [item["id"] for item in active] == ["2"]
+    assert (tmp_path / "old" / "notifications-2000-01.json").exists()
+
+
+def test_new_notification_ids_are_unique_and_ordered():
+    ids = [new_notification_id() for _ in range(5000)]
+
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert all(item[14] == "7" for item in ids)
+
+
+def test_add_many_writes_batch_once(tmp_path, monkeypatch):
+    from app.utils import notification_store
+
+    store_file = tmp_path / "notifications.json"
+    _write(store_file, [])
+    store = NotificationStore(str(store_file), retention_days=None)
+    saves = []
+    original_save = notification_store.save_json_file
+    monkeypatch.setattr(
+        notification_store,
+        "save_json_file",
+        lambda path, data: saves.append(path) or original_save(path, data),
+    )
+
+    batch = [
+        {"id": new_notification_id(), "recipient_id": f"user-{i}", "is_read": False}
+        for i in range(300)
+    ]
+    store.add_many(batch)
+
+    assert len(saves) == 1
+    assert store.unread_count("user-299") == 1
+    assert len(json.loads(store_file.read_text(encoding="utf-8"))) == 300
@@ -0,0 +1,70 @@
+import json
+
+import app.blueprints.pr_maint as pr_maint_bp
+
+
+def _setup_maintenance(tmp_path, monkeypatch, comments):
+    recap_file = tmp_path / "recap.json"
+    recap_file.write_text("[]", encoding="utf-8")
+    comment_file = tmp_path / "commentaire.json"
+    comment_file.write_text(json.dumps(comments), encoding="utf-8")
+    monkeypatch.setattr(pr_maint_bp, "RECUP_FILE", recap_file)
+    monkeypatch.setattr(pr_maint_bp, "COMMENT_FILE", comment_file)
+
+
+def _login(client):
+    with client.session_transaction() as session:
+        session["user"] = {"login": "tech", "uuid": "u3", "access_level": 3, "prenom": "A", "nom": "B"}
+
+
+def test_site_history_json_pages(client, tmp_path, monkeypatch):
+    comments = [
+        {"id": i, "date": f"{i:02d}/04/25 09:00:00", "emplacement": 12, "commentaire": f"c{i}", "site": "PR Bourg"}
+        for i in range(1, 6)
+    ]
+    _setup_maintenance(tmp_path, monkeypatch, comments)
+    _login(client)
+
+    first = client.get("/maintenance/sites/12/historique?format=json&limit=2").get_json()
+    assert [entry["commentaire"] for entry in first["interventions"]] == ["c5", "c4"]
+
+    second = client.get(
+        f"/maintenance/sites/12/historique?format=json&limit=2&cursor={first['next_cursor']}"
+    ).get_json()
+    assert [entry["commentaire"] for entry in second["interventions"]] == ["c3", "c2"]
+
+    filtered = client.get("/maintenance/sites/12/historique?format=json&from=2025-04-02&to=2025-04-03").get_json()
+    assert [entry["commentaire"] for entry in filtered["interventions"]] == ["c3", "c2"]
+    assert filtered["next_cursor"] is None
+
+    assert client.get("/maintenance/sites/12/historique?format=json&cursor=4").status_code == 400
+
+
+def test_site_history_page_renders_and_new_intervention_appears(client, tmp_path, monkeypatch):
+    _setup_maintenance(tmp_path, monkeypatch, [])
+    _login(client)
+
+    response = client.post(
+        "/maintenance/interventions",
+        data={"emplacement": "7", "commentaire": "Poire changée", "site_label": "PR Gare"},
+    )
+    assert response.status_code == 302
+
+    page = client.get("/maintenance/sites/7/historique?limit=1")
+    assert page.status_code == 200
+    assert "Poire changée" in page.get_data(as_text=True)
+    assert "PR Gare" in page.get_data(as_text=True)
+
+
+def test_site_history_page_escapes_comments(client, tmp_path, monkeypatch):
+    _setup_maintenance(
+        tmp_path,
+        monkeypatch,
+        [{"id": 1, "date": "01/04/25 09:00:00", "emplacement": 3, "commentaire": "<script>alert(1)</script>\nok"}],
+    )
+    _login(client)
+
+    body = client.get("/maintenance/sites/3/historique").get_data(as_text=True)
+
+    assert "<script>alert(1)</script>" not in body
+    assert "&lt;script&gt;alert(1)&lt;/script&gt;" in body
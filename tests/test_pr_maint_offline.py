@@ -0,0 +1,121 @@
+import json
+
+import app.blueprints.pr_maint as pr_maint_bp
+from app.utils.intervention_log import InterventionLog
+
+
+def _setup_maintenance(tmp_path, monkeypatch, sites):
+    recap_file = tmp_path / "recap.json"
+    recap_file.write_text(json.dumps(sites), encoding="utf-8")
+    type_file = tmp_path / "type_site.json"
+    type_file.write_text(json.dumps([{"type": "STEP", "icon": "step.png"}]), encoding="utf-8")
+    comment_file = tmp_path / "commentaire.json"
+    comment_file.write_text("[]", encoding="utf-8")
+    monkeypatch.setattr(pr_maint_bp, "RECUP_FILE", recap_file)
+    monkeypatch.setattr(pr_maint_bp, "TYPE_FILE", type_file)
+    monkeypatch.setattr(pr_maint_bp, "COMMENT_FILE", comment_file)
+    return recap_file
+
+
+def _login(client):
+    with client.session_transaction() as session:
+        session["user"] = {"login": "tech", "uuid": "u3", "access_level": 3, "prenom": "A", "nom": "B"}
+
+
+def test_append_many_skips_known_client_ids(tmp_path):
+    log = InterventionLog(tmp_path / "commentaire.jsonl")
+    log.append_many([{"emplacement": 1, "commentaire": "a", "client_id": "x"}])
+
+    records = log.append_many(
+        [
+            {"emplacement": 1, "commentaire": "a", "client_id": "x"},
+            {"emplacement": 2, "commentaire": "b", "client_id": "y"},
+            {"emplacement": 2, "commentaire": "b", "client_id": "y"},
+        ]
+    )
+
+    assert [record["id"] for record in records] == [1, 2, 2]
+    assert records[0]["duplicate"] is True
+    assert log.last_id == 2
+    changes, truncated = log.changes_since(1)
+    assert [entry["client_id"] for entry in changes] == ["y"]
+    assert truncated is False
+
+
+def test_sites_json_is_compact_and_revalidated_with_etag(client, tmp_path, monkeypatch):
+    _setup_maintenance(
+        tmp_path,
+        monkeypatch,
+        [
+            {"INDEX": "1", "NOM": "Laval", "TYPE": "STEP", "COMMUNE": "ALLASSAC", "LAT": "45.2", "LONG": "1.4"},
+            {"INDEX": "2", "NOM": "Sans GPS", "TYPE": "STEP", "COMMUNE": "X", "LAT": "0", "LONG": "0"},
+        ],
+    )
+    _login(client)
+
+    response = client.get("/maintenance/sites.json")
+    payload = response.get_json()
+    assert payload["fields"] == ["id", "nom", "type", "commune", "lat", "lon"]
+    assert payload["sites"] == [["1", "Laval", "STEP", "ALLASSAC", 45.2, 1.4]]
+    assert payload["icons"] == {"STEP": "/maintenance/icones/step.png"}
+
+    etag = response.headers["ETag"]
+    cached = client.get("/maintenance/sites.json", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+
+    # A new icon in type_site.json alone invalidates the table and the worker cache.
+    worker = client.get("/maintenance/sw.js").get_data(as_text=True)
+    (tmp_path / "type_site.json").write_text(
+        json.dumps([{"type": "STEP", "icon": "step.png"}, {"type": "PR", "icon": "pr.png"}]), encoding="utf-8"
+    )
+    changed = client.get("/maintenance/sites.json", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.get_json()["icons"]["PR"] == "/maintenance/icones/pr.png"
+    new_worker = client.get("/maintenance/sw.js").get_data(as_text=True)
+    assert new_worker.splitlines()[1] != worker.splitlines()[1]
+
+
+def test_bulk_sync_is_idempotent_and_returns_delta(client, tmp_path, monkeypatch):
+    _setup_maintenance(tmp_path, monkeypatch, [])
+    _login(client)
+    batch = {
+        "interventions": [
+            {"client_id": "c1", "emplacement": "12", "commentaire": "vidange", "date": "03/05/25 08:15:00"},
+            {"client_id": "c2", "emplacement": "abc", "commentaire": "invalide"},
+        ],
+        "since": 0,
+    }
+
+    first = client.post("/maintenance/interventions/bulk", json=batch).get_json()
+    assert first["accepted"] == [{"client_id": "c1", "id": 1}]
+    assert [item["client_id"] for item in first["rejected"]] == ["c2"]
+    assert first["version"] == 1
+    assert first["changes"][0]["date"] == "03/05/25 08:15:00"
+    assert first["changes"][0]["utilisateur"] == "A B"
+
+    retry = client.post("/maintenance/interventions/bulk", json=batch).get_json()
+    assert retry["accepted"] == [{"client_id": "c1", "id": 1}]
+    assert retry["version"] == 1
+    assert retry["reset"] is False
+
+    # A device remembering a version from before a backup restore resyncs.
+    ahead = client.post("/maintenance/interventions/bulk", json={"interventions": [], "since": 7}).get_json()
+    assert ahead["reset"] is True
+    assert ahead["version"] == 1
+    assert [entry["client_id"] for entry in ahead["changes"]] == ["c1"]
+    lines = (tmp_path / "commentaire.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+
+
+def test_service_worker_lists_precached_urls(client, tmp_path, monkeypatch):
+    _setup_maintenance(tmp_path, monkeypatch, [])
+    _login(client)
+
+    response = client.get("/maintenance/sw.js")
+    body = response.get_data(as_text=True)
+
+    assert response.mimetype == "application/javascript"
+    assert "/maintenance/sites.json" in body
+    assert "/maintenance/icones/step.png" in body
@@ -0,0 +1,42 @@
+from app.utils.rate_limit import LoginRateLimiter, MemoryBuckets, SQLiteBuckets
+
+
+def test_buckets_refill_over_the_window():
+    limiter = LoginRateLimiter(MemoryBuckets(), per_login=2, per_ip=10, window=60)
+
+    assert limiter.check("bob", "10.0.0.1", now=0)
+    assert limiter.check("bob", "10.0.0.1", now=1)
+    assert not limiter.check("bob", "10.0.0.1", now=2)
+    # One token comes back every 30 seconds.
+    assert limiter.check("bob", "10.0.0.1", now=32)
+    assert limiter.stats() == {"allowed": 3, "rejected_login": 1, "rejected_ip": 0}
+
+
+def test_ip_bucket_covers_every_login():
+    limiter = LoginRateLimiter(MemoryBuckets(), per_login=5, per_ip=3, window=60)
+
+    assert all(limiter.check(f"user{i}", "10.0.0.2", now=0) for i in range(3))
+    assert not limiter.check("user9", "10.0.0.2", now=0)
+    assert limiter.check("user9", "10.0.0.3", now=0)
+    assert limiter.stats()["rejected_ip"] == 1
+
+
+def test_memory_buckets_are_bounded():
+    buckets = MemoryBuckets(max_keys=3)
+    for i in range(10):
+        buckets.take([(f"k{i}", 1.0, 0.0)], now=0)
+
+    assert len(buckets) == 3
+    # The most recent key is still tracked and empty.
+    assert buckets.take([("k9", 1.0, 0.0)], now=0) == "k9"
+
+
+def test_sqlite_buckets_are_shared_between_instances(tmp_path):
+    db_path = tmp_path / "limits.sqlite"
+    first = LoginRateLimiter(SQLiteBuckets(db_path), per_login=1, per_ip=10, window=60)
+    second = LoginRateLimiter(SQLiteBuckets(db_path), per_login=1, per_ip=10, window=60)
+
+    assert first.check("carol", "10.0.0.4", now=0)
+    assert not second.check("carol", "10.0.0.4", now=1)
+    second.reset_login("carol")
+    assert first.check("carol", "10.0.0.4", now=2)
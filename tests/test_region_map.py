@@ -0,0 +1,77 @@
+import json
+
+from app.blueprints.Contrat import regions as regions_bp
+from app.utils import region_map
+
+
+def _write_regions(path, *names):
+    features = [
+        {"type": "Feature", "properties": {"libgeo": name, "reg": str(code)}, "geometry": None}
+        for code, name in enumerate(names, start=1)
+    ]
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}), encoding="utf-8")
+
+
+def _setup(app, tmp_path, monkeypatch):
+    source = tmp_path / "region2020.geojson"
+    _write_regions(source, "Bretagne")
+    monkeypatch.setattr(regions_bp, "REGION_FILE", str(source))
+    app.config["REGION_MAP_CACHE_DIR"] = str(tmp_path / "maps")
+
+    renders = []
+
+    def fake_render(geojson, details_url):
+        renders.append(details_url)
+        names = [feature["properties"]["libgeo"] for feature in geojson["features"]]
+        return f"<html>{' '.join(names)} {details_url}</html>"
+
+    monkeypatch.setattr(region_map, "render_region_map", fake_render)
+    return source, renders
+
+
+def _login(client):
+    with client.session_transaction() as session:
+        session["user"] = {"login": "viewer", "uuid": "u1", "access_level": 1}
+
+
+def _map_url(response):
+    body = response.get_data(as_text=True)
+    start = body.index("/regions/map/")
+    return body[start:body.index('"', start)]
+
+
+def test_region_map_rendered_once_and_served_from_cache(app, client, tmp_path, monkeypatch):
+    _, renders = _setup(app, tmp_path, monkeypatch)
+    _login(client)
+
+    first = client.get("/regions/map")
+    second = client.get("/regions/map")
+
+    assert first.status_code == second.status_code == 200
+    assert len(renders) == 1
+    assert "/regions/region/__REGION__" in renders[0]
+    url = _map_url(first)
+    assert url == _map_url(second)
+
+    artifact = client.get(url)
+    assert artifact.status_code == 200
+    assert b"Bretagne" in artifact.data
+    assert "immutable" in artifact.headers["Cache-Control"]
+
+
+def test_region_map_rebuilt_in_background_when_source_changes(app, client, tmp_path, monkeypatch):
+    source, renders = _setup(app, tmp_path, monkeypatch)
+    _login(client)
+    old_url = _map_url(client.get("/regions/map"))
+
+    _write_regions(source, "Bretagne", "Normandie")
+    # The previous map is served while the new one is rendered.
+    assert _map_url(client.get("/regions/map")) == old_url
+    with app.test_request_context():
+        regions_bp._region_map_cache().wait(5)
+
+    new_url = _map_url(client.get("/regions/map"))
+    assert new_url != old_url
+    assert len(renders) == 2
+    assert b"Normandie" in client.get(new_url).data
+
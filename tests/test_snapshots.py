@@ -0,0 +1,137 @@
+import json
+
+import pytest
+
+from app.blueprints.gestion_user import users as users_bp
+from app.utils.snapshots import SnapshotStore
+
+
+@pytest.fixture()
+def data_dir(tmp_path):
+    data_dir = tmp_path / "data"
+    (data_dir / "sites").mkdir(parents=True)
+    (data_dir / "users").mkdir()
+    (data_dir / "sites" / "recap.json").write_text(json.dumps([{"INDEX": "1"}]), encoding="utf-8")
+    (data_dir / "users" / "users.json").write_text("[]", encoding="utf-8")
+    (data_dir / "sites" / "recap.json.lock").write_text("", encoding="utf-8")
+    return data_dir
+
+
+def _objects(store):
+    return sorted(path.name for path in (store.root / "objects").glob("*/*"))
+
+
+def test_create_stores_each_content_once(tmp_path, data_dir):
+    store = SnapshotStore(data_dir, tmp_path / "snapshots")
+
+    first = store.create("initial")
+    assert set(first["files"]) == {"sites/recap.json", "users/users.json"}
+    assert len(_objects(store)) == 2
+
+    # Nothing changed: no new manifest.
+    assert store.create("again")["id"] == first["id"]
+
+    (data_dir / "users" / "users.json").write_text('[{"login": "a"}]', encoding="utf-8")
+    second = store.create("user added", "admin")
+    assert second["id"] > first["id"]
+    assert second["user"] == "admin"
+    assert second["files"]["sites/recap.json"] == first["files"]["sites/recap.json"]
+    assert len(_objects(store)) == 3
+    assert [manifest["id"] for manifest in store.list()] == [second["id"], first["id"]]
+
+
+def test_diff_and_restore(tmp_path, data_dir):
+    store = SnapshotStore(data_dir, tmp_path / "snapshots")
+    first = store.create("initial")
+    recap = data_dir / "sites" / "recap.json"
+    original = recap.read_bytes()
+
+    recap.write_text("[]", encoding="utf-8")
+    (data_dir / "sites" / "extra.json").write_text("{}", encoding="utf-8")
+    (data_dir / "users" / "users.json").unlink()
+
+    assert store.diff(first["id"]) == {
+        "added": ["sites/extra.json"],
+        "removed": ["users/users.json"],
+        "modified": ["sites/recap.json"],
+    }
+
+    touched = store.restore(first["id"], paths=["sites/recap.json"])
+    assert touched == ["sites/recap.json"]
+    assert recap.read_bytes() == original
+    assert (data_dir / "sites" / "extra.json").exists()
+
+    store.restore(first["id"])
+    assert store.diff(first["id"]) == {"added": [], "removed": [], "modified": []}
+    # The state before each restore was kept, so the restore can be undone.
+    assert any(manifest["reason"].startswith("avant restauration") for manifest in store.list())
+
+
+def test_prune_keeps_latest_and_collects_objects(tmp_path, data_dir):
+    store = SnapshotStore(data_dir, tmp_path / "snapshots", keep=2)
+    users = data_dir / "users" / "users.json"
+    for count in range(4):
+        users.write_text(json.dumps(["user"] * count), encoding="utf-8")
+        store.create(f"v{count}")
+
+    manifests = store.list()
+    assert [manifest["reason"] for manifest in manifests] == ["v3", "v2"]
+    referenced = {entry["sha256"] for manifest in manifests for entry in manifest["files"].values()}
+    assert set(_objects(store)) == referenced
+
+
+def test_unknown_snapshot_id(tmp_path, data_dir):
+    store = SnapshotStore(data_dir, tmp_path / "snapshots")
+    with pytest.raises(KeyError):
+        store.get("../../etc/passwd")
+    with pytest.raises(KeyError):
+        store.diff("20260101T000000000Z")
+
+
+def test_snapshot_routes(client, app, tmp_path, data_dir, monkeypatch):
+    store = SnapshotStore(data_dir, tmp_path / "route-snapshots")
+    monkeypatch.setattr(users_bp, "get_snapshot_store", lambda: store)
+    with client.session_transaction() as session:
+        session["user"] = {"login": "admin", "uuid": "u-admin", "access_level": 5}
+
+    response = client.post("/users/snapshots")
+    assert response.status_code == 302
+    snapshot_id = store.latest()["id"]
+    assert store.latest()["user"] == "admin"
+
+    (data_dir / "sites" / "recap.json").write_text("[]", encoding="utf-8")
+    diff = client.get(f"/users/snapshots/{snapshot_id}/diff").get_json()
+    assert diff["modified"] == ["sites/recap.json"]
+    assert client.get("/users/snapshots/20260101T000000000Z/diff").status_code == 404
+
+    page = client.get(f"/users/snapshots?diff={snapshot_id}")
+    assert page.status_code == 200
+    assert snapshot_id.encode() in page.data
+
+    response = client.post(f"/users/snapshots/{snapshot_id}/restore")
+    assert response.status_code == 302
+    assert json.loads((data_dir / "sites" / "recap.json").read_text(encoding="utf-8")) == [{"INDEX": "1"}]
+
+
+def test_restore_oldest_snapshot_of_a_full_store(tmp_path, data_dir):
+    store = SnapshotStore(data_dir, tmp_path / "snapshots", keep=2)
+    users = data_dir / "users" / "users.json"
+    oldest = store.create("v0")
+    users.write_text('["a"]', encoding="utf-8")
+    store.create("v1")
+    users.write_text('["a", "b"]', encoding="utf-8")
+
+    assert store.restore(oldest["id"]) == ["users/users.json"]
+    assert users.read_text(encoding="utf-8") == "[]"
+    assert store.get(oldest["id"])["reason"] == "v0"
+
+
+def test_store_can_snapshot_another_data_dir(app, tmp_path, data_dir):
+    from app.utils.snapshots import get_snapshot_store
+
+    app.config.update(SNAPSHOT_DIR=str(tmp_path / "other-snapshots"), SNAPSHOT_DATA_DIR=str(data_dir))
+    with app.app_context():
+        store = get_snapshot_store()
+
+    assert store.data_dir.resolve() == data_dir.resolve()
+    assert set(store.create("bench")["files"]) == {"sites/recap.json", "users/users.json"}
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Modules that must only be imported by the views that use them.
+DEFERRED_MODULES = ("folium", "branca", "babel", "pyproj")
+# Generous ceiling (microseconds) for the imports done by create_app; a cold
+# folium import alone used to cost most of it.
+STARTUP_IMPORT_BUDGET_US = 1_500_000
+
+
+def _importtime(code: str) -> dict[str, int]:
+    """Return {top-level module: cumulative microseconds} from ``python -X importtime``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.rstrip()] = int(cumulative)
+    return modules
+
+
+def test_create_app_defers_heavy_imports_and_fits_budget():
+    modules = _importtime("from app import create_app; create_app()")
+    imported = {name.strip().split(".")[0] for name in modules}
+    assert not imported.intersection(DEFERRED_MODULES)
+
+    interpreter = set(_importtime("pass"))
+    top_level = sum(
+        cumulative
+        for name, cumulative in modules.items()
+        if not name.startswith(" ") and name not in interpreter
+    )
+    assert top_level < STARTUP_IMPORT_BUDGET_US
@@ -129,3 +129,41 @@ def test_main_page_shows_rights_definition(monkeypatch, client):
 
     assert response.status_code == 200
     assert b"Maintenance" in response.data
+
+
+def test_rights_registry_follows_rights_edits(client, tmp_path, monkeypatch):
+    from app.utils.rights_registry import get_rights_registry
+
+    _setup_rights_file(tmp_path, monkeypatch)
+    registry = get_rights_registry(rights_bp_module.DATA_FILE)
+    assert registry.definition(7) is None
+    with client.session_transaction() as session:
+        session["user"] = {"login": "admin", "uuid": "u-admin", "access_level": 5}
+
+    client.post("/rights/add", data={"niveau": "7", "definition": "Audit"})
+    assert registry.definition(7) == "Audit"
+
+    client.post("/rights/edit/7", data={"definition": "Audit externe"})
+    assert registry.definition("7") == "Audit externe"
+
+    client.post("/rights/delete/7")
+    assert registry.get(7) is None
+
+
+def test_edit_user_deleted_meanwhile_returns_404(client, tmp_path, monkeypatch):
+    _setup_user_file(tmp_path, monkeypatch)
+
+    class _DeletedMeanwhile:
+        def by_login(self, login):
+            return {"Login": login}
+
+        def all(self):
+            return []
+
+    monkeypatch.setattr(users_bp_module, "_users", lambda: _DeletedMeanwhile())
+    with client.session_transaction() as session:
+        session["user"] = {"login": "admin", "uuid": "u-admin", "access_level": 5}
+
+    response = client.post("/users/edit/gone", data={"nom": "N", "prenom": "P", "email": "e@x"})
+
+    assert response.status_code == 404
@@ -72,3 +72,16 @@ def test_get_next_index_and_unique_values(tmp_path):
 
     values = uj.get_unique_field_values(str(filepath), "status")
     assert values == ["CLOSED", "OPEN"]
+
+
+def test_save_json_file_replaces_file_without_leftovers(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("[1]", encoding="utf-8")
+    inode = path.stat().st_ino
+
+    uj.save_json_file(str(path), [{"INDEX": 1}])
+
+    assert json.loads(path.read_text(encoding="utf-8")) == [{"INDEX": 1}]
+    # Written beside the target then moved over it: readers never see a partial file.
+    assert path.stat().st_ino != inode
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]